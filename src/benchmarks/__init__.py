@@ -0,0 +1,2 @@
+
+# Headless benchmarks; run from src/ with "python -m benchmarks.<name>"
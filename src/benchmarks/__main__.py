@@ -0,0 +1,25 @@
+"""python -m benchmarks [filters...] [--json report.json] [--baseline old.json]"""
+import sys
+
+from benchmarks import (  # noqa: F401 - importing registers the benchmarks
+    bench_animation,
+    bench_collision,
+    bench_forest,
+    bench_lighting,
+    bench_memory,
+    bench_minimap,
+    bench_navigation,
+    bench_npcs,
+    bench_particles,
+    bench_planner,
+    bench_player_stats,
+    bench_profiler,
+    bench_savegame,
+    bench_server,
+    bench_simulation,
+    bench_ui,
+    bench_world,
+)
+from benchmarks.harness import main
+
+sys.exit(main())
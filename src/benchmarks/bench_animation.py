@@ -0,0 +1,78 @@
+"""Character animation: shared clip tables against textures and timers per sprite"""
+import random
+
+import arcade
+from PIL import Image
+
+from benchmarks.harness import benchmark
+from core.animation import Animator, ClipLibrary, default_clips
+from core.assets import MANIFEST, resolve
+
+FRAME_TIME = 1 / 60
+
+
+def clip_names(library, seed, sprites):
+    rng = random.Random(seed)
+    return [rng.choice(list(library.ids)) for _ in range(sprites)]
+
+
+@benchmark("animation.update", sprites=[1_000, 10_000], batched=[True, False], frames=[120])
+def update(seed, sprites, batched, frames):
+    """Advance every sprite one frame; the unbatched case keeps a clock per sprite in Python"""
+    library = ClipLibrary()
+    names = clip_names(library, seed, sprites)
+    if batched:
+        animator = Animator(library, sprites)
+        for name in names:
+            animator.add(arcade.Sprite(), library.ids[name])
+
+        def op():
+            for _ in range(frames):
+                animator.update(FRAME_TIME)
+        return op, sprites * frames
+
+    textures = library.textures
+    tables = {name: library.frames[library.offset[clip]:library.offset[clip] + library.length[clip]].tolist()
+              for name, clip in library.ids.items()}
+    fps = {name: float(library.fps[clip]) for name, clip in library.ids.items()}
+    states = [[arcade.Sprite(textures[tables[name][0]]), tables[name], fps[name], 0.0, tables[name][0]]
+              for name in names]
+
+    def op():
+        for _ in range(frames):
+            for state in states:
+                sprite, table, rate, time, shown = state
+                time += FRAME_TIME
+                frame = table[int(time * rate) % len(table)]
+                if frame != shown:
+                    sprite.texture = textures[frame]
+                state[3] = time
+                state[4] = frame
+    return op, sprites * frames
+
+
+@benchmark("animation.load", sprites=[50], shared=[True, False])
+def load(seed, sprites, shared):
+    """Give each sprite every clip; the unshared case decodes its own copy of each frame.
+
+    PIL pixel buffers are not traced, so the peak understates the gap: the
+    shared library holds ``image_bytes`` (528 KiB) however many sprites use
+    it, while unshared sprites hold that much each.
+    """
+    names = sorted({name for clip in default_clips() for name, _ in clip.frames})
+    paths = [resolve(MANIFEST[name]) for name in names]
+
+    def op():
+        if shared:
+            library = ClipLibrary()
+            return [(arcade.Sprite(library.textures[0]), library) for _ in range(sprites)]
+        kept = []
+        for index in range(sprites):
+            frames = []
+            for name, path in zip(names, paths):
+                with Image.open(path) as image:
+                    frames.append(arcade.Texture(image.convert("RGBA"), hash=f"{name}:{index}"))
+            frames += [texture.flip_left_right() for texture in frames]
+            kept.append((arcade.Sprite(frames[0]), frames))
+        return kept
+    return op, sprites
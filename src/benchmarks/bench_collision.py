@@ -0,0 +1,60 @@
+"""Collision of moving crowds against each other and tree trunks"""
+import numpy as np
+
+from benchmarks.harness import benchmark
+from core.collision import BODY_RADIUS, PERSONAL_SPACE, Collision
+from core.entities import EntityStore
+from core.forest import Forest
+from core.simulation import SIM_DT
+from core.tree import Tree
+
+WORLD_SIZE = 8000
+TREES = 4000
+
+
+def crowd(seed, bodies):
+    """A store of ``bodies`` walking across the world, and a Collision knowing TREES trunks"""
+    rng = np.random.default_rng(seed)
+    store = EntityStore()
+    store.spawn(rng.uniform(0, WORLD_SIZE, (bodies, 2)))
+    store.target[:bodies] = rng.uniform(0, WORLD_SIZE, (bodies, 2))
+    store.moving[:bodies] = True
+    forest = Forest()
+    collision = Collision()
+    for x, y in rng.uniform(0, WORLD_SIZE, (TREES, 2)).tolist():
+        tree = Tree(x, y)
+        forest.add(tree)
+        collision.tree_changed(tree)
+    return store, collision
+
+
+@benchmark("collision.resolve", bodies=[1_000, 10_000, 50_000], incremental=[True, False], ticks=[60])
+def resolve(seed, bodies, incremental, ticks):
+    """Move and resolve every tick; without incremental the pairs are rebuilt from scratch each time"""
+    store, collision = crowd(seed, bodies)
+
+    def op():
+        for _ in range(ticks):
+            arrived = store.move(SIM_DT)
+            store.moving[:bodies] |= arrived
+            if not incremental:
+                collision.broadphase.ids = None
+            collision.resolve(store)
+    return op, ticks
+
+
+@benchmark("collision.pairwise", bodies=[1_000], ticks=[60])
+def pairwise(seed, bodies, ticks):
+    """Every pair checked each tick, what the broadphase replaces"""
+    store, _ = crowd(seed, bodies)
+    reach = 2 * BODY_RADIUS + PERSONAL_SPACE
+
+    def op():
+        for _ in range(ticks):
+            store.move(SIM_DT)
+            position = store.position[:bodies]
+            offset = position[:, None] - position[None]
+            close = np.einsum("ijk,ijk->ij", offset, offset) < reach * reach
+            np.fill_diagonal(close, False)
+            np.nonzero(np.triu(close))
+    return op, ticks
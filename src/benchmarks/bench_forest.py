@@ -0,0 +1,88 @@
+"""Point, radius and nearest-neighbour queries against large forests.
+
+Run from src/: python -m benchmarks forest
+"""
+import random
+
+from benchmarks.harness import benchmark
+from core.forest import Forest
+from core.tree import Tree
+
+QUERIES = 5_000
+TREE_SPACING = 60
+
+
+def build_forest(count, rng):
+    side = int((count ** 0.5) * TREE_SPACING)
+    forest = Forest()
+    for _ in range(count):
+        forest.add(Tree(rng.uniform(0, side), rng.uniform(0, side)))
+    return forest, side
+
+
+FORESTS = {}
+
+
+def cached_forest(seed, count):
+    """Building 100k trees dominates otherwise; queries don't mutate the forest"""
+    key = (seed, count)
+    if key not in FORESTS:
+        FORESTS[key] = build_forest(count, random.Random(seed))
+    return FORESTS[key]
+
+
+def query_points(seed, side):
+    rng = random.Random(seed + 1)
+    return [(rng.uniform(0, side), rng.uniform(0, side)) for _ in range(QUERIES)]
+
+
+@benchmark("forest.build", trees=[10_000])
+def build(seed, trees):
+    rng = random.Random(seed)
+    return lambda: build_forest(trees, rng), trees
+
+
+@benchmark("forest.point_query", trees=[10_000, 100_000])
+def point_query(seed, trees):
+    forest, side = cached_forest(seed, trees)
+    points = query_points(seed, side)
+
+    def op():
+        for x, y in points:
+            forest.tree_at(x, y)
+    return op, len(points)
+
+
+@benchmark("forest.linear_point_query", trees=[10_000])
+def linear_point_query(seed, trees):
+    """The check_hover scan Forest replaces, for comparison"""
+    forest, side = cached_forest(seed, trees)
+    everything = list(forest)
+    points = query_points(seed, side)[:100]
+
+    def op():
+        for x, y in points:
+            next((t for t in everything if t.check_hover(x, y)), None)
+    return op, len(points)
+
+
+@benchmark("forest.radius_query", trees=[10_000, 100_000], radius=[300])
+def radius_query(seed, trees, radius):
+    forest, side = cached_forest(seed, trees)
+    points = query_points(seed, side)
+
+    def op():
+        for x, y in points:
+            forest.trees_in_radius(x, y, radius)
+    return op, len(points)
+
+
+@benchmark("forest.nearest_choppable", trees=[10_000, 100_000])
+def nearest_choppable(seed, trees):
+    forest, side = cached_forest(seed, trees)
+    points = query_points(seed, side)
+
+    def op():
+        for x, y in points:
+            forest.nearest_choppable(x, y)
+    return op, len(points)
@@ -0,0 +1,38 @@
+"""Lightmap rebuilds over a lit world at several resolutions"""
+import numpy as np
+
+from benchmarks.harness import benchmark
+from core.lighting import (CAMPFIRE_COLOR, CAMPFIRE_RADIUS, LANTERN_COLOR, LANTERN_RADIUS, STUMP_COLOR,
+                           STUMP_RADIUS, Light, Lightmap, daylight)
+
+WORLD_SIZE = 8000
+VIEW_WIDTH = 1280
+VIEW_HEIGHT = 720
+CAMPFIRES = 40
+# Midnight with the default day length and dawn
+NIGHT = 60
+
+
+@benchmark("lighting.build", cell=[16, 8, 32], stumps=[200, 2000], cached=[True, False], builds=[120])
+def build(seed, cell, stumps, cached, builds):
+    """Full rebuilds while panning the view; uncached recomputes every static light each time"""
+    rng = np.random.default_rng(seed)
+    lightmap = Lightmap(cell)
+    for x, y in rng.uniform(0, WORLD_SIZE, (CAMPFIRES, 2)).tolist():
+        lightmap.add(Light(x, y, CAMPFIRE_RADIUS, CAMPFIRE_COLOR))
+    for x, y in rng.uniform(0, WORLD_SIZE, (stumps, 2)).tolist():
+        lightmap.add(Light(x, y, STUMP_RADIUS, STUMP_COLOR))
+    lantern = Light(0, 0, LANTERN_RADIUS, LANTERN_COLOR)
+    ambient = daylight(NIGHT)
+    # Pan across the middle of the world, a little more than a screen per second
+    views = [(2000 + step * 25, 3000 + step * 10) for step in range(builds)]
+
+    def op():
+        for left, bottom in views:
+            if not cached:
+                lightmap.cache.clear()
+            lantern.x = left + VIEW_WIDTH / 2
+            lantern.y = bottom + VIEW_HEIGHT / 2
+            window = (left // cell, bottom // cell, -(-(left + VIEW_WIDTH) // cell), -(-(bottom + VIEW_HEIGHT) // cell))
+            lightmap.build(window, ambient, (lantern,))
+    return op, builds
@@ -0,0 +1,42 @@
+"""Per-instance footprint of the many-instance classes, and the cost of a memory sample"""
+from benchmarks.harness import benchmark
+from core.lighting import STUMP_COLOR, STUMP_RADIUS, Light
+from core.memory import MemoryTracker, watch_simulation
+from core.player_stats import PlayerStats
+from core.scheduler import Timer
+from core.simulation import SIM_DT, Simulation
+from core.tree import Tree
+
+FACTORIES = {
+    "tree": lambda: Tree(1.0, 2.0),
+    "player_stats": PlayerStats,
+    "timer": lambda: Timer(1.0, None, ()),
+    "stump_light": lambda: Light(1.0, 2.0, STUMP_RADIUS, STUMP_COLOR),
+}
+
+
+@benchmark("memory.instances", kind=list(FACTORIES), count=[10_000])
+def instances(seed, kind, count):
+    """Create and keep ``count`` instances; the allocation peak over count is bytes per instance"""
+    make = FACTORIES[kind]
+
+    def op():
+        return [make() for _ in range(count)]
+    return op, count
+
+
+@benchmark("memory.sample", snapshot=[False, True], ticks=[600])
+def sample(seed, snapshot, ticks):
+    """One probe sample, or a probe sample plus a tracemalloc snapshot grouped by subsystem"""
+    tracker = MemoryTracker()
+    if snapshot:
+        # Traced from the start, as with --memory; the harness stops it after the case
+        tracker.start()
+    simulation = Simulation(0, 0, seed=seed)
+    for _ in range(ticks):
+        simulation.update(SIM_DT)
+    watch_simulation(tracker, simulation)
+
+    def op():
+        tracker.sample(snapshot)
+    return op, 1
@@ -0,0 +1,41 @@
+"""Per-frame minimap upkeep as the world around it grows"""
+import numpy as np
+
+from benchmarks.harness import benchmark
+from core.avatar import PLAYER_SPEED
+from core.forest import Forest
+from core.minimap import Minimap
+from core.scheduler import Scheduler
+from core.simulation import SIM_DT
+from core.tree import Tree
+from core.world import ChunkManager
+
+WORLD_SIZE = 40000
+RESIDENT_SPAN = 4096
+
+
+@benchmark("minimap.frame", trees=[1_000, 100_000], frames=[2_000])
+def frame(seed, trees, frames):
+    """Player walking with a few trees felled or regrowing each frame; world already loaded"""
+    rng = np.random.default_rng(seed)
+    scheduler = Scheduler()
+    forest = Forest(scheduler)
+    world = ChunkManager(forest, seed, max_resident=256)
+    world.update(-RESIDENT_SPAN, -RESIDENT_SPAN, RESIDENT_SPAN, RESIDENT_SPAN)
+    for x, y in rng.uniform(-WORLD_SIZE / 2, WORLD_SIZE / 2, (trees, 2)).tolist():
+        forest.add(Tree(x, y))
+    minimap = Minimap(world, forest)
+    forest.on_tree_changed = minimap.tree_changed
+    minimap.update(0, 0)
+    nearby = list(forest.trees_in_rect(-RESIDENT_SPAN, -RESIDENT_SPAN, RESIDENT_SPAN, RESIDENT_SPAN))
+    toggles = rng.choice(len(nearby), (frames, 2)).tolist()
+
+    def op():
+        for i in range(frames):
+            angle = i * SIM_DT * 0.5
+            radius = PLAYER_SPEED * 4
+            for index in toggles[i]:
+                tree = nearby[index]
+                tree.restore(not tree.chopped, False, scheduler.time + 5)
+            minimap.update(radius * np.cos(angle), radius * np.sin(angle))
+    return op, frames
@@ -0,0 +1,137 @@
+"""A* over long paths, the path cache, flow fields and path following"""
+import random
+
+import numpy as np
+
+from benchmarks.harness import benchmark
+from core.avatar import PLAYER_SPEED
+from core.forest import Forest
+from core.navigation import CELL_SIZE, NavGrid, Path
+from core.simulation import SIM_DT
+from core.tree import Tree
+
+# Roughly the tree density of the generated world's forested areas
+TREES_PER_CELL = 0.03
+QUERIES = 20
+
+GRIDS = {}
+
+
+def cached_grid(seed, side):
+    """Navigation grid over a ``side`` x ``side`` cell map of random trees"""
+    key = (seed, side)
+    if key not in GRIDS:
+        rng = random.Random(seed)
+        extent = side * CELL_SIZE
+        navigation = NavGrid()
+        forest = Forest()
+        forest.on_tree_changed = navigation.tree_changed
+        for _ in range(int(side * side * TREES_PER_CELL)):
+            forest.add(Tree(rng.uniform(0, extent), rng.uniform(0, extent)))
+        GRIDS[key] = navigation
+    return GRIDS[key]
+
+
+def endpoints(seed, side, distance):
+    """Start/goal pairs ``distance`` cells apart horizontally, on open cells"""
+    navigation = cached_grid(seed, side)
+    rng = random.Random(seed + 1)
+    pairs = []
+    while len(pairs) < QUERIES:
+        x = rng.uniform(0, (side - distance) * CELL_SIZE)
+        y = rng.uniform(0, (side - distance) * CELL_SIZE)
+        start = (x, y)
+        goal = (x + distance * CELL_SIZE, y + rng.uniform(0, distance) * CELL_SIZE)
+        if not any(navigation.is_blocked(*navigation.cell_of(*p)) for p in (start, goal)):
+            pairs.append((start, goal))
+    return navigation, pairs
+
+
+@benchmark("navigation.astar", side=[512], distance=[64, 256])
+def astar(seed, side, distance):
+    navigation, pairs = endpoints(seed, side, distance)
+
+    def op():
+        for start, goal in pairs:
+            navigation.paths.clear()
+            navigation.find_path(start, goal)
+    return op, len(pairs)
+
+
+@benchmark("navigation.astar_cached", side=[512], distance=[256])
+def astar_cached(seed, side, distance):
+    navigation, pairs = endpoints(seed, side, distance)
+    for start, goal in pairs:
+        navigation.find_path(start, goal)
+
+    def op():
+        for _ in range(50):
+            for start, goal in pairs:
+                navigation.find_path(start, goal)
+    return op, 50 * len(pairs)
+
+
+@benchmark("navigation.flow_field", side=[512], radius=[32, 64])
+def flow_field(seed, side, radius):
+    navigation = cached_grid(seed, side)
+    center = side * CELL_SIZE / 2
+
+    def op():
+        navigation.flow_fields.clear()
+        navigation.flow_field(center, center, radius)
+    return op, 1
+
+
+@benchmark("navigation.flow_lookup", agents=[1_000, 10_000], ticks=[60])
+def flow_lookup(seed, agents, ticks):
+    """Many agents stepping down one shared flow field"""
+    navigation = cached_grid(seed, 512)
+    center = 256 * CELL_SIZE
+    field = navigation.flow_field(center, center, 64)
+    rng = np.random.default_rng(seed)
+    xs = center + rng.uniform(-60, 60, agents) * CELL_SIZE
+    ys = center + rng.uniform(-60, 60, agents) * CELL_SIZE
+
+    def op():
+        nonlocal xs, ys
+        for _ in range(ticks):
+            dx, dy = field.directions(xs, ys)
+            xs = xs + dx * PLAYER_SPEED * SIM_DT
+            ys = ys + dy * PLAYER_SPEED * SIM_DT
+    return op, ticks
+
+
+@benchmark("navigation.path_follow", waypoints=[2, 32], ticks=[10_000])
+def path_follow(seed, waypoints, ticks):
+    rng = random.Random(seed)
+    points = [(rng.uniform(0, 1e5), rng.uniform(0, 1e5)) for _ in range(waypoints)]
+    path = Path((0.0, 0.0), points)
+    step = PLAYER_SPEED * SIM_DT
+
+    def op():
+        for _ in range(ticks):
+            path.advance(step)
+    return op, ticks
+
+
+@benchmark("navigation.path_invalidate", calls=[100])
+def path_invalidate(seed, calls):
+    """A trunk added across a cached straight route drops it from the cache"""
+    navigation = NavGrid()
+    forest = Forest()
+    forest.on_tree_changed = navigation.tree_changed
+    start, goal = (16.0, 16.0), (2064.0, 16.0)
+    navigation.find_path(start, goal)
+    tree = Tree(1024, 40)
+    blocked = navigation.footprint(tree)
+    forest.add(tree)
+    assert (navigation.cell_of(*start), navigation.cell_of(*goal)) not in navigation.paths
+    path = navigation.find_path(start, goal)
+    assert not any(navigation.cell_of(*point) in blocked for point in path.waypoints)
+
+    def op():
+        for _ in range(calls):
+            forest.remove(tree)
+            forest.add(tree)
+            navigation.find_path(start, goal)
+    return op, calls
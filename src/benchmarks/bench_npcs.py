@@ -0,0 +1,81 @@
+"""Entity store batch operations and woodcutter ticks at crowd sizes"""
+import random
+
+import numpy as np
+
+from benchmarks.harness import benchmark
+from core.entities import EntityStore
+from core.simulation import SIM_DT, Simulation
+
+WORLD_SIZE = 8000
+TREES = 4000
+
+
+def spread(seed, count):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(0, WORLD_SIZE, (count, 2))
+
+
+@benchmark("npcs.move", entities=[1_000, 10_000], ticks=[600])
+def move(seed, entities, ticks):
+    """Everyone walking; arrivals are sent somewhere new so the mover count stays high"""
+    store = EntityStore()
+    store.spawn(spread(seed, entities))
+    targets = spread(seed + 1, entities).astype(np.float32)
+    store.target[:entities] = targets
+    store.moving[:entities] = True
+
+    def op():
+        for _ in range(ticks):
+            arrived = store.move(SIM_DT)
+            store.moving[:entities] |= arrived
+    return op, ticks
+
+
+@benchmark("npcs.damage_heal", entities=[1_000, 10_000], rounds=[600])
+def damage_heal(seed, entities, rounds):
+    """Area damage and a heal-everyone pass, the batched PlayerStats mutators"""
+    store = EntityStore()
+    store.spawn(spread(seed, entities))
+    rng = random.Random(seed)
+    centers = [(rng.uniform(0, WORLD_SIZE), rng.uniform(0, WORLD_SIZE)) for _ in range(rounds)]
+
+    def op():
+        for x, y in centers:
+            rows = store.in_radius(x, y, 1000)
+            store.take_damage(rows, 15)
+            store.heal(slice(0, store.count), 1)
+            store.repair_armor(rows, 5)
+    return op, rounds
+
+
+@benchmark("npcs.woodcutters_tick", entities=[1_000, 10_000], ticks=[300])
+def woodcutters_tick(seed, entities, ticks):
+    """Full AI tick: movement, arrivals, tree choice and chop timers"""
+    rng = random.Random(seed)
+    simulation = Simulation(WORLD_SIZE / 2, WORLD_SIZE / 2, seed=seed)
+    for _ in range(TREES):
+        simulation.add_tree(rng.uniform(0, WORLD_SIZE), rng.uniform(0, WORLD_SIZE))
+    simulation.woodcutters.spawn(entities, WORLD_SIZE / 2, WORLD_SIZE / 2, WORLD_SIZE / 2)
+
+    def op():
+        for _ in range(ticks):
+            simulation.step()
+    return op, ticks
+
+
+@benchmark("npcs.woodcutters_lod", entities=[1_000, 10_000], lod=[False, True], ticks=[300])
+def woodcutters_lod(seed, entities, lod, ticks):
+    """The full AI tick with the player in one corner, so most of the crowd is far away"""
+    rng = random.Random(seed)
+    simulation = Simulation(WORLD_SIZE / 8, WORLD_SIZE / 8, seed=seed)
+    for _ in range(TREES):
+        simulation.add_tree(rng.uniform(0, WORLD_SIZE), rng.uniform(0, WORLD_SIZE))
+    simulation.woodcutters.spawn(entities, WORLD_SIZE / 2, WORLD_SIZE / 2, WORLD_SIZE / 2)
+    if not lod:
+        simulation.woodcutters.lod = None
+
+    def op():
+        for _ in range(ticks):
+            simulation.step()
+    return op, ticks
@@ -0,0 +1,46 @@
+"""ParticleManager spawning and integration"""
+from benchmarks.harness import benchmark
+from core.avatar import PARTICLE_COUNT
+from core.particle_manager import PARTICLE_LIFETIME, ParticleManager
+
+
+@benchmark("particles.create_splash", count=[PARTICLE_COUNT, 300], splashes=[1000])
+def create_splash(seed, count, splashes):
+    manager = ParticleManager(seed=seed)
+
+    def op():
+        for i in range(splashes):
+            manager.create_splash(i, i, count)
+    return op, splashes
+
+
+@benchmark("particles.update", live=[1_000, 10_000, 100_000], frames=[PARTICLE_LIFETIME])
+def update(seed, live, frames):
+    """Integration plus compaction with one splash's worth dying every frame"""
+    manager = ParticleManager(seed=seed)
+    for _ in range(live // PARTICLE_COUNT):
+        manager.create_splash(0, 0, PARTICLE_COUNT)
+    # Stagger lifetimes so compaction has work on every frame
+    count = len(manager)
+    manager.lifetime[:count] = manager.rng.integers(1, PARTICLE_LIFETIME + 1, count)
+
+    def op():
+        for _ in range(frames):
+            manager.update()
+    return op, frames
+
+
+@benchmark("particles.steady_state", clicks_per_second=[5, 50], frames=[600])
+def steady_state(seed, clicks_per_second, frames):
+    """Update plus spawning at a fixed click rate, per 60 Hz frame"""
+    manager = ParticleManager(seed=seed)
+    interval = 60 / clicks_per_second
+
+    def op():
+        next_click = 0.0
+        for frame in range(frames):
+            while frame >= next_click:
+                manager.create_splash(frame, frame, PARTICLE_COUNT)
+                next_click += interval
+            manager.update()
+    return op, frames
@@ -0,0 +1,40 @@
+"""Woodcutter planning jobs inline and on process pools of growing size"""
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from benchmarks.harness import benchmark
+from core.simulation import Simulation
+
+WORLD_SIZE = 8000
+TREES = 4000
+
+# One pool per size for the whole run; starting processes is not what is measured
+_pools = {}
+
+
+def pool(workers):
+    if workers not in _pools:
+        executor = ProcessPoolExecutor(workers)
+        list(executor.map(abs, range(workers)))
+        _pools[workers] = executor
+    return _pools[workers]
+
+
+@benchmark("planner.plan", workers=[0, 1, 2, 4], routes=[False, True], agents=[2048])
+def plan(seed, workers, routes, agents):
+    """Every agent chooses a tree, and a route with ``routes``; per agent, waiting for all"""
+    rng = random.Random(seed)
+    simulation = Simulation(WORLD_SIZE / 2, WORLD_SIZE / 2, seed=seed,
+                            plan_executor=pool(workers) if workers else None)
+    for _ in range(TREES):
+        simulation.add_tree(rng.uniform(0, WORLD_SIZE), rng.uniform(0, WORLD_SIZE))
+    planner = simulation.use_planner(routes)
+    positions = np.random.default_rng(seed).uniform(0, WORLD_SIZE, (agents, 2)).astype(np.float32)
+    ids = np.arange(agents)
+
+    def op():
+        planner.submit(0, ids, positions)
+        planner.results(planner.delay)
+    return op, agents
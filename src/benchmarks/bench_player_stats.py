@@ -0,0 +1,17 @@
+"""PlayerStats mutation methods"""
+from benchmarks.harness import benchmark
+from core.player_stats import PlayerStats
+
+
+@benchmark("player_stats.mutations", calls=[100_000])
+def mutations(seed, calls):
+    """Interleaved take_damage/heal/repair_armor/add_wood, as the key bindings issue them"""
+    stats = PlayerStats()
+
+    def op():
+        for _ in range(calls // 4):
+            stats.take_damage(15)
+            stats.heal(10)
+            stats.repair_armor(5)
+            stats.add_wood(3)
+    return op, calls // 4 * 4
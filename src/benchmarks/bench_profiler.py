@@ -0,0 +1,18 @@
+"""Overhead of FrameProfiler stage instrumentation"""
+from benchmarks.harness import benchmark
+from core.profiler import FrameProfiler
+
+
+@benchmark("profiler.stage", enabled=[False, True], frames=[10_000])
+def stage(seed, enabled, frames):
+    """One frame's worth of stages (ten per frame) with an empty body"""
+    profiler = FrameProfiler()
+    profiler.enabled = enabled
+
+    def op():
+        for _ in range(frames):
+            profiler.next_frame()
+            for _ in range(10):
+                with profiler.stage("stage"):
+                    pass
+    return op, frames
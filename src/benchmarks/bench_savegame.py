@@ -0,0 +1,88 @@
+"""Saving and loading snapshots of a large world"""
+import os
+import tempfile
+
+import numpy as np
+
+from benchmarks.harness import benchmark
+from core.savegame import BASE_NAME, SaveWriter, capture, decode, encode, load, restore, write_file
+from core.simulation import Simulation
+
+WORLD_SIZE = 20000
+NPCS = 1_000
+
+
+def build(seed, trees):
+    """A world of hand-placed trees, a third of them felled, plus a crowd"""
+    rng = np.random.default_rng(seed)
+    sim = Simulation(0, 0, seed=seed)
+    for i, (x, y) in enumerate(rng.uniform(0, WORLD_SIZE, (trees, 2)).tolist()):
+        tree = sim.add_tree(x, y)
+        if i % 3 == 0:
+            tree.restore(True, False, rng.uniform(1, 5))
+    sim.woodcutters.spawn(NPCS, WORLD_SIZE / 2, WORLD_SIZE / 2, WORLD_SIZE / 2)
+    return sim
+
+
+@benchmark("savegame.capture", trees=[100_000])
+def capture_full(seed, trees):
+    sim = build(seed, trees)
+
+    def op():
+        capture(sim, full=True)
+    return op, 1
+
+
+@benchmark("savegame.write", trees=[100_000])
+def write(seed, trees):
+    sim = build(seed, trees)
+    snapshot = capture(sim, full=True)
+    directory = tempfile.TemporaryDirectory()
+
+    def op():
+        write_file(os.path.join(directory.name, BASE_NAME), snapshot)
+    return op, 1
+
+
+@benchmark("savegame.load", trees=[100_000])
+def load_full(seed, trees):
+    """Memory-map the file and touch every tree record"""
+    sim = build(seed, trees)
+    directory = tempfile.TemporaryDirectory()
+    write_file(os.path.join(directory.name, BASE_NAME), capture(sim, full=True))
+
+    def op():
+        snapshot = load(directory.name)
+        assert len(snapshot.trees) == trees
+        snapshot.trees["due"].sum()
+    return op, 1
+
+
+@benchmark("savegame.restore", trees=[100_000])
+def restore_full(seed, trees):
+    sim = build(seed, trees)
+    snapshot = decode(encode(capture(sim, full=True)))
+
+    def op():
+        restore(sim, snapshot)
+    return op, 1
+
+
+@benchmark("savegame.delta", trees=[100_000], changed=[100, 5_000])
+def delta(seed, trees, changed):
+    """Capture and write a delta after ``changed`` trees were felled or regrew"""
+    sim = build(seed, trees)
+    directory = tempfile.TemporaryDirectory()
+    writer = SaveWriter(directory.name, compact_every=1_000_000)
+    # Written inline rather than through the thread, so the op times both halves
+    writer.close()
+    writer.write(capture(sim, full=True))
+    forest = list(sim.forest)
+    rng = np.random.default_rng(seed)
+
+    def op():
+        for index in rng.choice(len(forest), changed, replace=False).tolist():
+            tree = forest[index]
+            tree.restore(not tree.chopped, False, sim.scheduler.time + 5)
+        writer.write(capture(sim))
+    return op, 1
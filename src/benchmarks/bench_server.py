@@ -0,0 +1,69 @@
+"""Server ticks with many connected players, without the sockets"""
+import random
+
+from benchmarks.harness import benchmark
+from core import commands
+from core.server import GameServer
+from core.simulation import Simulation
+
+WORLD_SIZE = 8000
+TREES = 4000
+# Chance per tick that a player sends a command, about one every 1.25s at 20 ticks/s
+COMMAND_CHANCE = 0.04
+
+
+class _Transport:
+    def get_write_buffer_size(self):
+        return 0
+
+
+class _Writer:
+    """Stands in for a StreamWriter; only counts what would have been sent"""
+
+    def __init__(self):
+        self.transport = _Transport()
+        self.written = 0
+
+    def write(self, data):
+        self.written += len(data)
+
+
+def build(seed, players):
+    rng = random.Random(seed)
+    simulation = Simulation(WORLD_SIZE / 2, WORLD_SIZE / 2, seed=seed)
+    for _ in range(TREES):
+        simulation.add_tree(rng.uniform(0, WORLD_SIZE), rng.uniform(0, WORLD_SIZE))
+    server = GameServer(simulation, seed=seed)
+    for _ in range(players):
+        server.connect(_Writer())
+    return server, rng
+
+
+def script(server, rng):
+    """Queue bot-like commands: mostly chop the nearest tree, otherwise wander"""
+    forest = server.simulation.forest
+    for session in server.sessions.values():
+        if rng.random() >= COMMAND_CHANCE:
+            continue
+        player = session.avatar.player
+        tree = forest.nearest_choppable(player.x, player.y, 600)
+        if tree is not None and rng.random() < 0.6:
+            session.commands.append((commands.CHOP, tree.x, tree.y, 0.0, 0.0))
+        else:
+            session.commands.append((commands.MOVE, player.x + rng.uniform(-400, 400),
+                                     player.y + rng.uniform(-400, 400), 0.0, 0.0))
+
+
+@benchmark("server.tick", players=[50, 200, 1000], ticks=[100])
+def tick(seed, players, ticks):
+    """Commands, simulation and a delta snapshot per player, after a warm-up"""
+    server, rng = build(seed, players)
+    for _ in range(20):
+        script(server, rng)
+        server.tick()
+
+    def op():
+        for _ in range(ticks):
+            script(server, rng)
+            server.tick()
+    return op, ticks
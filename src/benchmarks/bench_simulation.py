@@ -0,0 +1,75 @@
+"""Player movement, tree lifecycle and whole simulation ticks"""
+import random
+
+from benchmarks.harness import benchmark
+from core.simulation import SIM_DT, Simulation
+from core.tree import Tree
+
+WORLD_SIZE = 5000
+
+
+def build(seed, trees):
+    rng = random.Random(seed)
+    simulation = Simulation(WORLD_SIZE / 2, WORLD_SIZE / 2, seed=seed)
+    for _ in range(trees):
+        simulation.add_tree(rng.uniform(0, WORLD_SIZE), rng.uniform(0, WORLD_SIZE))
+    return simulation, rng
+
+
+@benchmark("avatar.update", trees=[0, 10_000], ticks=[10_000])
+def avatar_update(seed, trees, ticks):
+    """The player pacing across the map along planned paths, one tick at a time"""
+    simulation, _ = build(seed, trees)
+    avatar = simulation.avatar
+    ends = (0, WORLD_SIZE)
+
+    def op():
+        for _ in range(ticks):
+            if avatar.path is None:
+                avatar.move_to(ends[avatar.player.x < WORLD_SIZE / 2], WORLD_SIZE / 2)
+            avatar.update(SIM_DT)
+    return op, ticks
+
+
+@benchmark("tree.lifecycle", trees=[1_000, 10_000], chopping_fraction=[0.0, 0.1, 1.0], ticks=[600])
+def tree_lifecycle(seed, trees, chopping_fraction, ticks):
+    """Ten seconds of chop and regrow timers; idle trees should cost nothing"""
+    simulation, rng = build(seed, trees)
+    for tree in rng.sample(list(simulation.forest), int(trees * chopping_fraction)):
+        tree.start_chopping()
+
+    def op():
+        for _ in range(ticks):
+            simulation.scheduler.advance(SIM_DT)
+    return op, ticks
+
+
+@benchmark("tree.check_hover", calls=[100_000])
+def check_hover(seed, calls):
+    rng = random.Random(seed)
+    tree = Tree(0, 0)
+    points = [(rng.uniform(-50, 50), rng.uniform(-80, 80)) for _ in range(1000)]
+
+    def op():
+        for _ in range(calls // len(points)):
+            for x, y in points:
+                tree.check_hover(x, y)
+    return op, calls // len(points) * len(points)
+
+
+@benchmark("simulation.tick", trees=[100, 10_000], ticks=[600])
+def tick(seed, trees, ticks):
+    """Full fixed ticks with seeded clicks towards the nearest standing tree"""
+    simulation, rng = build(seed, trees)
+
+    def op():
+        for i in range(ticks):
+            if i % 30 == 0:
+                player = simulation.player
+                tree = simulation.forest.nearest_choppable(player.x, player.y)
+                if tree is not None and rng.random() < 0.5:
+                    simulation.click(tree.x, tree.y)
+                else:
+                    simulation.click(rng.uniform(0, WORLD_SIZE), rng.uniform(0, WORLD_SIZE))
+            simulation.step()
+    return op, ticks
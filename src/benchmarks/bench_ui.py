@@ -0,0 +1,51 @@
+"""HUD layout and per-frame cost with all drawing stubbed out"""
+from benchmarks.harness import benchmark
+from benchmarks.stubs import stub_ui_drawing
+from core.player_stats import PlayerStats
+from core.ui_manager import UIManager
+
+WINDOW_HEIGHT = 720
+
+
+@benchmark("ui.resize", width=[800, 1280, 1920, 3840], passes=[200])
+def resize(seed, width, passes):
+    """Full relayout and re-bake of every widget, as on a window resize"""
+    ui = UIManager(width, WINDOW_HEIGHT)
+
+    def op():
+        with stub_ui_drawing():
+            for _ in range(passes):
+                ui.resize(width, WINDOW_HEIGHT)
+                ui.draw()
+    return op, passes
+
+
+@benchmark("ui.steady_frame", width=[1280, 3840], frames=[2000])
+def steady_frame(seed, width, frames):
+    """Frames where no bound value changes; nothing should be re-baked"""
+    ui = UIManager(width, WINDOW_HEIGHT)
+
+    def op():
+        with stub_ui_drawing():
+            for _ in range(frames):
+                ui.update(1 / 60)
+                ui.draw()
+    return op, frames
+
+
+@benchmark("ui.stat_change_frame", frames=[500])
+def stat_change_frame(seed, frames):
+    """Frames where health changes every frame, forcing the HP bar to re-bake"""
+    stats = PlayerStats()
+    ui = UIManager(1280, WINDOW_HEIGHT, stats)
+
+    def op():
+        with stub_ui_drawing():
+            for i in range(frames):
+                if i % 2:
+                    stats.heal(1)
+                else:
+                    stats.take_damage(2)
+                ui.update(1 / 60)
+                ui.draw()
+    return op, frames
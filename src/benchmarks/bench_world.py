@@ -0,0 +1,33 @@
+"""Chunk generation and streaming the world around a moving view"""
+from benchmarks.harness import benchmark
+from core.avatar import PLAYER_SPEED
+from core.forest import Forest
+from core.simulation import SIM_DT
+from core.world import ChunkManager, generate_chunk
+
+VIEW_WIDTH = 1280
+VIEW_HEIGHT = 720
+
+
+@benchmark("world.generate_chunk", chunks=[64])
+def generate(seed, chunks):
+    def op():
+        for i in range(chunks):
+            generate_chunk(seed, i, -i)
+    return op, chunks
+
+
+@benchmark("world.stream", speed=[PLAYER_SPEED, PLAYER_SPEED * 4], frames=[3_000])
+def stream(seed, speed, frames):
+    """Per-frame streaming cost walking in a straight line, chunks built inline"""
+    world = ChunkManager(Forest(), seed)
+
+    def op():
+        x = y = 0.0
+        for _ in range(frames):
+            x += speed * SIM_DT
+            y += speed * SIM_DT * 0.5
+            world.update(x - VIEW_WIDTH / 2, y - VIEW_HEIGHT / 2,
+                         x + VIEW_WIDTH / 2, y + VIEW_HEIGHT / 2, SIM_DT)
+        assert len(world) <= world.max_resident
+    return op, frames
@@ -0,0 +1,146 @@
+"""Registry, runner and baseline comparison for the benchmark suite.
+
+A benchmark is a setup function decorated with ``@benchmark``. It receives
+a seed plus one combination of the declared parameters and returns
+``(op, ops)``: a zero-argument callable and the number of operations one
+call performs. Setup is re-run before every repeat and is never timed, so
+ops may freely mutate the state they were given.
+"""
+import argparse
+import itertools
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+BENCHMARKS = []
+
+DEFAULT_REPEATS = 5
+DEFAULT_THRESHOLD = 0.25
+
+
+class Benchmark:
+    def __init__(self, name, setup, params):
+        self.name = name
+        self.setup = setup
+        self.params = params
+
+    def cases(self, quick=False):
+        names = list(self.params)
+        values = [self.params[name][:1] if quick else self.params[name] for name in names]
+        for combination in itertools.product(*values):
+            yield dict(zip(names, combination))
+
+
+def benchmark(name, **params):
+    """Register a setup function; each keyword is a list of values to sweep"""
+    def register(setup):
+        BENCHMARKS.append(Benchmark(name, setup, params))
+        return setup
+    return register
+
+
+def case_key(name, params):
+    return name + "".join(f"[{key}={value}]" for key, value in params.items())
+
+
+def run_case(bench, params, seed, repeats):
+    timings = []
+    for _ in range(repeats):
+        op, ops = bench.setup(seed, **params)
+        start = time.perf_counter()
+        op()
+        timings.append((time.perf_counter() - start) / ops)
+
+    # Separate pass so tracing overhead never shows up in the timings
+    op, ops = bench.setup(seed, **params)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    op()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+
+    return {
+        "name": bench.name,
+        "params": params,
+        "ops": ops,
+        "per_op_us": {
+            "min": min(timings) * 1e6,
+            "median": statistics.median(timings) * 1e6,
+            "mean": statistics.fmean(timings) * 1e6,
+        },
+        "alloc_peak_bytes": peak,
+        "alloc_net_blocks_per_op": blocks / ops,
+    }
+
+
+def run(filters=(), seed=0, repeats=DEFAULT_REPEATS, quick=False, out=sys.stdout):
+    results = {}
+    for bench in BENCHMARKS:
+        if filters and not any(f in bench.name for f in filters):
+            continue
+        for params in bench.cases(quick):
+            key = case_key(bench.name, params)
+            result = run_case(bench, params, seed, repeats)
+            results[key] = result
+            timing = result["per_op_us"]
+            print(f"{key:<60} {timing['median']:12.3f} us/op  "
+                  f"(min {timing['min']:.3f})  peak {result['alloc_peak_bytes'] / 1024:8.1f} KiB",
+                  file=out)
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD, out=sys.stdout):
+    """Print slowdowns against a stored report; returns the regressed keys"""
+    regressions = []
+    for key, result in results.items():
+        previous = baseline.get("results", {}).get(key)
+        if previous is None:
+            continue
+        old = previous["per_op_us"]["median"]
+        new = result["per_op_us"]["median"]
+        change = (new - old) / old if old else 0.0
+        marker = ""
+        if change > threshold:
+            regressions.append(key)
+            marker = "  REGRESSION"
+        print(f"{key:<60} {old:12.3f} -> {new:12.3f} us/op ({change:+.1%}){marker}", file=out)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the headless benchmark suite")
+    parser.add_argument("filters", nargs="*", help="only run benchmarks whose name contains one of these")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("--quick", action="store_true", help="only the first value of each parameter")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--baseline", help="compare against a previously written report")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown that counts as a regression")
+    args = parser.parse_args(argv)
+
+    results = run(args.filters, args.seed, args.repeats, args.quick)
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": args.seed,
+        "repeats": args.repeats,
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print()
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
@@ -0,0 +1,67 @@
+"""Stand-ins for arcade drawing so HUD code can be timed without a window"""
+import contextlib
+
+import arcade
+
+import core.text_cache
+import core.ui_widgets
+
+SHAPE_FACTORIES = [
+    "create_ellipse_filled",
+    "create_line",
+    "create_polygon",
+    "create_rectangle_filled",
+    "create_rectangle_outline",
+    "create_triangles_strip_filled_with_colors",
+]
+
+
+class DrawCounter:
+    def __init__(self):
+        self.shapes = 0
+        self.draw_calls = 0
+
+
+class StubShapeList(list):
+    counter = None
+
+    def draw(self):
+        StubShapeList.counter.draw_calls += 1
+
+
+class StubText:
+    def __init__(self, *args):
+        self.args = args
+
+    def draw(self, *args):
+        StubShapeList.counter.draw_calls += 1
+
+
+@contextlib.contextmanager
+def stub_ui_drawing(counter=None):
+    """Replace shape, glow, text and line drawing used by core.ui_widgets"""
+    counter = counter or DrawCounter()
+    StubShapeList.counter = counter
+
+    def make_shape(*args, **kwargs):
+        counter.shapes += 1
+        return args
+
+    def draw(*args, **kwargs):
+        counter.draw_calls += 1
+
+    patches = [(core.ui_widgets, "ShapeElementList", StubShapeList),
+               (core.ui_widgets.GlowBatch, "set_circles", lambda self, circles: None),
+               (core.ui_widgets.GlowBatch, "draw", draw),
+               (core.text_cache, "CachedText", StubText),
+               (arcade, "draw_line", draw)]
+    patches += [(core.ui_widgets, name, make_shape) for name in SHAPE_FACTORIES]
+
+    originals = [(target, name, getattr(target, name)) for target, name, _ in patches]
+    for target, name, replacement in patches:
+        setattr(target, name, replacement)
+    try:
+        yield counter
+    finally:
+        for target, name, original in originals:
+            setattr(target, name, original)
@@ -1,2 +1,18 @@
-from core.particle import WaterParticle
-from core.particle_manager import ParticleManager
+import importlib
+
+# Re-exports, imported on first access so that importing any core module
+# doesn't pull in numpy before the window is up
+_EXPORTS = {
+    "ParticleManager": "core.particle_manager",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
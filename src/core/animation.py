@@ -0,0 +1,189 @@
+"""Character animation: clips packed into the shared atlas once, advanced in batches."""
+import math
+
+import numpy as np
+
+from core.assets import MANIFEST
+
+# Compass directions of the walk clips, counter-clockwise from east
+DIRECTIONS = 8
+WALK_FPS = 10
+CHOP_FPS = 4
+# A walker drawn less than this many pixels from last frame keeps its clip
+MOVE_EPSILON = 0.01
+
+
+class Clip:
+    """Named sequence of (manifest name, mirrored) frames played at ``fps``"""
+
+    def __init__(self, name, frames, fps, loop=True):
+        self.name = name
+        self.frames = frames
+        self.fps = fps
+        self.loop = loop
+
+
+def facing_left(direction):
+    """Whether a walk in ``direction`` (0 is east, 2 north) faces left"""
+    return 2 < direction < 6
+
+
+def default_clips():
+    """Idle, chop and eight-way walk clips for the player.
+
+    The adventurer only has a side view, so the left-hand directions
+    mirror the same frames; a mirrored frame is a different vertex order
+    over the same atlas region and costs no atlas space. Straight up and
+    down have no side of their own, so they come both ways, the mirrored
+    one named ``walk_<direction>_left``.
+    """
+    walk = [f"player_walk{step}" for step in range(8)]
+    # The sprite pack has no chop frames; its two climb frames stand in for them
+    chop = ["player_climb0", "player_climb1"]
+    clips = [Clip("idle_right", [("player", False)], 1),
+             Clip("idle_left", [("player", True)], 1),
+             Clip("chop_right", [(name, False) for name in chop], CHOP_FPS),
+             Clip("chop_left", [(name, True) for name in chop], CHOP_FPS)]
+    for direction in range(DIRECTIONS):
+        mirrored = facing_left(direction)
+        clips.append(Clip(f"walk_{direction}", [(name, mirrored) for name in walk], WALK_FPS))
+        if direction in (2, 6):
+            clips.append(Clip(f"walk_{direction}_left", [(name, True) for name in walk], WALK_FPS))
+    return clips
+
+
+class ClipLibrary:
+    """Every clip's frames as textures, plus flat frame lookup tables.
+
+    Each distinct (image, mirrored) pair becomes one arcade Texture shared
+    by every clip and sprite that shows it. Clip ``c`` plays
+    ``frames[offset[c]:offset[c] + length[c]]``, indices into
+    ``textures``, at ``fps[c]``; ``ids`` maps clip names to ``c``.
+    ``pack`` uploads the images to a texture atlas up front, so switching
+    frames later never allocates atlas space or rebuilds it.
+    """
+
+    def __init__(self, textures=None, clips=None):
+        import arcade
+
+        textures = textures or {}
+        clips = clips if clips is not None else default_clips()
+        self.textures = []
+        index = {}
+        base = {}
+        frames = []
+        self.ids = {}
+        self.offset = np.zeros(len(clips), dtype=np.int32)
+        self.length = np.zeros(len(clips), dtype=np.int32)
+        self.fps = np.zeros(len(clips), dtype=np.float32)
+        self.loop = np.zeros(len(clips), dtype=bool)
+        for clip_id, clip in enumerate(clips):
+            self.ids[clip.name] = clip_id
+            self.offset[clip_id] = len(frames)
+            self.length[clip_id] = len(clip.frames)
+            self.fps[clip_id] = clip.fps
+            self.loop[clip_id] = clip.loop
+            for frame in clip.frames:
+                if frame not in index:
+                    name, mirrored = frame
+                    texture = base.get(name)
+                    if texture is None:
+                        texture = base[name] = textures.get(name) or arcade.load_texture(MANIFEST[name])
+                    index[frame] = len(self.textures)
+                    self.textures.append(texture.flip_left_right() if mirrored else texture)
+                frames.append(index[frame])
+        self.frames = np.array(frames, dtype=np.int32)
+        # Decoded RGBA bytes of the distinct images; mirrored frames share theirs
+        self.image_bytes = sum(texture.width * texture.height * 4 for texture in base.values())
+
+    def pack(self, atlas):
+        """Add every frame to ``atlas``, typically the window's default atlas"""
+        for texture in self.textures:
+            atlas.add(texture)
+
+    def choose(self, dx, dy, walking, chopping, left):
+        """(clip, facing left) for a character drawn (dx, dy) from last frame.
+
+        ``chopping`` is None, or whether the tree is to the left. A
+        character standing still keeps facing the way it last walked; one
+        walking that did not visibly move gets None, keeping its clip.
+        """
+        if chopping is not None:
+            return self.ids["chop_left" if chopping else "chop_right"], chopping
+        if not walking:
+            return self.ids["idle_left" if left else "idle_right"], left
+        if abs(dx) < MOVE_EPSILON and abs(dy) < MOVE_EPSILON:
+            return None, left
+        direction = round(math.atan2(dy, dx) / (2 * math.pi / DIRECTIONS)) % DIRECTIONS
+        if direction in (2, 6):
+            # Up or down: keep facing the way it was
+            return self.ids[f"walk_{direction}_left" if left else f"walk_{direction}"], left
+        left = facing_left(direction)
+        return self.ids[f"walk_{direction}"], left
+
+
+class Animator:
+    """Structure-of-arrays playback state for many animated sprites.
+
+    Row ``i`` drives ``sprites[i]``: the clip it plays, seconds into it and
+    the frame index last shown. ``update`` advances every row with a few
+    vectorized operations over the library's frame tables and only
+    touches the sprites whose frame changed.
+    """
+
+    def __init__(self, library, capacity=64):
+        self.library = library
+        self.sprites = []
+        self.count = 0
+        self.changed = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self.clip = np.zeros(capacity, dtype=np.int32)
+        self.time = np.zeros(capacity, dtype=np.float64)
+        self.frame = np.zeros(capacity, dtype=np.int32)
+
+    def add(self, sprite, clip=0):
+        """Start animating ``sprite`` with ``clip``; returns its row"""
+        row = self.count
+        if row == self.capacity:
+            old = (self.clip, self.time, self.frame)
+            self._allocate(self.capacity * 2)
+            for new, prev in zip((self.clip, self.time, self.frame), old):
+                new[:row] = prev
+        self.sprites.append(sprite)
+        self.count += 1
+        self.clip[row] = clip
+        self.time[row] = 0
+        self.frame[row] = self.library.frames[self.library.offset[clip]]
+        sprite.texture = self.library.textures[self.frame[row]]
+        return row
+
+    def play(self, row, clip):
+        """Switch ``row`` to ``clip``, from its start unless it is already playing"""
+        if self.clip[row] != clip:
+            self.clip[row] = clip
+            self.time[row] = 0
+
+    def update(self, delta_time):
+        """Advance every row by ``delta_time`` and retexture the ones whose frame changed"""
+        n = self.count
+        if n == 0:
+            return
+        library = self.library
+        clip = self.clip[:n]
+        time = self.time[:n]
+        time += delta_time
+        step = (time * library.fps[clip]).astype(np.int32)
+        length = library.length[clip]
+        step = np.where(library.loop[clip], step % length, np.minimum(step, length - 1))
+        frame = library.frames[library.offset[clip] + step]
+        changed = np.flatnonzero(frame != self.frame[:n])
+        self.changed = changed.size
+        if changed.size:
+            self.frame[changed] = frame[changed]
+            sprites = self.sprites
+            textures = library.textures
+            for row, index in zip(changed.tolist(), frame[changed].tolist()):
+                sprites[row].texture = textures[index]
@@ -0,0 +1,79 @@
+import hashlib
+import os
+
+# Every texture the game needs, by name; preloaded before the first frame
+PLAYER_FRAMES = ":resources:images/animated_characters/female_adventurer/femaleAdventurer_"
+MANIFEST = {
+    "player": PLAYER_FRAMES + "idle.png",
+    # Animation frames, packed into the atlas by core.animation
+    **{f"player_walk{step}": PLAYER_FRAMES + f"walk{step}.png" for step in range(8)},
+    "player_climb0": PLAYER_FRAMES + "climb0.png",
+    "player_climb1": PLAYER_FRAMES + "climb1.png",
+}
+
+CACHE_DIRECTORY = "asset_cache"
+
+
+def resolve(path):
+    """Filesystem path for ``path``, expanding arcade's ``:resources:`` prefix"""
+    if path.startswith(":"):
+        # Imported here so headless code can use the cache without arcade
+        import arcade.resources
+        return str(arcade.resources.resolve(path))
+    return path
+
+
+class AssetCache:
+    """Decoded RGBA pixels on disk, keyed by source path, mtime and size.
+
+    Loading a cached image is one ``np.load`` of raw pixels instead of a
+    PNG decode and colour conversion. An entry goes stale as soon as its
+    source file changes, and is replaced the next time it is loaded.
+    """
+
+    def __init__(self, directory=CACHE_DIRECTORY):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    def _entry(self, source):
+        stat = os.stat(source)
+        name = hashlib.sha1(os.path.abspath(source).encode()).hexdigest()[:16]
+        return name, os.path.join(self.directory, f"{name}-{stat.st_mtime_ns}-{stat.st_size}.npy")
+
+    def load_image(self, path):
+        # Deferred so reading the manifest costs nothing before the window is up
+        import numpy as np
+        from PIL import Image
+
+        source = resolve(path)
+        name, entry = self._entry(source)
+        try:
+            pixels = np.load(entry)
+        except (OSError, ValueError):
+            pixels = None
+        if pixels is not None:
+            self.hits += 1
+            return Image.fromarray(pixels, "RGBA")
+
+        self.misses += 1
+        with Image.open(source) as image:
+            image = image.convert("RGBA")
+        self._store(name, entry, np.asarray(image))
+        return image
+
+    def _store(self, name, entry, pixels):
+        import numpy as np
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            for stale in os.listdir(self.directory):
+                if stale.startswith(name + "-"):
+                    os.remove(os.path.join(self.directory, stale))
+            tmp = entry + ".tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, pixels)
+            os.replace(tmp, entry)
+        except OSError:
+            # A read-only install still runs, just without the cache
+            pass
@@ -0,0 +1,141 @@
+from core.navigation import Path
+from core.player_stats import PlayerStats
+
+PLAYER_SPEED = 300
+PARTICLE_COUNT = 30
+
+
+class Player:
+    """Player position plus the position at the previous tick, for interpolation"""
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.prev_x = x
+        self.prev_y = y
+
+    def teleport(self, x, y):
+        self.x = self.prev_x = x
+        self.y = self.prev_y = y
+
+    def interpolated(self, alpha):
+        return (self.prev_x + (self.x - self.prev_x) * alpha,
+                self.prev_y + (self.y - self.prev_y) * alpha)
+
+
+class Avatar:
+    """One player-controlled character: position, stats and what it is doing.
+
+    ``click``, ``move_to``, ``chop`` and ``cancel`` only change intent;
+    ``update`` walks the planned path and starts the chop on arrival, once
+    per tick. ``choppers`` is a dict shared by every avatar of a simulation
+    mapping each tree to the avatar chopping it, so a felled tree can be
+    credited to the right one.
+    """
+
+    def __init__(self, x, y, forest, navigation, particle_manager=None, choppers=None):
+        self.player = Player(x, y)
+        self.stats = PlayerStats()
+        self.forest = forest
+        self.navigation = navigation
+        self.particle_manager = particle_manager
+        self.choppers = choppers if choppers is not None else {}
+
+        self.target_position = None
+        self.is_chopping = False
+        self.chop_target_position = None
+        self.chop_tree = None
+        self.path = None
+
+    def update(self, delta_time):
+        """Handle player movement logic"""
+        self.player.prev_x = self.player.x
+        self.player.prev_y = self.player.y
+        if self.chop_tree is not None and self.chop_tree.forest is None:
+            # Its chunk was unloaded
+            self.stop_chopping()
+        if self.is_chopping and self.chop_target_position is not None:
+            if self._follow_path(delta_time):
+                self.chop_tree.start_chopping()
+        elif self.target_position:
+            if self._follow_path(delta_time):
+                self.target_position = None
+
+    def _plan(self, target_position):
+        """Route around trees to the target, or a straight line if there is none"""
+        start = (self.player.x, self.player.y)
+        path = self.navigation.find_path(start, target_position)
+        if path is None:
+            path = Path(start, [target_position])
+        self.path = path
+
+    def _follow_path(self, delta_time):
+        """Advance along the planned path. Returns True once at its end."""
+        path = self.path
+        if path is None:
+            return True
+        arrived = path.advance(PLAYER_SPEED * delta_time)
+        self.player.x = path.x
+        self.player.y = path.y
+        if arrived:
+            self.path = None
+        return arrived
+
+    def nudge(self, dx, dy):
+        """Shift by (dx, dy) outside of walking, e.g. pushed by core.collision.
+
+        The previous position moves too, so the shift isn't drawn as a
+        step, and the path carries on from the new spot.
+        """
+        player = self.player
+        player.x += dx
+        player.y += dy
+        player.prev_x += dx
+        player.prev_y += dy
+        if self.path is not None:
+            self.path = self.path.moved_to(player.x, player.y)
+
+    def click(self, world_x, world_y):
+        """Left click in world space: toggle chopping a tree or walk there"""
+        tree = self.forest.tree_at(world_x, world_y)
+        if tree is not None:
+            if not self.is_chopping:
+                self.chop(tree)
+            else:
+                self.stop_chopping()
+        else:
+            self.move_to(world_x, world_y)
+
+    def chop(self, tree):
+        """Walk to ``tree`` and chop it, dropping whatever was going on"""
+        self.stop_chopping()
+        self.is_chopping = True
+        self.chop_tree = tree
+        self.choppers[tree] = self
+        self.chop_target_position = (tree.x, tree.y)
+        self.target_position = None
+        self._plan(self.chop_target_position)
+
+    def move_to(self, world_x, world_y):
+        if self.is_chopping:
+            self.stop_chopping()
+
+        self.target_position = (world_x, world_y)
+        self._plan(self.target_position)
+        if self.particle_manager is not None:
+            self.particle_manager.create_splash(world_x, world_y, PARTICLE_COUNT)
+
+    def cancel(self):
+        self.stop_chopping()
+        self.target_position = None
+
+    def stop_chopping(self):
+        """Cancel the current chop, if any"""
+        if self.chop_tree is not None:
+            self.chop_tree.stop_chopping()
+            if self.choppers.get(self.chop_tree) is self:
+                del self.choppers[self.chop_tree]
+        self.is_chopping = False
+        self.chop_target_position = None
+        self.chop_tree = None
+        self.path = None
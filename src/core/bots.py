@@ -0,0 +1,101 @@
+"""Scripted clients for core.server, for localhost tests and load runs.
+
+A Bot keeps a core.net.WorldState from the snapshots it receives and
+every so often acts on it: chops the nearest standing tree it knows of,
+walks somewhere nearby, or heals or hurts itself.
+"""
+import asyncio
+import random
+
+import numpy as np
+
+from core import commands, net
+
+# Seconds between a bot's actions
+MIN_THINK = 0.5
+MAX_THINK = 2.0
+WANDER = 400
+
+
+class Bot:
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.state = net.WorldState()
+        self.id = None
+        self.position = (0.0, 0.0)
+        self.snapshots = 0
+        self.bytes_received = 0
+        self.commands_sent = 0
+
+    async def run(self, host, port, duration):
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            kind, body = await net.read_frame(reader)
+            if kind != net.HELLO:
+                raise ValueError(f"expected HELLO, got message type {kind}")
+            self.id, tick, seed, x, y = net.HELLO_BODY.unpack(body)
+            self.position = (x, y)
+            self.bytes_received += net.FRAME.size + len(body)
+            acting = asyncio.create_task(self._act(writer))
+            try:
+                await asyncio.wait_for(self._receive(reader), duration)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                acting.cancel()
+        finally:
+            writer.close()
+
+    async def _receive(self, reader):
+        while True:
+            kind, body = await net.read_frame(reader)
+            self.bytes_received += net.FRAME.size + len(body)
+            if kind == net.SNAPSHOT:
+                self.state.apply(*net.decode_snapshot(body))
+                self.snapshots += 1
+                me = self.state.avatar(self.id)
+                if me is not None:
+                    self.position = (float(me["x"]), float(me["y"]))
+
+    async def _act(self, writer):
+        while True:
+            await asyncio.sleep(self.rng.uniform(MIN_THINK, MAX_THINK))
+            writer.write(self.decide())
+            self.commands_sent += 1
+
+    def decide(self):
+        """The next command to send, as a frame"""
+        x, y = self.position
+        roll = self.rng.random()
+        if roll < 0.6:
+            tree = self.nearest_tree()
+            if tree is not None:
+                return net.command(commands.CHOP, *tree)
+        if roll < 0.9:
+            return net.command(commands.MOVE, x + self.rng.uniform(-WANDER, WANDER),
+                               y + self.rng.uniform(-WANDER, WANDER))
+        if roll < 0.95:
+            return net.command(commands.HEAL, 10)
+        return net.command(commands.DAMAGE, 15)
+
+    def nearest_tree(self):
+        trees = self.state.trees
+        standing = trees[trees["flags"] == 0]
+        if len(standing) == 0:
+            return None
+        tree_x, tree_y = net.tree_positions(standing["key"])
+        x, y = self.position
+        row = int(np.argmin((tree_x - x) ** 2 + (tree_y - y) ** 2))
+        return float(tree_x[row]), float(tree_y[row])
+
+
+async def swarm(host, port, count, duration, seed=0):
+    """Run ``count`` bots against a server for ``duration`` seconds; returns them"""
+    bots = [Bot(seed + i) for i in range(count)]
+    await asyncio.gather(*(bot.run(host, port, duration) for bot in bots))
+    return bots
+
+
+def run_swarm(host, port, count, duration, seed=0):
+    """Blocking ``swarm`` with its own event loop, e.g. in a child process"""
+    asyncio.run(swarm(host, port, count, duration, seed))
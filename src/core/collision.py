@@ -0,0 +1,400 @@
+import math
+
+import numpy as np
+
+from core.entities import NPC_SIZE, WANDERING
+
+# Radius of an NPC's body, the same as its drawn dot
+BODY_RADIUS = NPC_SIZE
+PLAYER_RADIUS = 16
+# Gap separation steering keeps between the edges of two bodies
+PERSONAL_SPACE = 4
+# Fraction of an overlap taken away per tick; under 1 so crowds settle instead of jittering
+SEPARATION = 0.5
+# Sideways push along a trunk, as a fraction of the push out of it, so bodies
+# walking straight at a trunk go round it instead of stopping against it
+SLIDE = 0.5
+# No body is pushed further than this in one tick
+MAX_PUSH = 6.0
+# Pairs are gathered this much further apart than they can touch, and a
+# body's are kept until it has moved half of it
+SKIN = 16
+# World units per cell of the trunk grid
+TRUNK_CELL = 64
+
+# Row-major cell keys: cell (cx, cy) is cx * KEY_STRIDE + cy
+KEY_STRIDE = 1 << 32
+# A stopped body within this cosine of a wanderer's heading blocks it
+BLOCKED_COS = 0.7
+# Spreads bodies stacked on the same point in different directions
+GOLDEN_ANGLE = math.pi * (3 - math.sqrt(5))
+
+
+def as_points(xy):
+    """View (n, 2) float32 rows as n complex64 points x + iy.
+
+    Gathering a pair's points is then one 8-byte read each, several times
+    faster than indexing rows, and ``abs`` of a difference is a distance.
+    """
+    return xy.view(np.complex64)[:, 0]
+
+
+def cell_keys(points, cell):
+    return np.floor(points.real / cell).astype(np.int64) * KEY_STRIDE + np.floor(points.imag / cell).astype(np.int64)
+
+
+def expand(start, count):
+    """Indices start[i] .. start[i] + count[i] for every i, concatenated, and the i of each"""
+    total = int(count.sum())
+    owner = np.repeat(np.arange(len(count)), count)
+    offset = np.arange(total) - np.repeat(np.cumsum(count) - count, count)
+    return np.repeat(start, count) + offset, owner
+
+
+def dot(a, b):
+    """Dot product of complex points taken as 2D vectors"""
+    return (a * b.conj()).real
+
+
+class Broadphase:
+    """Pairs of bodies within ``reach`` of each other, from a uniform grid.
+
+    Bodies are binned into cells at least as wide as the widest pair and
+    sorted by cell; each body is paired with the bodies after it in its
+    own cell and those of four neighbouring ones, so every pair of cells
+    is checked once.
+
+    Pairs are kept across ticks as a Verlet list: they are gathered
+    ``skin`` further apart than ``reach``, from each body's anchor, the
+    point it was last binned at. While a body stays within half the skin
+    of its anchor none of its missing pairs can have come within reach.
+    Each update re-anchors only the bodies that drifted further: their
+    cells change in the kept sort order, which stable-sorts fast as it is
+    nearly sorted already, their pairs are dropped and they are paired
+    again against all nine cells around them. Everyone else keeps their
+    pairs. ``ids`` tell whether the rows are still the same bodies; if
+    not, everything is rebuilt.
+    """
+
+    def __init__(self, reach, skin=SKIN):
+        self.reach = reach
+        self.skin = skin
+        self.cell = reach + skin
+        self.ids = None
+        self.anchor = None
+        self.key = None
+        self.order = None
+        self.sorted_key = None
+        self.first = np.zeros(0, dtype=np.intp)
+        self.second = np.zeros(0, dtype=np.intp)
+        self.rebuilds = 0
+        self.refreshes = 0
+        self.reuses = 0
+        self.moved = 0
+
+    def update(self, points, ids):
+        """(first, second) row arrays of the candidate pairs for complex ``points``"""
+        if self.ids is None or not np.array_equal(self.ids, ids):
+            self.ids = ids.copy()
+            self.anchor = points.copy()
+            self.moved = len(points)
+            self._rebuild()
+            self.rebuilds += 1
+            return self.first, self.second
+        moved = np.abs(points - self.anchor) > self.skin / 2
+        self.moved = int(np.count_nonzero(moved))
+        if self.moved:
+            self.anchor[moved] = points[moved]
+            self._refresh(moved)
+            self.refreshes += 1
+        else:
+            self.reuses += 1
+        return self.first, self.second
+
+    def _pairs(self, first, second):
+        """The (first, second) pairs whose anchors are close enough to keep"""
+        keep = np.abs(self.anchor[first] - self.anchor[second]) <= self.reach + self.skin
+        return first[keep], second[keep]
+
+    def _rebuild(self):
+        key = self.key = cell_keys(self.anchor, self.cell)
+        order = self.order = np.argsort(key, kind="stable")
+        # Searching in sorted order: sorted needles are several times faster
+        sorted_key = self.sorted_key = key[order]
+        # Bodies later in the order in the same cell, then the cell above it,
+        # which comes straight after; then the three cells to the right,
+        # consecutive keys too
+        after = np.arange(1, len(order) + 1)
+        above = np.searchsorted(sorted_key, sorted_key + 1, "right")
+        right = np.searchsorted(sorted_key, sorted_key + (KEY_STRIDE - 1), "left")
+        right_end = np.searchsorted(sorted_key, sorted_key + (KEY_STRIDE + 1), "right")
+        firsts = []
+        seconds = []
+        for start, end in ((after, above), (right, right_end)):
+            index, owner = expand(start, end - start)
+            first, second = self._pairs(order[owner], order[index])
+            firsts.append(first)
+            seconds.append(second)
+        self.first = np.concatenate(firsts)
+        self.second = np.concatenate(seconds)
+
+    def _refresh(self, moved):
+        key = self.key
+        key[moved] = cell_keys(self.anchor[moved], self.cell)
+        order = self.order = self.order[np.argsort(key[self.order], kind="stable")]
+        sorted_key = self.sorted_key = key[order]
+        keep = ~(moved[self.first] | moved[self.second])
+        firsts = [self.first[keep]]
+        seconds = [self.second[keep]]
+        # The movers in key order, for sorted needles again
+        movers = order[moved[order]]
+        mover_key = key[movers]
+        for dx in (-1, 0, 1):
+            column = mover_key + dx * KEY_STRIDE
+            start = np.searchsorted(sorted_key, column - 1, "left")
+            end = np.searchsorted(sorted_key, column + 1, "right")
+            index, owner = expand(start, end - start)
+            first = movers[owner]
+            second = order[index]
+            # A pair of two movers is found from both ends; keep one
+            new = (first != second) & (~moved[second] | (first < second))
+            first, second = self._pairs(first[new], second[new])
+            firsts.append(first)
+            seconds.append(second)
+        self.first = np.concatenate(firsts)
+        self.second = np.concatenate(seconds)
+
+
+class Collision:
+    """Keeps NPCs and players out of tree trunks and apart from each other.
+
+    ``resolve`` runs after movement each tick. Pairs of bodies come from a
+    Broadphase; any two closer than their radii plus PERSONAL_SPACE are
+    pushed apart by a share of the overlap, all of it onto NPCs when the
+    other one is a player, so crowds heading for the same spot spread out
+    around it instead of stacking. Bodies are then pushed out of the
+    trunks (Tree.trunk, the boxes navigation routes around) they overlap,
+    plus a slide along the trunk so one walked straight at is skirted.
+    A body whose target lies on a trunk, such as a woodcutter walking to
+    the tree it chops, passes through that one.
+
+    A wandering NPC touching a body that has stopped in its way settles
+    where it is: its target becomes its position, so it arrives next
+    tick. Otherwise a crowd bound for one spot would press in on it, and
+    wander, forever.
+
+    Standing trees are kept in slot arrays through the ``tree_changed``
+    forest hook, and binned into TRUNK_CELL cells, padded by the largest
+    radius, only when one changed; a body then checks the trunks of its
+    own cell.
+    """
+
+    def __init__(self, body_radius=BODY_RADIUS, player_radius=PLAYER_RADIUS):
+        self.body_radius = body_radius
+        self.player_radius = player_radius
+        self.max_radius = max(body_radius, player_radius)
+        self.broadphase = Broadphase(2 * self.max_radius + PERSONAL_SPACE)
+        # Tree -> its slot in ``trunks``, and slots given up by felled trees
+        self.slots = {}
+        self.free = []
+        # (left, bottom, right, top) per slot
+        self.trunks = np.zeros((0, 4), dtype=np.float32)
+        self.trunk_keys = None
+        self.trunk_start = None
+        self.trunk_count = None
+        self.trunk_slots = None
+        self.pairs = 0
+        self.contacts = 0
+        self.settled = 0
+
+    def tree_changed(self, tree):
+        """Forest hook: standing trees block, stumps and unloaded trees don't"""
+        blocking = tree.forest is not None and not tree.chopped
+        slot = self.slots.get(tree)
+        if blocking and slot is None:
+            if self.free:
+                slot = self.free.pop()
+            else:
+                slot = len(self.trunks)
+                trunks = np.zeros((max(16, slot * 2), 4), dtype=np.float32)
+                trunks[:slot] = self.trunks
+                self.free.extend(range(len(trunks) - 1, slot, -1))
+                self.trunks = trunks
+            self.slots[tree] = slot
+            self.trunks[slot] = tree.trunk()
+            self.trunk_keys = None
+        elif not blocking and slot is not None:
+            del self.slots[tree]
+            self.free.append(slot)
+            self.trunk_keys = None
+
+    def _index_trunks(self):
+        slots = np.fromiter(self.slots.values(), dtype=np.intp, count=len(self.slots))
+        boxes = self.trunks[slots]
+        pad = self.max_radius
+        low = np.floor((boxes[:, :2] - pad) / TRUNK_CELL).astype(np.int64)
+        high = np.floor((boxes[:, 2:] + pad) / TRUNK_CELL).astype(np.int64)
+        span = high - low + 1
+        # Every cell of each padded box, row by row
+        index, owner = expand(np.zeros(len(slots), dtype=np.int64), span[:, 0] * span[:, 1])
+        cx = low[owner, 0] + index // span[owner, 1]
+        cy = low[owner, 1] + index % span[owner, 1]
+        keys = cx * KEY_STRIDE + cy
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        self.trunk_slots = slots[owner[order]]
+        # Each cell's key, where its trunks start in trunk_slots and how many
+        first = np.flatnonzero(np.diff(keys, prepend=keys[:1] - 1))
+        self.trunk_keys = keys[first]
+        self.trunk_start = first
+        self.trunk_count = np.diff(first, append=len(keys))
+
+    def resolve(self, store, avatars=()):
+        """Push the NPCs of ``store`` and the players of ``avatars`` apart and out of trunks"""
+        n = store.count
+        total = n + len(avatars)
+        if total == 0:
+            return
+        position = np.empty((total, 2), dtype=np.float32)
+        target = np.empty((total, 2), dtype=np.float32)
+        position[:n] = store.position[:n]
+        target[:n] = store.target[:n]
+        for row, avatar in enumerate(avatars, n):
+            player = avatar.player
+            position[row] = (player.x, player.y)
+            target[row] = avatar.chop_target_position or avatar.target_position or (player.x, player.y)
+        points = as_points(position)
+        goals = as_points(target)
+        radius = np.full(total, self.body_radius, dtype=np.float32)
+        radius[n:] = self.player_radius
+        # Players are never pushed by NPCs
+        weight = np.ones(total, dtype=np.float32)
+        weight[n:] = 0
+        ids = np.concatenate((store.ids[:n], -1 - np.arange(len(avatars))))
+        moving = np.zeros(total, dtype=bool)
+        moving[:n] = store.moving[:n]
+        moving[n:] = [avatar.path is not None for avatar in avatars]
+
+        push, first, second = self.separate(points, radius, weight, ids)
+        push += self.push_out(points, goals, radius)
+        push *= np.float32(MAX_PUSH) / np.maximum(np.abs(push), np.float32(MAX_PUSH))
+
+        push = push.view(np.float32).reshape(total, 2)
+        store.position[:n] += push[:n]
+        settling = np.zeros(total, dtype=bool)
+        settling[:n] = moving[:n] & (store.state[:n] == WANDERING)
+        rows = self.settle(first, second, points, goals, moving, settling)
+        self.settled = len(rows)
+        store.target[rows] = store.position[rows]
+        for avatar, (dx, dy) in zip(avatars, push[n:].tolist()):
+            if dx or dy:
+                avatar.nudge(dx, dy)
+
+    def separate(self, points, radius, weight, ids):
+        """Per-body push apart from the bodies within their radii plus PERSONAL_SPACE,
+        and the (first, second) rows of those touching pairs"""
+        total = len(points)
+        push = np.zeros(total, dtype=np.complex64)
+        first, second = self.broadphase.update(points, ids)
+        self.pairs = len(first)
+        if not len(first):
+            return push, first, second
+        offset = points[first] - points[second]
+        distance = np.abs(offset)
+        limit = radius[first] + radius[second] + PERSONAL_SPACE
+        close = distance < limit
+        first = first[close]
+        second = second[close]
+        offset = offset[close]
+        distance = distance[close]
+        limit = limit[close]
+        self.contacts = len(first)
+        if not len(first):
+            return push, first, second
+        stacked = distance < 1e-3
+        if stacked.any():
+            offset[stacked] = np.exp(1j * first[stacked] * GOLDEN_ANGLE)
+            distance[stacked] = 1
+        # Each side takes its weight's share of the push; two players take none
+        weights = np.maximum(weight[first] + weight[second], np.float32(1e-6))
+        step = offset * ((limit - distance) * np.float32(SEPARATION) / distance)
+        mine = weight[first] / weights
+        theirs = weight[second] / weights
+        push.real = np.bincount(first, step.real * mine, total) - np.bincount(second, step.real * theirs, total)
+        push.imag = np.bincount(first, step.imag * mine, total) - np.bincount(second, step.imag * theirs, total)
+        return push, first, second
+
+    def settle(self, first, second, points, goals, moving, settling):
+        """Rows of ``settling`` bodies touching a stopped one in the way to their target"""
+        rows = []
+        for body, other in ((first, second), (second, first)):
+            candidate = settling[body] & ~moving[other]
+            body = body[candidate]
+            other = other[candidate]
+            here = points[body]
+            way = goals[body] - here
+            gap = points[other] - here
+            # The other one stands in the way, not just alongside
+            along = dot(gap, way)
+            blocked = (along > 0) & (along > np.float32(BLOCKED_COS) * np.abs(gap) * np.abs(way))
+            rows.append(body[blocked])
+        return np.unique(np.concatenate(rows))
+
+    def push_out(self, points, goals, radius):
+        """Per-body push out of the trunks it overlaps"""
+        total = len(points)
+        push = np.zeros(total, dtype=np.complex64)
+        if not self.slots:
+            return push
+        if self.trunk_keys is None:
+            self._index_trunks()
+        keys = cell_keys(points, TRUNK_CELL)
+        cell = np.minimum(np.searchsorted(self.trunk_keys, keys), len(self.trunk_keys) - 1)
+        found = self.trunk_keys[cell] == keys
+        start = self.trunk_start[cell]
+        count = np.where(found, self.trunk_count[cell], 0)
+        if not count.any():
+            return push
+        index, body = expand(start, count)
+        # Bottom left and top right corners of each trunk
+        corners = as_points(self.trunks.reshape(-1, 2)).reshape(-1, 2)[self.trunk_slots[index]]
+        low = corners[:, 0]
+        high = corners[:, 1]
+        point = points[body]
+        r = radius[body]
+        offset = point - (np.clip(point.real, low.real, high.real)
+                          + 1j * np.clip(point.imag, low.imag, high.imag)).astype(np.complex64)
+        distance = np.abs(offset)
+        goal = goals[body]
+        exempt = ((goal.real >= low.real - r) & (goal.real <= high.real + r)
+                  & (goal.imag >= low.imag - r) & (goal.imag <= high.imag + r))
+        hit = (distance < r) & ~exempt
+        if not hit.any():
+            return push
+        body = body[hit]
+        low = low[hit]
+        high = high[hit]
+        point = point[hit]
+        offset = offset[hit]
+        distance = distance[hit]
+        r = r[hit]
+
+        normal = offset / np.maximum(distance, np.float32(1e-6))
+        depth = r - distance
+        inside = distance < 1e-6
+        if inside.any():
+            # Centre on the trunk: out through the nearest side
+            p = point[inside]
+            gaps = np.column_stack((p.real - low[inside].real, high[inside].real - p.real,
+                                    p.imag - low[inside].imag, high[inside].imag - p.imag))
+            side = gaps.argmin(axis=1)
+            normal[inside] = np.array((-1, 1, -1j, 1j), dtype=np.complex64)[side]
+            depth[inside] = gaps[np.arange(len(side)), side] + r[inside]
+        # Slide towards the nearer end of the face, along the trunk
+        tangent = normal * np.complex64(1j)
+        along = dot(point - (low + high) / 2, tangent)
+        tangent *= np.where(along < 0, np.float32(-1), np.float32(1))
+        step = (normal + tangent * np.float32(SLIDE)) * depth
+        push.real = np.bincount(body, step.real, total)
+        push.imag = np.bincount(body, step.imag, total)
+        return push
@@ -0,0 +1,77 @@
+"""Player inputs that change the simulation, as a code plus up to four numbers.
+
+Going through ``perform`` is what lets core.replay record and replay them.
+"""
+from core.quality import LEVELS
+
+# Command codes and their arguments
+CLICK = 1           # world x, world y
+CANCEL = 2
+HEAL = 3            # amount
+DAMAGE = 4          # amount
+REPAIR = 5          # amount
+NPC_HEAL = 6        # amount, radius around the player
+NPC_DAMAGE = 7      # amount, radius
+NPC_REPAIR = 8      # amount, radius
+SPAWN_NPCS = 9      # count, radius around the player (0 for the default)
+ADD_TREE = 10       # x, y
+VIEW = 11           # left, bottom, right, top of the streamed view
+QUALITY = 12        # index into core.quality.LEVELS
+MOVE = 13           # world x, world y; walk there even onto a tree
+CHOP = 14           # world x, world y of a tree to walk to and chop
+PLANNER = 15        # 1 to plan routes around trees as well
+COLLISION = 16      # keep NPCs and players out of trunks and apart
+
+# What a remote player may send to core.server
+PLAYER_COMMANDS = frozenset((CLICK, CANCEL, HEAL, DAMAGE, REPAIR, MOVE, CHOP))
+
+
+def perform(simulation, code, a=0.0, b=0.0, c=0.0, d=0.0, avatar=None):
+    """Apply one command to the simulation on behalf of ``avatar`` (the local player by default).
+
+    VIEW is handled by the Replayer.
+    """
+    if avatar is None:
+        avatar = simulation.avatar
+    if code == CLICK:
+        avatar.click(a, b)
+    elif code == MOVE:
+        avatar.move_to(a, b)
+    elif code == CHOP:
+        tree = simulation.forest.tree_at(a, b)
+        if tree is not None:
+            avatar.chop(tree)
+    elif code == CANCEL:
+        avatar.cancel()
+    elif code == HEAL:
+        avatar.stats.heal(a)
+    elif code == DAMAGE:
+        avatar.stats.take_damage(a)
+    elif code == REPAIR:
+        avatar.stats.repair_armor(a)
+    elif code in (NPC_HEAL, NPC_DAMAGE, NPC_REPAIR):
+        npcs = simulation.npcs
+        player = avatar.player
+        rows = npcs.in_radius(player.x, player.y, b)
+        if code == NPC_HEAL:
+            npcs.heal(rows, a)
+        elif code == NPC_DAMAGE:
+            npcs.take_damage(rows, a)
+        else:
+            npcs.repair_armor(rows, a)
+    elif code == SPAWN_NPCS:
+        player = avatar.player
+        if b > 0:
+            simulation.woodcutters.spawn(int(a), player.x, player.y, b)
+        else:
+            simulation.woodcutters.spawn(int(a), player.x, player.y)
+    elif code == ADD_TREE:
+        simulation.add_tree(a, b)
+    elif code == QUALITY:
+        simulation.apply_quality(LEVELS[int(a)])
+    elif code == PLANNER:
+        simulation.use_planner(routes=bool(a))
+    elif code == COLLISION:
+        simulation.use_collision()
+    else:
+        raise ValueError(f"unknown command {code}")
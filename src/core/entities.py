@@ -0,0 +1,227 @@
+import numpy as np
+
+IDLE = 0
+WALKING = 1
+CHOPPING = 2
+WANDERING = 3
+PLANNING = 4
+
+NPC_SPEED = 180
+NPC_MAX_HEALTH = 100
+NPC_MAX_ARMOR = 60
+NPC_SIZE = 8
+
+# Drawn colour per state, indexed by the state code
+STATE_COLORS = np.array([
+    (200, 200, 220, 255),
+    (255, 170, 60, 255),
+    (220, 60, 40, 255),
+    (150, 200, 255, 255),
+    (200, 200, 220, 255),  # planning looks like idle
+], dtype=np.uint8)
+
+
+class EntityStore:
+    """Structure-of-arrays store for NPCs.
+
+    Each live entity is one row in preallocated NumPy columns, laid out like
+    ParticleManager. Rows move when entities are removed, so anything kept
+    across ticks should hold the entity id and look the row up in ``rows``.
+    The batch operations mirror the single-actor code: ``move`` walks every
+    mover a straight step towards its target at once, and
+    ``take_damage``/``heal``/``repair_armor`` follow PlayerStats. They take
+    rows as a slice, a boolean mask or an index array without duplicates.
+    ``tier`` and ``lag`` belong to core.lod.LodScheduler.
+    """
+
+    def __init__(self, capacity=256):
+        self.count = 0
+        self.next_id = 0
+        self.rows = {}
+        self.renderer = None
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.position = np.zeros((capacity, 2), dtype=np.float32)
+        self.target = np.zeros((capacity, 2), dtype=np.float32)
+        self.moving = np.zeros(capacity, dtype=bool)
+        self.speed = np.zeros(capacity, dtype=np.float32)
+        self.health = np.zeros(capacity, dtype=np.float32)
+        self.max_health = np.zeros(capacity, dtype=np.float32)
+        self.armor = np.zeros(capacity, dtype=np.float32)
+        self.max_armor = np.zeros(capacity, dtype=np.float32)
+        self.wood = np.zeros(capacity, dtype=np.int32)
+        self.state = np.zeros(capacity, dtype=np.uint8)
+        self.tree = np.empty(capacity, dtype=object)
+        self.tier = np.zeros(capacity, dtype=np.uint8)
+        self.lag = np.zeros(capacity, dtype=np.float32)
+
+    def _columns(self):
+        return (self.ids, self.position, self.target, self.moving, self.speed,
+                self.health, self.max_health, self.armor, self.max_armor,
+                self.wood, self.state, self.tree, self.tier, self.lag)
+
+    def _grow(self, needed):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        old = self._columns()
+        self._allocate(capacity)
+        n = self.count
+        for new, prev in zip(self._columns(), old):
+            new[:n] = prev[:n]
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self):
+        """Bytes held by the columns, live rows or not"""
+        return sum(column.nbytes for column in self._columns())
+
+    def spawn(self, positions, speed=NPC_SPEED, max_health=NPC_MAX_HEALTH, max_armor=NPC_MAX_ARMOR):
+        """Add one entity per (x, y) row of ``positions``; returns their ids"""
+        positions = np.asarray(positions, dtype=np.float32).reshape(-1, 2)
+        count = len(positions)
+        start = self.count
+        end = start + count
+        if end > self.capacity:
+            self._grow(end)
+
+        ids = np.arange(self.next_id, self.next_id + count)
+        self.next_id += count
+        self.ids[start:end] = ids
+        self.position[start:end] = positions
+        self.target[start:end] = positions
+        self.moving[start:end] = False
+        self.speed[start:end] = speed
+        self.health[start:end] = self.max_health[start:end] = max_health
+        self.armor[start:end] = self.max_armor[start:end] = max_armor
+        self.wood[start:end] = 0
+        self.state[start:end] = IDLE
+        self.tree[start:end] = None
+        self.tier[start:end] = 0
+        self.lag[start:end] = 0
+        self.rows.update(zip(ids.tolist(), range(start, end)))
+        self.count = end
+        return ids
+
+    def set_target(self, row, x, y):
+        self.target[row] = (x, y)
+        self.moving[row] = True
+
+    def move(self, delta_time, rows=None):
+        """Step every moving entity towards its target; returns a mask of arrivals.
+
+        Given an index array of ``rows``, only those are stepped, each by its
+        own entry of the ``delta_time`` array.
+        """
+        if rows is not None:
+            return self._move_rows(rows, delta_time)
+        n = self.count
+        moving = self.moving[:n]
+        position = self.position[:n]
+        # Whole-column arithmetic beats gathering the movers once most are moving
+        offset = self.target[:n] - position
+        distance = np.sqrt(np.einsum("ij,ij->i", offset, offset))
+        step = self.speed[:n] * np.float32(delta_time)
+        arrived = moving & (distance <= step)
+        scale = np.where(arrived, np.float32(1), step / np.maximum(distance, np.float32(1e-6)))
+        scale *= moving
+        offset *= scale[:, None]
+        position += offset
+        position[arrived] = self.target[:n][arrived]
+        moving &= ~arrived
+        return arrived
+
+    def _move_rows(self, rows, delta_time):
+        arrived = np.zeros(self.count, dtype=bool)
+        moving = self.moving[rows]
+        rows = rows[moving]
+        if rows.size == 0:
+            return arrived
+        position = self.position[rows]
+        target = self.target[rows]
+        offset = target - position
+        distance = np.sqrt(np.einsum("ij,ij->i", offset, offset))
+        step = self.speed[rows] * np.asarray(delta_time, dtype=np.float32)[moving]
+        done = distance <= step
+        scale = np.where(done, np.float32(1), step / np.maximum(distance, np.float32(1e-6)))
+        position += offset * scale[:, None]
+        position[done] = target[done]
+        self.position[rows] = position
+        self.moving[rows[done]] = False
+        arrived[rows[done]] = True
+        return arrived
+
+    def take_damage(self, rows, damage):
+        """Armor soaks up half of each hit while it lasts, as in PlayerStats"""
+        armor = self.armor[rows]
+        absorbed = np.minimum(np.asarray(damage, dtype=np.float32) * 0.5, armor)
+        self.armor[rows] = armor - absorbed
+        self.health[rows] = np.maximum(0, self.health[rows] - (damage - absorbed))
+
+    def heal(self, rows, amount):
+        self.health[rows] = np.minimum(self.max_health[rows], self.health[rows] + amount)
+
+    def repair_armor(self, rows, amount):
+        self.armor[rows] = np.minimum(self.max_armor[rows], self.armor[rows] + amount)
+
+    def in_radius(self, x, y, radius):
+        """Rows whose position lies within ``radius`` of the point"""
+        offset = self.position[:self.count] - (x, y)
+        return np.flatnonzero((offset * offset).sum(axis=1) <= radius * radius)
+
+    def dead(self):
+        return np.flatnonzero(self.health[:self.count] <= 0)
+
+    def remove(self, rows):
+        """Swap-remove the given rows by moving live ones in from the tail"""
+        rows = np.unique(rows)
+        if rows.size == 0:
+            return
+        n = self.count
+        for entity_id in self.ids[rows].tolist():
+            del self.rows[entity_id]
+
+        new_count = n - rows.size
+        holes = rows[rows < new_count]
+        if holes.size:
+            keep = np.ones(n - new_count, dtype=bool)
+            keep[rows[rows >= new_count] - new_count] = False
+            movers = np.arange(new_count, n)[keep]
+            for column in self._columns():
+                column[holes] = column[movers]
+            self.rows.update(zip(self.ids[holes].tolist(), holes.tolist()))
+        self.tree[new_count:n] = None
+        self.count = new_count
+
+    def clear(self):
+        self.tree[:self.count] = None
+        self.rows.clear()
+        self.count = 0
+
+    def draw(self, bounds=None):
+        """Draw entities as dots coloured by state, culled to ``bounds`` (l, b, r, t)"""
+        n = self.count
+        if n == 0:
+            return
+        position = self.position[:n]
+        state = self.state[:n]
+        if bounds is not None:
+            left, bottom, right, top = bounds
+            x = position[:, 0]
+            y = position[:, 1]
+            visible = (x >= left) & (x <= right) & (y >= bottom) & (y <= top)
+            position = position[visible]
+            state = state[visible]
+        count = len(position)
+        if count == 0:
+            return
+        if self.renderer is None:
+            from core.particle_renderer import ParticleRenderer
+            self.renderer = ParticleRenderer()
+        size = np.full(count, NPC_SIZE, dtype=np.float32)
+        self.renderer.draw(np.ascontiguousarray(position), size, STATE_COLORS[state], count)
@@ -0,0 +1,255 @@
+import math
+from core.scheduler import Scheduler
+
+DEFAULT_CELL_SIZE = 128
+
+
+class SpatialHash:
+    """Uniform grid mapping cells to the items whose bounding box overlaps them.
+
+    Cells hold insertion-ordered dicts used as sets, so queries are
+    deterministic and removal is O(1).
+    """
+
+    def __init__(self, cell_size=DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.item_cells = {}
+        self.positions = {}
+        # Occupied cell extent; only ever grows, which keeps nearest() bounded
+        self.bounds = None
+
+    def __len__(self):
+        return len(self.item_cells)
+
+    def __contains__(self, item):
+        return item in self.item_cells
+
+    def cell_of(self, x, y):
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def _cell_range(self, left, bottom, right, top):
+        min_x, min_y = self.cell_of(left, bottom)
+        max_x, max_y = self.cell_of(right, top)
+        return [(cx, cy) for cx in range(min_x, max_x + 1) for cy in range(min_y, max_y + 1)]
+
+    def insert(self, item, x, y, half_width=0, half_height=0):
+        """Index ``item`` centred at (x, y) with the given half extents"""
+        if item in self.item_cells:
+            self.remove(item)
+        keys = self._cell_range(x - half_width, y - half_height, x + half_width, y + half_height)
+        for key in keys:
+            self.cells.setdefault(key, {})[item] = None
+        self.item_cells[item] = keys
+        self._grow_bounds(keys[0], keys[-1])
+        self.positions[item] = (x, y)
+
+    def _grow_bounds(self, low, high):
+        if self.bounds is None:
+            self.bounds = (low[0], low[1], high[0], high[1])
+        else:
+            min_x, min_y, max_x, max_y = self.bounds
+            self.bounds = (min(min_x, low[0]), min(min_y, low[1]),
+                           max(max_x, high[0]), max(max_y, high[1]))
+
+    def remove(self, item):
+        keys = self.item_cells.pop(item, None)
+        if keys is None:
+            return
+        del self.positions[item]
+        for key in keys:
+            cell = self.cells[key]
+            del cell[item]
+            if not cell:
+                del self.cells[key]
+
+    def query_point(self, x, y):
+        """Items whose bounding box may contain the point"""
+        cell = self.cells.get(self.cell_of(x, y))
+        return cell.keys() if cell else ()
+
+    def query_rect(self, left, bottom, right, top):
+        """Items whose bounding box may overlap the rectangle"""
+        found = {}
+        for key in self._cell_range(left, bottom, right, top):
+            cell = self.cells.get(key)
+            if cell:
+                found.update(cell)
+        return found.keys()
+
+    def query_radius(self, x, y, radius):
+        """Items whose centre lies within ``radius`` of the point"""
+        radius_sq = radius * radius
+        found = {}
+        for key in self._cell_range(x - radius, y - radius, x + radius, y + radius):
+            cell = self.cells.get(key)
+            if not cell:
+                continue
+            for item in cell:
+                if item in found:
+                    continue
+                item_x, item_y = self.positions[item]
+                if (item_x - x) ** 2 + (item_y - y) ** 2 <= radius_sq:
+                    found[item] = None
+        return list(found)
+
+    def nearest(self, x, y, max_radius=None, predicate=None):
+        """Closest item centre to the point, searching rings of cells outward"""
+        if not self.cells:
+            return None
+
+        center_x, center_y = self.cell_of(x, y)
+        if max_radius is None:
+            min_x, min_y, max_x, max_y = self.bounds
+            max_ring = max(abs(min_x - center_x), abs(max_x - center_x),
+                           abs(min_y - center_y), abs(max_y - center_y))
+        else:
+            max_ring = int(math.ceil(max_radius / self.cell_size))
+        best = None
+        best_dist_sq = math.inf if max_radius is None else max_radius * max_radius
+        seen = set()
+
+        for ring in range(max_ring + 1):
+            for key in self._ring(center_x, center_y, ring):
+                cell = self.cells.get(key)
+                if not cell:
+                    continue
+                for item in cell:
+                    if item in seen:
+                        continue
+                    seen.add(item)
+                    if predicate is not None and not predicate(item):
+                        continue
+                    item_x, item_y = self.positions[item]
+                    dist_sq = (item_x - x) ** 2 + (item_y - y) ** 2
+                    if dist_sq <= best_dist_sq:
+                        best = item
+                        best_dist_sq = dist_sq
+            # Any centre closer than ring * cell_size lives in a ring already visited
+            if best is not None and best_dist_sq <= (ring * self.cell_size) ** 2:
+                break
+        return best
+
+    def _ring(self, center_x, center_y, ring):
+        if ring == 0:
+            yield (center_x, center_y)
+            return
+        for cx in range(center_x - ring, center_x + ring + 1):
+            yield (cx, center_y - ring)
+            yield (cx, center_y + ring)
+        for cy in range(center_y - ring + 1, center_y + ring):
+            yield (center_x - ring, cy)
+            yield (center_x + ring, cy)
+
+
+class Forest:
+    """Collection of trees indexed for click hit-testing and proximity queries.
+
+    Trees report their own state changes, so the forest does no per-frame
+    work; ``on_tree_chopped`` is called with each tree as it is felled and
+    ``on_tree_changed`` whenever a tree is added, removed, felled or regrows.
+    """
+
+    def __init__(self, scheduler=None, cell_size=DEFAULT_CELL_SIZE):
+        self.scheduler = scheduler if scheduler is not None else Scheduler()
+        self.on_tree_chopped = None
+        self.on_tree_changed = None
+        self.trees = {}
+        self.index = SpatialHash(cell_size)
+        self.choppable = SpatialHash(cell_size)
+        # Trees someone is already heading for; kept out of ``choppable``
+        self.claimed = set()
+        # Trees being chopped right now, and a counter bumped on every change
+        self.chopping = set()
+        self.version = 0
+
+    def __len__(self):
+        return len(self.trees)
+
+    def __iter__(self):
+        return iter(self.trees)
+
+    def add(self, tree):
+        tree.forest = self
+        tree.scheduler = self.scheduler
+        self.trees[tree] = None
+        self.index.insert(tree, tree.x, tree.y, tree.width / 2, tree.height / 2)
+        self.tree_changed(tree)
+
+    def remove(self, tree):
+        tree.stop_chopping()
+        if tree.timer is not None:
+            tree.timer.cancel()
+            tree.timer = None
+        tree.forest = None
+        self.trees.pop(tree, None)
+        self.index.remove(tree)
+        self.choppable.remove(tree)
+        self.claimed.discard(tree)
+        self.chopping.discard(tree)
+        self.version += 1
+        if self.on_tree_changed is not None:
+            self.on_tree_changed(tree)
+
+    def tree_changed(self, tree):
+        """Keep the choppable index in sync after a tree is chopped or regrows"""
+        if tree.chopped or tree in self.claimed:
+            self.choppable.remove(tree)
+        elif tree not in self.choppable:
+            self.choppable.insert(tree, tree.x, tree.y)
+        if tree.chopping:
+            self.chopping.add(tree)
+        else:
+            self.chopping.discard(tree)
+        self.version += 1
+        if self.on_tree_changed is not None:
+            self.on_tree_changed(tree)
+
+    def claim(self, tree):
+        """Hide a tree from nearest_choppable until it is released"""
+        self.claimed.add(tree)
+        self.choppable.remove(tree)
+
+    def release(self, tree):
+        if tree in self.claimed:
+            self.claimed.discard(tree)
+            if tree.forest is self:
+                self.tree_changed(tree)
+
+    def tree_chopped(self, tree):
+        self.tree_changed(tree)
+        if self.on_tree_chopped is not None:
+            self.on_tree_chopped(tree)
+
+    def tree_regrown(self, tree):
+        self.tree_changed(tree)
+
+    def tree_at(self, x, y):
+        """Tree under the point, if any"""
+        for tree in self.index.query_point(x, y):
+            if tree.check_hover(x, y):
+                return tree
+        return None
+
+    def trees_in_radius(self, x, y, radius):
+        return self.index.query_radius(x, y, radius)
+
+    def nearest_tree(self, x, y, max_radius=None):
+        return self.index.nearest(x, y, max_radius)
+
+    def nearest_choppable(self, x, y, max_radius=None, predicate=None):
+        """Closest tree that is neither a stump nor claimed"""
+        return self.choppable.nearest(x, y, max_radius, predicate)
+
+    def trees_in_rect(self, left, bottom, right, top):
+        return self.index.query_rect(left, bottom, right, top)
+
+    def draw(self, bounds=None):
+        """Draw every tree, or only those overlapping ``bounds`` (l, b, r, t)"""
+        if bounds is None:
+            trees = self.trees
+        else:
+            # Back to front, so lower trees overlap the ones behind them
+            trees = sorted(self.index.query_rect(*bounds), key=lambda tree: -tree.y)
+        for tree in trees:
+            tree.draw()
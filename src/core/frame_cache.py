@@ -0,0 +1,31 @@
+import arcade
+
+
+class FrameCache:
+    """Off-screen copy of one frame that can be presented again without redrawing.
+
+    ``capture`` clears the copy to ``color`` and runs a draw function into
+    it; ``present`` blits it to the window. ``valid`` is cleared by ``invalidate`` and whenever the
+    window's framebuffer changes size.
+    """
+
+    def __init__(self):
+        self.ctx = arcade.get_window().ctx
+        self.framebuffer = None
+        self.valid = False
+
+    def invalidate(self):
+        self.valid = False
+
+    def capture(self, draw, color):
+        ctx = self.ctx
+        size = ctx.screen.size
+        if self.framebuffer is None or self.framebuffer.size != size:
+            self.framebuffer = ctx.framebuffer(color_attachments=[ctx.texture(size, components=4)])
+        with self.framebuffer.activate():
+            self.framebuffer.clear(color=color)
+            draw()
+        self.valid = True
+
+    def present(self):
+        self.ctx.copy_framebuffer(self.framebuffer, self.ctx.screen)
@@ -0,0 +1,43 @@
+# Unchanged frames in a row before the game counts as idle
+IDLE_FRAMES = 30
+
+
+class IdleTracker:
+    """Notices when consecutive frames would look the same.
+
+    Call ``update`` once per frame with a signature of everything the
+    frame shows (any comparable value) and whether something is moving
+    on its own, such as particles or a chop progress bar. After
+    IDLE_FRAMES unchanged, still frames ``idle`` turns on; the first
+    difference, or ``wake`` from an input handler, turns it off again.
+    ``on_change`` is called with the new state. ``skipped`` counts the
+    frames the caller re-presented instead of drawing.
+    """
+
+    def __init__(self, idle_frames=IDLE_FRAMES):
+        self.idle_frames = idle_frames
+        self.enabled = True
+        self.idle = False
+        self.still = 0
+        self.signature = None
+        self.skipped = 0
+        self.on_change = None
+
+    def update(self, signature, animating=False):
+        if animating or signature != self.signature:
+            self.signature = signature
+            self.wake()
+            return
+        self.still += 1
+        if self.enabled and not self.idle and self.still >= self.idle_frames:
+            self._set(True)
+
+    def wake(self):
+        self.still = 0
+        if self.idle:
+            self._set(False)
+
+    def _set(self, idle):
+        self.idle = idle
+        if self.on_change is not None:
+            self.on_change(idle)
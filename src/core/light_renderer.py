@@ -0,0 +1,83 @@
+import array
+
+import arcade
+from arcade.gl import BufferDescription
+
+VERTEX_SHADER = """
+#version 330
+
+uniform WindowBlock {
+    mat4 projection;
+    mat4 view;
+} window;
+
+uniform vec4 rect;
+
+in vec2 in_vert;
+
+out vec2 v_uv;
+
+void main() {
+    gl_Position = window.projection * window.view * vec4(rect.xy + in_vert * rect.zw, 0.0, 1.0);
+    v_uv = in_vert;
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 330
+
+uniform sampler2D lightmap;
+
+in vec2 v_uv;
+
+out vec4 f_color;
+
+void main() {
+    f_color = texture(lightmap, v_uv);
+}
+"""
+
+# Triangle strip over the unit square; the vertex shader stretches it over ``rect``
+UNIT_SQUARE = (0.0, 0.0, 1.0, 0.0, 0.0, 1.0, 1.0, 1.0)
+
+
+class LightRenderer:
+    """Uploads a Lightmap as one texture and multiplies it over the scene.
+
+    The texture is written once per lightmap build and stretched over the
+    lightmap's world rectangle with linear filtering, so texels blend into
+    smooth light; blending multiplies the colour already drawn by it.
+    """
+
+    def __init__(self, lightmap):
+        self.lightmap = lightmap
+        self.ctx = arcade.get_window().ctx
+        self.texture = None
+        self.uploaded = None
+        self.program = self.ctx.program(vertex_shader=VERTEX_SHADER, fragment_shader=FRAGMENT_SHADER)
+        self.program["lightmap"] = 0
+        vertices = self.ctx.buffer(data=array.array("f", UNIT_SQUARE))
+        self.geometry = self.ctx.geometry([BufferDescription(vertices, "2f", ["in_vert"])],
+                                          mode=self.ctx.TRIANGLE_STRIP)
+
+    def upload(self):
+        lightmap = self.lightmap
+        if self.uploaded == lightmap.builds:
+            return
+        self.uploaded = lightmap.builds
+        height, width = lightmap.pixels.shape[:2]
+        if self.texture is None or self.texture.size != (width, height):
+            self.texture = self.ctx.texture((width, height), components=4,
+                                            filter=(self.ctx.LINEAR, self.ctx.LINEAR))
+        self.texture.write(lightmap.pixels.tobytes())
+
+    def draw(self):
+        self.upload()
+        ctx = self.ctx
+        self.program["rect"] = self.lightmap.rect
+        self.texture.use(0)
+        blend = ctx.blend_func
+        with ctx.enabled(ctx.BLEND):
+            ctx.blend_func = ctx.DST_COLOR, ctx.ZERO
+            self.geometry.render(self.program)
+        ctx.blend_func = blend
@@ -0,0 +1,234 @@
+import math
+import time
+
+import numpy as np
+
+from core.world import CHUNK_SIZE
+
+# World units per lightmap texel; must divide CHUNK_SIZE
+LIGHT_CELL = 16
+# Seconds between rebuilds while something is changing
+REBUILD_INTERVAL = 1 / 15
+# Texels built past each edge of the view, so small camera moves reuse the map
+LIGHT_PADDING = 4
+
+# One full day, in simulation seconds; time 0 is DAWN into it (0.5 is noon)
+DAY_LENGTH = 300
+DAWN = 0.3
+NIGHT_COLOR = np.array((0.10, 0.12, 0.26), dtype=np.float32)
+DAY_COLOR = np.array((1.0, 1.0, 1.0), dtype=np.float32)
+
+CAMPFIRE_RADIUS = 260
+CAMPFIRE_COLOR = (1.0, 0.62, 0.28)
+LANTERN_RADIUS = 200
+LANTERN_COLOR = (0.85, 0.78, 0.55)
+STUMP_RADIUS = 48
+STUMP_COLOR = np.array((0.45, 0.30, 0.12), dtype=np.float32)
+
+
+def daylight(seconds, day_length=DAY_LENGTH):
+    """Ambient RGB in [0, 1] at ``seconds`` of simulation time"""
+    sun = math.cos(2 * math.pi * ((seconds / day_length + DAWN) % 1.0 - 0.5))
+    # Full day or full night for the middle third of each, a blend between
+    level = min(max(sun * 1.5 + 0.5, 0.0), 1.0)
+    return NIGHT_COLOR + (DAY_COLOR - NIGHT_COLOR) * level
+
+
+class Light:
+    """Point light adding ``color`` at its centre, fading to nothing at ``radius``"""
+
+    __slots__ = ("x", "y", "radius", "color")
+
+    def __init__(self, x, y, radius, color):
+        self.x = x
+        self.y = y
+        self.radius = radius
+        # Not copied when already float32, so lights of one kind can share theirs
+        self.color = np.asarray(color, dtype=np.float32)
+
+
+def splat(out, first_x, first_y, cell, lights):
+    """Add ``lights`` into ``out``, an (h, w, 3) grid whose texel (0, 0) is world texel (first_x, first_y)"""
+    height, width = out.shape[:2]
+    for light in lights:
+        radius = light.radius
+        x0 = max(math.floor((light.x - radius) / cell) - first_x, 0)
+        x1 = min(math.ceil((light.x + radius) / cell) - first_x, width)
+        y0 = max(math.floor((light.y - radius) / cell) - first_y, 0)
+        y1 = min(math.ceil((light.y + radius) / cell) - first_y, height)
+        if x0 >= x1 or y0 >= y1:
+            continue
+        dx = (np.arange(x0 + first_x, x1 + first_x, dtype=np.float32) + 0.5) * cell - light.x
+        dy = (np.arange(y0 + first_y, y1 + first_y, dtype=np.float32) + 0.5) * cell - light.y
+        falloff = np.maximum(1 - (dy[:, None] ** 2 + dx[None, :] ** 2) / (radius * radius), 0) ** 2
+        out[y0:y1, x0:x1] += falloff[..., None] * light.color
+
+
+class Lightmap:
+    """Low-resolution light levels over the view, one texel per ``cell`` world units.
+
+    Static lights (campfires, glowing stumps) are indexed by the chunks
+    they reach, and their sum over each chunk is cached; adding, moving or
+    removing one only drops the cache of the chunks it touches. A build
+    fills the view plus LIGHT_PADDING texels with the ambient daylight,
+    adds the cached chunks, then the few dynamic lights such as the
+    player's lantern. ``update`` rebuilds when the view leaves the built
+    area, or at most every ``interval`` seconds when the daylight,
+    static lights or dynamic lights changed.
+
+    ``pixels`` is the result as RGBA rows, bottom row first, covering
+    ``rect`` (left, bottom, width, height); ``lit`` is False while it is
+    all white and can be skipped. ``build_time`` is the last build's
+    cost in seconds.
+    """
+
+    def __init__(self, cell=LIGHT_CELL, interval=REBUILD_INTERVAL, day_length=DAY_LENGTH):
+        if CHUNK_SIZE % cell:
+            raise ValueError(f"light cell {cell} does not divide the chunk size {CHUNK_SIZE}")
+        self.cell = cell
+        self.interval = interval
+        self.day_length = day_length
+        self.chunk_cells = CHUNK_SIZE // cell
+        # Chunk key -> {light: None} reaching it, and its cached sum
+        self.chunk_lights = {}
+        self.cache = {}
+        self.stumps = {}
+        self.version = 0
+        self.pixels = None
+        self.rect = None
+        self.window = None
+        self.lit = False
+        self.signature = None
+        self.elapsed = 0.0
+        self.builds = 0
+        self.chunk_builds = 0
+        self.build_time = 0.0
+        self.renderer = None
+
+    @property
+    def nbytes(self):
+        """Bytes held by the chunk cache and the last build"""
+        pixels = self.pixels.nbytes if self.pixels is not None else 0
+        return pixels + sum(cached.nbytes for cached in self.cache.values())
+
+    def _chunks(self, light):
+        radius = light.radius
+        min_x = math.floor((light.x - radius) / CHUNK_SIZE)
+        max_x = math.floor((light.x + radius) / CHUNK_SIZE)
+        min_y = math.floor((light.y - radius) / CHUNK_SIZE)
+        max_y = math.floor((light.y + radius) / CHUNK_SIZE)
+        return [(cx, cy) for cx in range(min_x, max_x + 1) for cy in range(min_y, max_y + 1)]
+
+    def add(self, light):
+        """Start casting a static light"""
+        for key in self._chunks(light):
+            self.chunk_lights.setdefault(key, {})[light] = None
+            self.cache.pop(key, None)
+        self.version += 1
+        return light
+
+    def remove(self, light):
+        for key in self._chunks(light):
+            lights = self.chunk_lights[key]
+            del lights[light]
+            if not lights:
+                del self.chunk_lights[key]
+            self.cache.pop(key, None)
+        self.version += 1
+
+    def move(self, light, x, y):
+        self.remove(light)
+        light.x = x
+        light.y = y
+        self.add(light)
+
+    def tree_changed(self, tree):
+        """Forest hook: stumps glow until they regrow or their chunk unloads"""
+        light = self.stumps.get(tree)
+        glowing = tree.forest is not None and tree.chopped
+        if glowing and light is None:
+            self.stumps[tree] = self.add(Light(tree.x, tree.y, STUMP_RADIUS, STUMP_COLOR))
+        elif not glowing and light is not None:
+            del self.stumps[tree]
+            self.remove(light)
+
+    def chunk(self, key):
+        """Summed static light over chunk ``key``, or None if no light reaches it"""
+        cached = self.cache.get(key)
+        if cached is None:
+            lights = self.chunk_lights.get(key)
+            if lights is None:
+                return None
+            cells = self.chunk_cells
+            cached = np.zeros((cells, cells, 3), dtype=np.float32)
+            splat(cached, key[0] * cells, key[1] * cells, self.cell, lights)
+            self.cache[key] = cached
+            self.chunk_builds += 1
+        return cached
+
+    def update(self, delta_time, bounds, seconds, dynamic=()):
+        """Rebuild for the view ``bounds`` (l, b, r, t) if due; returns whether it did"""
+        cell = self.cell
+        left, bottom, right, top = bounds
+        view = (math.floor(left / cell), math.floor(bottom / cell),
+                math.ceil(right / cell), math.ceil(top / cell))
+        window = self.window
+        inside = (window is not None and view[0] >= window[0] and view[1] >= window[1]
+                  and view[2] <= window[2] and view[3] <= window[3])
+        ambient = daylight(seconds, self.day_length)
+        signature = (tuple(np.round(ambient * 255).astype(int).tolist()), self.version,
+                     tuple((math.floor(light.x / cell), math.floor(light.y / cell)) for light in dynamic))
+        self.elapsed += delta_time
+        if inside and (signature == self.signature or self.elapsed < self.interval):
+            return False
+        if not inside:
+            window = (view[0] - LIGHT_PADDING, view[1] - LIGHT_PADDING,
+                      view[2] + LIGHT_PADDING, view[3] + LIGHT_PADDING)
+        self.build(window, ambient, dynamic)
+        self.signature = signature
+        self.elapsed = 0.0
+        return True
+
+    def build(self, window, ambient, dynamic=()):
+        """Fill ``pixels`` for the texel rectangle ``window`` (first x, first y, end x, end y)"""
+        start = time.perf_counter()
+        cell = self.cell
+        cells = self.chunk_cells
+        first_x, first_y, end_x, end_y = window
+        width = end_x - first_x
+        height = end_y - first_y
+        light = np.empty((height, width, 3), dtype=np.float32)
+        light[:] = ambient
+        for cy in range(math.floor(first_y / cells), math.floor((end_y - 1) / cells) + 1):
+            for cx in range(math.floor(first_x / cells), math.floor((end_x - 1) / cells) + 1):
+                cached = self.chunk((cx, cy))
+                if cached is None:
+                    continue
+                x0 = max(cx * cells, first_x)
+                x1 = min((cx + 1) * cells, end_x)
+                y0 = max(cy * cells, first_y)
+                y1 = min((cy + 1) * cells, end_y)
+                light[y0 - first_y:y1 - first_y, x0 - first_x:x1 - first_x] += \
+                    cached[y0 - cy * cells:y1 - cy * cells, x0 - cx * cells:x1 - cx * cells]
+        splat(light, first_x, first_y, cell, dynamic)
+        np.minimum(light, 1.0, out=light)
+        self.lit = bool(light.min() < 1.0)
+
+        pixels = self.pixels
+        if pixels is None or pixels.shape[:2] != (height, width):
+            pixels = self.pixels = np.full((height, width, 4), 255, dtype=np.uint8)
+        np.multiply(light, 255, out=light)
+        pixels[..., :3] = light
+        self.window = window
+        self.rect = (first_x * cell, first_y * cell, width * cell, height * cell)
+        self.builds += 1
+        self.build_time = time.perf_counter() - start
+
+    def draw(self):
+        """Darken and tint everything drawn so far in the world camera"""
+        if self.pixels is None or not self.lit:
+            return
+        if self.renderer is None:
+            from core.light_renderer import LightRenderer
+            self.renderer = LightRenderer(self)
+        self.renderer.draw()
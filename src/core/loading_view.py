@@ -0,0 +1,39 @@
+import arcade
+
+BAR_WIDTH = 400
+BAR_HEIGHT = 16
+BAR_COLOR = arcade.color.GOLD
+TRACK_COLOR = (20, 20, 40)
+
+
+class LoadingView(arcade.View):
+    """Progress bar shown while a Preloader works; hands over once it is done.
+
+    ``on_ready`` is called with the loaded textures and is expected to show
+    the next view.
+    """
+
+    def __init__(self, preloader, on_ready):
+        super().__init__()
+        self.background_color = arcade.color.BLACK
+        self.preloader = preloader
+        self.on_ready = on_ready
+        self.label = arcade.Text("Loading", 0, 0, arcade.color.GOLD, 14, anchor_x="center")
+
+    def on_draw(self):
+        self.clear()
+        x = self.window.width / 2
+        y = self.window.height / 2
+        left = x - BAR_WIDTH / 2
+        arcade.draw_lrbt_rectangle_filled(left, left + BAR_WIDTH, y, y + BAR_HEIGHT, TRACK_COLOR)
+        arcade.draw_lrbt_rectangle_filled(left, left + BAR_WIDTH * self.preloader.progress,
+                                          y, y + BAR_HEIGHT, BAR_COLOR)
+        self.label.x = x
+        self.label.y = y + BAR_HEIGHT + 12
+        self.label.draw()
+
+    def on_update(self, delta_time):
+        if self.preloader.done and self.on_ready is not None:
+            on_ready = self.on_ready
+            self.on_ready = None
+            on_ready(self.preloader.textures())
@@ -0,0 +1,141 @@
+"""Distance tiers that decide how often entities far from the action are simulated."""
+import math
+import time
+
+import numpy as np
+
+# An entity has to get this much further out than a tier's radius to drop out of it
+HYSTERESIS = 150
+# Ticks between retiering; NPCs walk about 50 px in that time
+RETIER_INTERVAL = 16
+# Below this many entities tiering costs more than it saves (npcs.woodcutters_lod)
+MIN_ENTITIES = 2000
+# Weight of the newest tick in the running per-entity cost and saving
+SMOOTHING = 0.05
+
+
+class Tier:
+    """Entities within ``radius`` of a focus point (and outside nearer tiers) update every ``interval`` ticks"""
+
+    def __init__(self, name, radius, interval):
+        self.name = name
+        self.radius = radius
+        self.interval = interval
+
+
+# Near covers the whole view around the camera or player at full rate
+TIERS = (
+    Tier("near", 1000, 1),
+    Tier("mid", 2500, 4),
+    Tier("far", math.inf, 16),
+)
+
+
+class LodScheduler:
+    """Sorts an EntityStore into distance tiers and picks the rows due each tick.
+
+    Distance is to the nearest focus point, typically the camera centre
+    and the player. Tiers update every ``interval`` ticks, staggered by
+    entity id so each tick gets an even share of them, and a due entity
+    is handed all the time that built up in its ``lag`` since its last
+    update, so far-away NPCs still cover the same ground in fewer, longer
+    steps. An entity stays in a tier until it is HYSTERESIS past the
+    edge, so one walking along a boundary does not flap, and it is due at
+    once when it moves to a nearer tier, catching up before it is seen.
+    Tiers are worked out every RETIER_INTERVAL ticks; new entities start
+    near. While everything is near, or there are fewer than
+    ``min_entities``, ``update`` returns None and the owner updates
+    everyone as if there were no tiers.
+
+    ``counts`` holds entities per tier after the last ``update``.
+    ``record`` takes the measured cost of the updates that did run and
+    keeps ``saved``, a running estimate of the seconds per tick the
+    skipped updates would have cost, and ``tiering``, the running time
+    ``update`` itself takes. They are kept apart so neither goes negative
+    when there is little to skip.
+    """
+
+    def __init__(self, tiers=TIERS, hysteresis=HYSTERESIS, min_entities=MIN_ENTITIES):
+        self.tiers = tiers
+        self.min_entities = min_entities
+        self.radius = np.array([tier.radius for tier in tiers[:-1]], dtype=np.float64)
+        self.outer = self.radius + hysteresis
+        self.intervals = np.array([tier.interval for tier in tiers], dtype=np.int64)
+        self.counts = np.zeros(len(tiers), dtype=np.int64)
+        self.all_near = True
+        self.due = 0
+        self.skipped = 0
+        self.cost = 0.0
+        self.overhead = 0.0
+        self.saved = 0.0
+        self.tiering = 0.0
+
+    def update(self, store, tick, delta_time, points):
+        """(due rows, their elapsed time) this tick, or None if every entity is due"""
+        start = time.perf_counter()
+        n = store.count
+        tier = store.tier[:n]
+        promoted = None
+        if n < self.min_entities:
+            if not self.all_near:
+                # Everyone catches up and counts as near again
+                tier[:] = 0
+                self.all_near = True
+                return self._catch_up(store, n, delta_time, start)
+            self.counts[:] = 0
+            self.counts[0] = n
+        elif tick % RETIER_INTERVAL == 0:
+            promoted = self._retier(tier, store.position[:n], points)
+        if self.all_near:
+            self.due = n
+            self.skipped = 0
+            self.overhead = time.perf_counter() - start
+            return None
+
+        lag = store.lag[:n]
+        lag += np.float32(delta_time)
+        due = (store.ids[:n] + tick) % self.intervals[tier] == 0
+        if promoted is not None:
+            due |= promoted
+        rows = np.flatnonzero(due)
+        elapsed = lag[rows]
+        lag[rows] = 0
+        self.due = rows.size
+        self.skipped = n - rows.size
+        self.overhead = time.perf_counter() - start
+        return rows, elapsed
+
+    def _catch_up(self, store, n, delta_time, start):
+        lag = store.lag[:n]
+        elapsed = lag + np.float32(delta_time)
+        lag[:] = 0
+        self.counts[:] = 0
+        self.counts[0] = n
+        self.due = n
+        self.skipped = 0
+        self.overhead = time.perf_counter() - start
+        return np.arange(n), elapsed
+
+    def _retier(self, tier, position, points):
+        """Move entities between tiers in place; returns the mask of those that came closer"""
+        if len(tier) == 0:
+            self.counts[:] = 0
+            self.all_near = True
+            return None
+        offset = position[:, None, :] - np.asarray(points, dtype=np.float32)[None, :, :]
+        distance = np.sqrt(np.einsum("ijk,ijk->ij", offset, offset).min(axis=1))
+        inner = np.searchsorted(self.radius, distance)
+        outer = np.searchsorted(self.outer, distance)
+        new = np.where(inner < tier, inner, np.maximum(tier, outer)).astype(np.uint8)
+        promoted = new < tier
+        tier[:] = new
+        self.counts = np.bincount(new, minlength=len(self.tiers))
+        self.all_near = self.counts[0] == len(tier)
+        return promoted
+
+    def record(self, seconds):
+        """Cost of updating this tick's due rows, to estimate what the skipped ones saved"""
+        if self.due:
+            self.cost += (seconds / self.due - self.cost) * SMOOTHING
+        self.saved += (self.skipped * self.cost - self.saved) * SMOOTHING
+        self.tiering += (self.overhead - self.tiering) * SMOOTHING
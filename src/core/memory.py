@@ -0,0 +1,213 @@
+import os
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+from core.scheduler import Timer
+from core.tree import Tree
+
+# Seconds after start before the first sample, so loading isn't taken for a leak
+WARMUP = 30.0
+# Seconds between samples of the probes and the total traced heap
+SAMPLE_INTERVAL = 10.0
+# Every this many samples the heap is also attributed to subsystems; a full
+# tracemalloc snapshot takes on the order of a second in a running game
+SNAPSHOT_EVERY = 6
+# A subsystem is flagged once it grew in this many samples in a row...
+GROWTH_SAMPLES = 6
+# ...and by at least this many bytes over them
+GROWTH_BYTES = 256 * 1024
+# Stack depth kept per allocation; one frame is enough to attribute it
+TRACE_FRAMES = 1
+TOP_LINES = 10
+REPORT_PATH = "memory_report.txt"
+
+# Python heap allocated from these files counts towards the subsystem;
+# anything else is "other"
+SUBSYSTEM_FILES = {
+    "particles": ("core/particle_manager.py", "core/particle_renderer.py"),
+    "trees": ("core/tree.py", "core/forest.py", "core/tree_renderer.py", "core/navigation.py",
+              "core/scheduler.py"),
+    "npcs": ("core/entities.py", "core/woodcutters.py", "core/planner.py", "core/lod.py", "core/collision.py"),
+    "world": ("core/world.py", "core/world_renderer.py", "core/minimap.py", "core/minimap_renderer.py"),
+    "ui": ("core/ui_manager.py", "core/ui_widgets.py", "core/text_cache.py", "core/profiler_overlay.py",
+           "pyglet/text", "pyglet/font"),
+    "textures": ("arcade/texture", "arcade/sprite", "core/animation.py", "PIL/"),
+    "caches": ("core/assets.py", "core/frame_cache.py", "core/lighting.py", "core/light_renderer.py",
+               "core/savegame.py", "core/replay.py"),
+}
+
+
+def subsystem_of(filename):
+    filename = filename.replace(os.sep, "/")
+    for name, fragments in SUBSYSTEM_FILES.items():
+        if any(fragment in filename for fragment in fragments):
+            return name
+    return "other"
+
+
+class MemoryTracker:
+    """Live objects and bytes per subsystem, sampled to spot steady growth.
+
+    ``register`` adds a probe, a callable returning (live objects, bytes)
+    for something the game owns, such as the particle columns or the
+    texture atlas; these count memory Python does not see, like NumPy
+    buffers and GPU textures. ``tracemalloc`` covers every Python
+    allocation: every ``snapshot_every`` samples a snapshot is grouped by
+    SUBSYSTEM_FILES into ``heap:<subsystem>`` series, plus their total
+    ``heap``, leaving out what the tracker itself keeps.
+
+    ``update`` takes the first sample ``warmup`` seconds in, once
+    loading and first-use caches have settled, and then one every
+    ``interval`` seconds; the first one is the baseline. A series that
+    grew in each of its last ``growth_samples`` samples, by at least
+    ``growth_bytes`` overall, is added to ``flags``. ``report`` also lists
+    the source lines that grew most since the first snapshot. Tracing
+    slows every allocation down, so this only runs when asked for.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL, snapshot_every=SNAPSHOT_EVERY,
+                 growth_samples=GROWTH_SAMPLES, growth_bytes=GROWTH_BYTES, warmup=WARMUP):
+        self.interval = interval
+        self.warmup = warmup
+        self.snapshot_every = snapshot_every
+        self.growth_samples = growth_samples
+        self.growth_bytes = growth_bytes
+        self.probes = {}
+        # Series name -> recent byte counts, one per sample
+        self.history = {}
+        self.first = {}
+        self.latest = {}
+        self.flags = []
+        self.flagged = set()
+        self.elapsed = interval - warmup
+        self.time = 0.0
+        self.samples = 0
+        self.sample_time = 0.0
+        self.snapshot_time = 0.0
+        self.baseline = None
+        self.snapshot = None
+
+    def register(self, name, probe):
+        """Report ``probe()``, a (count, bytes) pair, under ``name`` in every sample"""
+        self.probes[name] = probe
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+        return self
+
+    def stop(self):
+        tracemalloc.stop()
+
+    def update(self, delta_time):
+        """Count time, sampling once ``interval`` seconds have passed; returns whether it did"""
+        self.elapsed += delta_time
+        self.time += delta_time
+        if self.elapsed < self.interval:
+            return False
+        self.elapsed = 0.0
+        self.sample()
+        return True
+
+    def sample(self, snapshot=None):
+        """Record the probes, and a snapshot if one is due or ``snapshot``"""
+        start = time.perf_counter()
+        self._record({name: probe() for name, probe in self.probes.items()})
+        tracing = tracemalloc.is_tracing()
+        if snapshot is None:
+            snapshot = tracing and self.samples % self.snapshot_every == 0
+        self.samples += 1
+        self.sample_time = time.perf_counter() - start
+        if snapshot and tracing:
+            self._snapshot()
+
+    def _snapshot(self):
+        start = time.perf_counter()
+        snapshot = tracemalloc.take_snapshot()
+        traced = {"heap": (0, 0)}
+        for stat in snapshot.statistics("filename"):
+            filename = stat.traceback[0].filename
+            if filename in (tracemalloc.__file__, __file__):
+                # The snapshots and series kept here
+                continue
+            for name in ("heap", "heap:" + subsystem_of(filename)):
+                count, size = traced.get(name, (0, 0))
+                traced[name] = (count + stat.count, size + stat.size)
+        self._record(traced)
+        if self.baseline is None:
+            self.baseline = snapshot
+        self.snapshot = snapshot
+        self.snapshot_time = time.perf_counter() - start
+
+    def _record(self, values):
+        self.latest.update(values)
+        for name, (_, size) in values.items():
+            history = self.history.get(name)
+            if history is None:
+                history = self.history[name] = deque(maxlen=self.growth_samples + 1)
+            history.append(size)
+            self.first.setdefault(name, size)
+            self._check(name, history)
+
+    def _check(self, name, history):
+        if len(history) <= self.growth_samples or name in self.flagged:
+            return
+        values = list(history)
+        if all(b > a for a, b in zip(values, values[1:])) and values[-1] - values[0] >= self.growth_bytes:
+            self.flagged.add(name)
+            self.flags.append((self.time, name, values[-1] - values[0]))
+
+    def top_growth(self, limit=TOP_LINES):
+        """(size diff, count diff, "file:line") for the lines that grew most since the first snapshot"""
+        if self.baseline is None or self.snapshot is self.baseline:
+            return []
+        ignore = (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__))
+        stats = self.snapshot.filter_traces(ignore).compare_to(self.baseline.filter_traces(ignore), "lineno")
+        return [(stat.size_diff, stat.count_diff, f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}")
+                for stat in stats[:limit] if stat.size_diff > 0]
+
+    def report(self):
+        lines = [f"memory: {self.samples} samples over {self.time:.0f}s, last took "
+                 f"{self.sample_time * 1000:.1f} ms, last snapshot {self.snapshot_time * 1000:.0f} ms"]
+        lines.append(f"{'subsystem':<24}{'objects':>12}{'bytes':>14}{'since start':>14}")
+        for name, (count, size) in self.latest.items():
+            count = "-" if count is None else count
+            lines.append(f"{name:<24}{count:>12}{size:>14}{size - self.first[name]:>+14}")
+        if self.flags:
+            lines.append("steady growth:")
+            for at, name, growth in self.flags:
+                lines.append(f"  {name} grew {growth} bytes over {self.growth_samples} samples, "
+                             f"flagged at {at:.0f}s")
+        else:
+            lines.append("no steady growth")
+        top = self.top_growth()
+        if top:
+            lines.append("largest growth since the first snapshot:")
+            for size, count, where in top:
+                lines.append(f"  {size:>+12} bytes {count:>+8} blocks  {where}")
+        return "\n".join(lines)
+
+    def write(self, path=REPORT_PATH):
+        with open(path, "w") as f:
+            f.write(self.report() + "\n")
+
+
+def watch_simulation(tracker, simulation):
+    """Register probes for what a Simulation owns: particles, trees, timers, NPCs and chunks"""
+    particles = simulation.particle_manager
+    forest = simulation.forest
+    scheduler = simulation.scheduler
+    npcs = simulation.npcs
+    world = simulation.world
+
+    # Both slotted, so every instance is the same size
+    tree_bytes = sys.getsizeof(Tree(0.0, 0.0))
+    timer_bytes = sys.getsizeof(Timer(0.0, None, ()))
+
+    tracker.register("particles", lambda: (len(particles), particles.nbytes))
+    tracker.register("trees", lambda: (len(forest), len(forest) * tree_bytes))
+    tracker.register("timers", lambda: (len(scheduler), len(scheduler) * timer_bytes))
+    tracker.register("npcs", lambda: (npcs.count, npcs.nbytes))
+    tracker.register("chunks", lambda: (len(world), sum(chunk.terrain.nbytes for chunk in world.chunks.values())))
@@ -0,0 +1,199 @@
+import math
+
+import numpy as np
+
+from core.world import CHUNK_SIZE, TERRAIN_RESOLUTION, terrain_colors
+
+# Texels per side, and world units per texel
+MINIMAP_CELLS = 96
+MINIMAP_CELL_SIZE = 48
+
+UNLOADED_COLOR = (24, 28, 40, 255)
+TREE_COLOR = (0, 86, 0, 255)
+STUMP_COLOR = (101, 67, 33, 255)
+
+
+class Minimap:
+    """Low-resolution picture of the world around the player, patched in place.
+
+    ``image`` is a square RGBA texture of ``cells`` texels, each covering
+    ``cell_size`` world units, addressed toroidally: world cell (cx, cy)
+    always lives at texel (cx % cells, cy % cells). When the player crosses
+    a cell boundary the window scrolls by only repainting the row or column
+    that came into view, and a texel is otherwise only repainted when a
+    tree in it changes or its chunk loads or unloads. Every repaint is also
+    queued in ``patches`` as a texel rectangle for the renderer to upload,
+    so per-frame cost depends on what changed, not on the size of the world.
+    """
+
+    def __init__(self, world, forest, cells=MINIMAP_CELLS, cell_size=MINIMAP_CELL_SIZE):
+        self.world = world
+        self.forest = forest
+        self.cells = cells
+        self.cell_size = cell_size
+        self.image = np.empty((cells, cells, 4), dtype=np.uint8)
+        self.image[:] = UNLOADED_COLOR
+        self.patches = []
+        self.origin = None
+        self.player = (0.0, 0.0)
+        self.dirty = set()
+        self.chunks = set()
+        self.version = None
+        self.renderer = None
+        self.painted = 0
+
+    def cell_of(self, x, y):
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def tree_changed(self, tree):
+        """Simulation hook: repaint the texel under ``tree`` on the next update"""
+        self.dirty.add(self.cell_of(tree.x, tree.y))
+
+    def update(self, player_x, player_y):
+        self.player = (player_x, player_y)
+        center_x, center_y = self.cell_of(player_x, player_y)
+        half = self.cells // 2
+        self._scroll(center_x - half, center_y - half)
+
+        world = self.world
+        changed = ()
+        if self.version != world.version:
+            self.version = world.version
+            resident = set(world.chunks)
+            changed = resident ^ self.chunks
+            for cx, cy in changed:
+                self._paint_rect(cx * CHUNK_SIZE, cy * CHUNK_SIZE,
+                                 (cx + 1) * CHUNK_SIZE, (cy + 1) * CHUNK_SIZE)
+            self.chunks = resident
+
+        dirty = self.dirty
+        self.dirty = set()
+        scale = self.cell_size / CHUNK_SIZE
+        for cx, cy in dirty:
+            # Trees added or dropped with a chunk were just repainted with it
+            if changed and (math.floor((cx + 0.5) * scale), math.floor((cy + 0.5) * scale)) in changed:
+                continue
+            self._paint(cx, cy, cx + 1, cy + 1)
+
+    def _scroll(self, origin_x, origin_y):
+        cells = self.cells
+        if self.origin is None or max(abs(origin_x - self.origin[0]), abs(origin_y - self.origin[1])) >= cells:
+            self.origin = (origin_x, origin_y)
+            self._paint(origin_x, origin_y, origin_x + cells, origin_y + cells)
+            return
+        old_x, old_y = self.origin
+        if (origin_x, origin_y) == (old_x, old_y):
+            return
+        self.origin = (origin_x, origin_y)
+        # Columns, then rows, that came into view
+        if origin_x > old_x:
+            self._paint(old_x + cells, origin_y, origin_x + cells, origin_y + cells)
+        elif origin_x < old_x:
+            self._paint(origin_x, origin_y, old_x, origin_y + cells)
+        if origin_y > old_y:
+            self._paint(origin_x, old_y + cells, origin_x + cells, origin_y + cells)
+        elif origin_y < old_y:
+            self._paint(origin_x, origin_y, origin_x + cells, old_y)
+
+    def _paint_rect(self, left, bottom, right, top):
+        """Repaint the texels whose centres lie in a world rectangle"""
+        size = self.cell_size
+        self._paint(math.ceil(left / size - 0.5), math.ceil(bottom / size - 0.5),
+                    math.ceil(right / size - 0.5), math.ceil(top / size - 0.5))
+
+    def _paint(self, min_x, min_y, max_x, max_y):
+        """Repaint world cells [min_x, max_x) x [min_y, max_y), clipped to the window"""
+        origin_x, origin_y = self.origin
+        cells = self.cells
+        min_x = max(min_x, origin_x)
+        min_y = max(min_y, origin_y)
+        max_x = min(max_x, origin_x + cells)
+        max_y = min(max_y, origin_y + cells)
+        if min_x >= max_x or min_y >= max_y:
+            return
+        block = self.rasterize(min_x, min_y, max_x, max_y)
+        self.painted += block.shape[0] * block.shape[1]
+
+        if self.renderer is None:
+            # The renderer uploads the whole image when it is created
+            patches = None
+        elif len(self.patches) > cells:
+            # Not drawn for a while; one full upload is cheaper than replaying these
+            self.patches = [(0, 0, cells, cells)]
+            patches = None
+        else:
+            patches = self.patches
+
+        # Split at the texture's wrap-around seam
+        y = min_y
+        while y < max_y:
+            ty = y % cells
+            height = min(max_y - y, cells - ty)
+            x = min_x
+            while x < max_x:
+                tx = x % cells
+                width = min(max_x - x, cells - tx)
+                self.image[ty:ty + height, tx:tx + width] = \
+                    block[y - min_y:y - min_y + height, x - min_x:x - min_x + width]
+                if patches is not None:
+                    patches.append((tx, ty, width, height))
+                x += width
+            y += height
+
+    def rasterize(self, min_x, min_y, max_x, max_y):
+        """RGBA for a block of world cells: terrain, then stumps, then standing trees"""
+        size = self.cell_size
+        block = np.empty((max_y - min_y, max_x - min_x, 4), dtype=np.uint8)
+        block[:] = UNLOADED_COLOR
+
+        centers_x = (np.arange(min_x, max_x) + 0.5) * size
+        centers_y = (np.arange(min_y, max_y) + 0.5) * size
+        chunk_x = np.floor(centers_x / CHUNK_SIZE).astype(np.int64)
+        chunk_y = np.floor(centers_y / CHUNK_SIZE).astype(np.int64)
+        step = CHUNK_SIZE / TERRAIN_RESOLUTION
+        chunks = self.world.chunks
+        for cy in range(int(chunk_y[0]), int(chunk_y[-1]) + 1):
+            rows = np.flatnonzero(chunk_y == cy)
+            for cx in range(int(chunk_x[0]), int(chunk_x[-1]) + 1):
+                chunk = chunks.get((cx, cy))
+                if chunk is None:
+                    continue
+                columns = np.flatnonzero(chunk_x == cx)
+                sample_x = ((centers_x[columns] - cx * CHUNK_SIZE) / step).astype(np.int64)
+                sample_y = ((centers_y[rows] - cy * CHUNK_SIZE) / step).astype(np.int64)
+                block[rows[:, None], columns, :3] = terrain_colors(chunk.terrain[np.ix_(sample_y, sample_x)])
+
+        stumps = []
+        standing = []
+        for tree in self.forest.trees_in_rect(min_x * size, min_y * size, max_x * size, max_y * size):
+            x = math.floor(tree.x / size) - min_x
+            y = math.floor(tree.y / size) - min_y
+            if 0 <= x < block.shape[1] and 0 <= y < block.shape[0]:
+                (stumps if tree.chopped else standing).append((y, x))
+        if stumps:
+            y, x = zip(*stumps)
+            block[y, x] = STUMP_COLOR
+        if standing:
+            y, x = zip(*standing)
+            block[y, x] = TREE_COLOR
+        return block
+
+    def take_patches(self):
+        patches = self.patches
+        self.patches = []
+        return patches
+
+    def marker(self):
+        """Player position as a fraction (0-1) across the window"""
+        extent = self.cells * self.cell_size
+        return ((self.player[0] - self.origin[0] * self.cell_size) / extent,
+                (self.player[1] - self.origin[1] * self.cell_size) / extent)
+
+    def draw(self, left, bottom, size):
+        """Draw the map into a screen square, with the player marker on top"""
+        if self.origin is None:
+            return
+        if self.renderer is None:
+            from core.minimap_renderer import MinimapRenderer
+            self.renderer = MinimapRenderer(self)
+        self.renderer.draw(left, bottom, size)
@@ -0,0 +1,89 @@
+import array
+
+import arcade
+from arcade.gl import BufferDescription
+
+VERTEX_SHADER = """
+#version 330
+
+uniform WindowBlock {
+    mat4 projection;
+    mat4 view;
+} window;
+
+uniform vec4 rect;
+
+in vec2 in_vert;
+
+out vec2 v_uv;
+
+void main() {
+    gl_Position = window.projection * window.view * vec4(rect.xy + in_vert * rect.zw, 0.0, 1.0);
+    v_uv = in_vert;
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 330
+
+uniform sampler2D map;
+uniform vec2 offset;
+
+in vec2 v_uv;
+
+out vec4 f_color;
+
+void main() {
+    // The texture wraps around; offset is where the window's corner lives in it
+    f_color = texture(map, v_uv + offset);
+}
+"""
+
+# Triangle strip over the unit square; the vertex shader stretches it over ``rect``
+UNIT_SQUARE = (0.0, 0.0, 1.0, 0.0, 0.0, 1.0, 1.0, 1.0)
+MARKER_COLOR = arcade.color.GOLD
+MARKER_RADIUS = 3
+
+
+class MinimapRenderer:
+    """Keeps a Minimap's image in a GPU texture and draws it as one quad.
+
+    The texture is uploaded whole once; after that only the rectangles the
+    minimap queued in ``patches`` are written, and scrolling is just a
+    texture coordinate offset since the image wraps around.
+    """
+
+    def __init__(self, minimap):
+        self.minimap = minimap
+        self.ctx = arcade.get_window().ctx
+        cells = minimap.cells
+        self.texture = self.ctx.texture((cells, cells), components=4,
+                                        data=minimap.image.tobytes(),
+                                        filter=(self.ctx.NEAREST, self.ctx.NEAREST),
+                                        wrap_x=self.ctx.REPEAT, wrap_y=self.ctx.REPEAT)
+        minimap.take_patches()
+        self.program = self.ctx.program(vertex_shader=VERTEX_SHADER, fragment_shader=FRAGMENT_SHADER)
+        self.program["map"] = 0
+        vertices = self.ctx.buffer(data=array.array("f", UNIT_SQUARE))
+        self.geometry = self.ctx.geometry([BufferDescription(vertices, "2f", ["in_vert"])],
+                                          mode=self.ctx.TRIANGLE_STRIP)
+
+    def upload(self):
+        image = self.minimap.image
+        for x, y, width, height in self.minimap.take_patches():
+            self.texture.write(image[y:y + height, x:x + width].tobytes(),
+                               viewport=(x, y, width, height))
+
+    def draw(self, left, bottom, size):
+        self.upload()
+        minimap = self.minimap
+        cells = minimap.cells
+        origin_x, origin_y = minimap.origin
+        self.program["rect"] = (left, bottom, size, size)
+        self.program["offset"] = ((origin_x % cells) / cells, (origin_y % cells) / cells)
+        self.texture.use(0)
+        self.geometry.render(self.program)
+
+        marker_x, marker_y = minimap.marker()
+        arcade.draw_circle_filled(left + marker_x * size, bottom + marker_y * size,
+                                  MARKER_RADIUS, MARKER_COLOR)
@@ -0,0 +1,444 @@
+import heapq
+import math
+from collections import OrderedDict
+
+import numpy as np
+
+CELL_SIZE = 32
+# Blocked cells are bucketed into square regions of this many cells; a
+# change inside a region drops the cached paths and flow fields touching it
+REGION_SIZE = 16
+# Extra cells around the start/goal bounding box that A* may detour through
+SEARCH_MARGIN = 16
+MAX_SEARCH_CELLS = 1 << 20
+PATH_CACHE_SIZE = 256
+FLOW_CACHE_SIZE = 16
+FLOW_RADIUS = 48
+
+SQRT2 = math.sqrt(2)
+# Nudging the octile heuristic up breaks the many f-cost ties on an open
+# grid in favour of the goal; paths stay within 0.1% of optimal
+HEURISTIC_WEIGHT = 1.001
+# (dx, dy, cost); diagonals come after the orthogonal moves they depend on
+NEIGHBOURS = (
+    (1, 0, 1.0), (-1, 0, 1.0), (0, 1, 1.0), (0, -1, 1.0),
+    (1, 1, SQRT2), (-1, 1, SQRT2), (1, -1, SQRT2), (-1, -1, SQRT2),
+)
+LINE_OFFSETS = ((-0.3, -0.3), (-0.3, 0.3), (0.3, -0.3), (0.3, 0.3))
+
+
+class Path:
+    """Waypoints from a start point, followed by distance travelled.
+
+    Segment directions and lengths are worked out once, so advancing each
+    tick is a multiply-add per axis.
+    """
+
+    def __init__(self, start, waypoints):
+        self.x, self.y = start
+        self.waypoints = list(waypoints)
+        self.segments = []
+        # The waypoint each segment ends at
+        self.ends = []
+        x0, y0 = start
+        for x1, y1 in self.waypoints:
+            length = math.hypot(x1 - x0, y1 - y0)
+            if length > 0:
+                self.segments.append((x0, y0, (x1 - x0) / length, (y1 - y0) / length, length))
+                self.ends.append((x1, y1))
+            x0, y0 = x1, y1
+        self.end = (x0, y0)
+        self.index = 0
+        self.travelled = 0.0
+
+    @property
+    def done(self):
+        return self.index >= len(self.segments)
+
+    def moved_to(self, x, y):
+        """The rest of this path, starting from (x, y) instead"""
+        return Path((x, y), self.ends[self.index:] or [self.end])
+
+    def advance(self, distance):
+        """Move ``distance`` along the path; returns True once at the end"""
+        segments = self.segments
+        while self.index < len(segments):
+            x0, y0, ux, uy, length = segments[self.index]
+            travelled = self.travelled + distance
+            if travelled < length:
+                self.travelled = travelled
+                self.x = x0 + ux * travelled
+                self.y = y0 + uy * travelled
+                return False
+            distance = travelled - length
+            self.index += 1
+            self.travelled = 0.0
+        self.x, self.y = self.end
+        return True
+
+
+def search_window(window, min_x, min_y, start_cell, goal_cell):
+    """A* over a walkability window whose [0, 0] is cell (min_x, min_y).
+
+    Returns the smoothed route as cell coordinates, or None. The start and
+    goal cells are opened in ``window`` itself. Free of NavGrid state, so
+    core.planner can run it on a pool with a window cut from the grid.
+    """
+    height, width = window.shape
+    start = (start_cell[1] - min_y) * width + start_cell[0] - min_x
+    goal = (goal_cell[1] - min_y) * width + goal_cell[0] - min_x
+    window.flat[start] = True
+    window.flat[goal] = True
+    walkable = window.ravel().tolist()
+    goal_col, goal_row = goal % width, goal // width
+
+    size = width * height
+    cost = [math.inf] * size
+    came_from = [-1] * size
+    cost[start] = 0.0
+    # Ties on f go to the node with the larger g, i.e. closer to the goal
+    open_heap = [(0.0, 0.0, start)]
+    offsets = [(dx, dy, dy * width + dx, step) for dx, dy, step in NEIGHBOURS]
+    diagonal_cost = SQRT2 - 2
+
+    while open_heap:
+        _, current_cost, current = heapq.heappop(open_heap)
+        current_cost = -current_cost
+        if current == goal:
+            break
+        if current_cost > cost[current]:
+            continue
+        col, row = current % width, current // width
+        for dx, dy, offset, step in offsets:
+            next_col = col + dx
+            next_row = row + dy
+            if not (0 <= next_col < width and 0 <= next_row < height):
+                continue
+            neighbour = current + offset
+            if not walkable[neighbour]:
+                continue
+            if dx and dy and not (walkable[current + dx] and walkable[current + dy * width]):
+                continue
+            new_cost = current_cost + step
+            if new_cost < cost[neighbour]:
+                cost[neighbour] = new_cost
+                came_from[neighbour] = current
+                h_x = abs(next_col - goal_col)
+                h_y = abs(next_row - goal_row)
+                estimate = new_cost + (h_x + h_y + diagonal_cost * min(h_x, h_y)) * HEURISTIC_WEIGHT
+                heapq.heappush(open_heap, (estimate, -new_cost, neighbour))
+    else:
+        return None
+
+    route = [goal]
+    while route[-1] != start:
+        route.append(came_from[route[-1]])
+    route.reverse()
+    route = _smooth(route, window, width)
+    return tuple((index % width + min_x, index // width + min_y) for index in route)
+
+
+def _smooth(route, window, width):
+    """Drop intermediate cells that the next-but-one cell is visible from"""
+    smoothed = [route[0]]
+    anchor = 0
+    for i in range(2, len(route)):
+        if not _line_clear(route[anchor], route[i], window, width):
+            anchor = i - 1
+            smoothed.append(route[anchor])
+    if len(route) > 1:
+        smoothed.append(route[-1])
+    return smoothed
+
+
+def _line_clear(a, b, window, width):
+    for cols, rows in _line_cells(a % width, a // width, b % width, b // width):
+        if not window[rows, cols].all():
+            return False
+    return True
+
+
+def _line_cells(ax, ay, bx, by):
+    """Columns and rows sampled along the line between two cell centres.
+
+    One pair of arrays per LINE_OFFSETS entry: the line is checked a little
+    either side so it never clips a corner.
+    """
+    samples = int(max(abs(bx - ax), abs(by - ay)) * 4) + 1
+    t = np.linspace(0.0, 1.0, samples + 1)
+    xs = ax + 0.5 + (bx - ax) * t
+    ys = ay + 0.5 + (by - ay) * t
+    for offset_x, offset_y in LINE_OFFSETS:
+        yield np.floor(xs + offset_x).astype(np.int64), np.floor(ys + offset_y).astype(np.int64)
+
+
+def route_regions(route):
+    """Every region the straight segments of a smoothed cell route cross"""
+    regions = {(cx // REGION_SIZE, cy // REGION_SIZE) for cx, cy in route}
+    for (ax, ay), (bx, by) in zip(route, route[1:]):
+        for cols, rows in _line_cells(ax, ay, bx, by):
+            regions.update(zip((cols // REGION_SIZE).tolist(), (rows // REGION_SIZE).tolist()))
+    return regions
+
+
+class FlowField:
+    """Direction to a shared goal for every cell in a square around it.
+
+    Distances are relaxed over the whole window at once with numpy until
+    they stop changing, so the cost is a handful of array operations per
+    cell of path length rather than per cell visited. Any number of agents
+    can then look up their next step with ``directions``.
+    """
+
+    def __init__(self, goal_cell, origin, walkable, cell_size=CELL_SIZE):
+        self.goal_cell = goal_cell
+        self.origin = origin
+        self.cell_size = cell_size
+        goal_x = goal_cell[0] - origin[0]
+        goal_y = goal_cell[1] - origin[1]
+        self.walkable = walkable.copy()
+        self.walkable[goal_y, goal_x] = True
+        self.moves = self._moves(self.walkable)
+        self.distance = self._relax(goal_x, goal_y)
+        self.step_x, self.step_y = self._steps(goal_x, goal_y)
+
+    @staticmethod
+    def _shift(array, dx, dy, fill):
+        """result[y, x] = array[y + dy, x + dx], padding with ``fill``"""
+        result = np.full_like(array, fill)
+        height, width = array.shape
+        dst_x = slice(max(0, -dx), min(width, width - dx))
+        src_x = slice(max(0, dx), min(width, width + dx))
+        dst_y = slice(max(0, -dy), min(height, height - dy))
+        src_y = slice(max(0, dy), min(height, height + dy))
+        result[dst_y, dst_x] = array[src_y, src_x]
+        return result
+
+    def _moves(self, walkable):
+        """(dx, dy, cost, allowed) for each neighbour, without cutting corners"""
+        shift = self._shift
+        moves = []
+        for dx, dy, cost in NEIGHBOURS:
+            allowed = walkable & shift(walkable, dx, dy, False)
+            if dx and dy:
+                allowed &= shift(walkable, dx, 0, False) & shift(walkable, 0, dy, False)
+            moves.append((dx, dy, cost, allowed))
+        return moves
+
+    def _relax(self, goal_x, goal_y):
+        distance = np.full(self.walkable.shape, np.inf)
+        distance[goal_y, goal_x] = 0.0
+        while True:
+            relaxed = distance
+            for dx, dy, cost, allowed in self.moves:
+                through = np.where(allowed, self._shift(distance, dx, dy, np.inf) + cost, np.inf)
+                relaxed = np.minimum(relaxed, through)
+            if np.array_equal(relaxed, distance):
+                return distance
+            distance = relaxed
+
+    def _steps(self, goal_x, goal_y):
+        """Per cell, the neighbour move that leads downhill fastest"""
+        best = np.full(self.distance.shape, np.inf)
+        step_x = np.zeros(best.shape, dtype=np.int8)
+        step_y = np.zeros(best.shape, dtype=np.int8)
+        for dx, dy, cost, allowed in self.moves:
+            through = np.where(allowed, self._shift(self.distance, dx, dy, np.inf) + cost, np.inf)
+            better = through < best
+            best = np.where(better, through, best)
+            step_x[better] = dx
+            step_y[better] = dy
+        step_x[goal_y, goal_x] = 0
+        step_y[goal_y, goal_x] = 0
+        return step_x, step_y
+
+    def directions(self, xs, ys):
+        """Unit step directions for world positions; zero where there is no route"""
+        col = np.floor(np.asarray(xs) / self.cell_size).astype(np.int64) - self.origin[0]
+        row = np.floor(np.asarray(ys) / self.cell_size).astype(np.int64) - self.origin[1]
+        height, width = self.distance.shape
+        inside = (col >= 0) & (col < width) & (row >= 0) & (row < height)
+        col = np.clip(col, 0, width - 1)
+        row = np.clip(row, 0, height - 1)
+        dx = np.where(inside, self.step_x[row, col], 0).astype(np.float32)
+        dy = np.where(inside, self.step_y[row, col], 0).astype(np.float32)
+        norm = np.where((dx != 0) & (dy != 0), np.float32(1 / SQRT2), np.float32(1))
+        return dx * norm, dy * norm
+
+    def direction(self, x, y):
+        dx, dy = self.directions([x], [y])
+        return float(dx[0]), float(dy[0])
+
+
+class NavGrid:
+    """Walkability grid over the world, built from the forest.
+
+    Standing trees block the cells under their trunk; stumps do not. The
+    grid is unbounded and sparse - only blocked cells are stored, bucketed
+    by region - and searches run on a dense numpy window cut around the
+    start and goal. Paths and flow fields are cached and dropped when a
+    region they pass through changes. A freed cell only invalidates paths
+    that touch its region, so a cached path is always walkable but may miss
+    a shortcut opened elsewhere in its search window.
+    """
+
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.regions = {}
+        self.blockers = {}
+        self.paths = OrderedDict()
+        self.flow_fields = OrderedDict()
+        self.region_users = {}
+        self.searches = 0
+        self.cache_hits = 0
+
+    def cell_of(self, x, y):
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def cell_center(self, cx, cy):
+        return ((cx + 0.5) * self.cell_size, (cy + 0.5) * self.cell_size)
+
+    @staticmethod
+    def region_of(cx, cy):
+        return (cx // REGION_SIZE, cy // REGION_SIZE)
+
+    def footprint(self, tree):
+        """Cells under the tree's trunk"""
+        left, bottom, right, top = tree.trunk()
+        min_x, min_y = self.cell_of(left, bottom)
+        max_x, max_y = self.cell_of(right, top)
+        return tuple((cx, cy) for cx in range(min_x, max_x + 1) for cy in range(min_y, max_y + 1))
+
+    def is_blocked(self, cx, cy):
+        region = self.regions.get(self.region_of(cx, cy))
+        return region is not None and (cx, cy) in region
+
+    def tree_changed(self, tree):
+        """Forest hook: re-block or free the cells under ``tree``"""
+        blocking = tree.forest is not None and not tree.chopped
+        cells = self.footprint(tree) if blocking else ()
+        old = self.blockers.pop(tree, ())
+        if cells:
+            self.blockers[tree] = cells
+        if cells == old:
+            return
+
+        changed = set()
+        for cell in old:
+            region_key = self.region_of(*cell)
+            region = self.regions[region_key]
+            region[cell] -= 1
+            if not region[cell]:
+                del region[cell]
+                changed.add(region_key)
+                if not region:
+                    del self.regions[region_key]
+        for cell in cells:
+            region_key = self.region_of(*cell)
+            region = self.regions.setdefault(region_key, {})
+            if cell not in region:
+                changed.add(region_key)
+            region[cell] = region.get(cell, 0) + 1
+        for region_key in changed:
+            self.invalidate_region(region_key)
+
+    def invalidate_region(self, region_key):
+        caches = self._caches()
+        for cache_id, key in self.region_users.pop(region_key, ()):
+            cache = caches[cache_id]
+            entry = cache.pop(key, None)
+            if entry is not None:
+                self._forget(cache, key, entry[1])
+
+    def _remember(self, cache, key, value, regions, limit):
+        """Store ``value`` in an LRU cache, indexed by the regions it depends on"""
+        regions = tuple(regions)
+        cache[key] = (value, regions)
+        for region_key in regions:
+            self.region_users.setdefault(region_key, set()).add((id(cache), key))
+        while len(cache) > limit:
+            old_key, (_, old_regions) = cache.popitem(last=False)
+            self._forget(cache, old_key, old_regions)
+
+    def _forget(self, cache, key, regions):
+        for region_key in regions:
+            users = self.region_users.get(region_key)
+            if users is not None:
+                users.discard((id(cache), key))
+                if not users:
+                    del self.region_users[region_key]
+
+    def _caches(self):
+        return {id(self.paths): self.paths, id(self.flow_fields): self.flow_fields}
+
+    def walkable_window(self, min_x, min_y, width, height):
+        """Dense bool array for the cell window; index as [cy - min_y, cx - min_x]"""
+        walkable = np.ones((height, width), dtype=bool)
+        min_rx, min_ry = self.region_of(min_x, min_y)
+        max_rx, max_ry = self.region_of(min_x + width - 1, min_y + height - 1)
+        for rx in range(min_rx, max_rx + 1):
+            for ry in range(min_ry, max_ry + 1):
+                region = self.regions.get((rx, ry))
+                if not region:
+                    continue
+                for cx, cy in region:
+                    col = cx - min_x
+                    row = cy - min_y
+                    if 0 <= col < width and 0 <= row < height:
+                        walkable[row, col] = False
+        return walkable
+
+    def find_path(self, start, goal):
+        """Waypoints from ``start`` to ``goal`` as a Path, or None if unreachable.
+
+        The start and goal cells are always treated as walkable, so the
+        player can leave or walk up to a tree's trunk.
+        """
+        start_cell = self.cell_of(*start)
+        goal_cell = self.cell_of(*goal)
+        key = (start_cell, goal_cell)
+        entry = self.paths.get(key)
+        if entry is not None:
+            self.paths.move_to_end(key)
+            self.cache_hits += 1
+            cells = entry[0]
+        else:
+            cells = self._search(start_cell, goal_cell)
+            if cells is None:
+                return None
+            self._remember(self.paths, key, cells, route_regions(cells), PATH_CACHE_SIZE)
+        waypoints = [self.cell_center(*cell) for cell in cells[1:-1]]
+        waypoints.append(goal)
+        return Path(start, waypoints)
+
+    def _search(self, start_cell, goal_cell):
+        """A* with the octile heuristic; returns the smoothed cell corners"""
+        min_x = min(start_cell[0], goal_cell[0]) - SEARCH_MARGIN
+        min_y = min(start_cell[1], goal_cell[1]) - SEARCH_MARGIN
+        width = abs(start_cell[0] - goal_cell[0]) + 2 * SEARCH_MARGIN + 1
+        height = abs(start_cell[1] - goal_cell[1]) + 2 * SEARCH_MARGIN + 1
+        if width * height > MAX_SEARCH_CELLS:
+            return None
+        self.searches += 1
+        window = self.walkable_window(min_x, min_y, width, height)
+        return search_window(window, min_x, min_y, start_cell, goal_cell)
+
+    def flow_field(self, x, y, radius=FLOW_RADIUS):
+        """Cached FlowField towards (x, y) covering ``radius`` cells around it"""
+        goal_cell = self.cell_of(x, y)
+        key = (goal_cell, radius)
+        entry = self.flow_fields.get(key)
+        if entry is not None:
+            self.flow_fields.move_to_end(key)
+            self.cache_hits += 1
+            return entry[0]
+
+        origin = (goal_cell[0] - radius, goal_cell[1] - radius)
+        size = 2 * radius + 1
+        walkable = self.walkable_window(origin[0], origin[1], size, size)
+        field = FlowField(goal_cell, origin, walkable, self.cell_size)
+        min_rx, min_ry = self.region_of(*origin)
+        max_rx, max_ry = self.region_of(origin[0] + size - 1, origin[1] + size - 1)
+        regions = [(rx, ry) for rx in range(min_rx, max_rx + 1) for ry in range(min_ry, max_ry + 1)]
+        self._remember(self.flow_fields, key, field, regions, FLOW_CACHE_SIZE)
+        return field
@@ -0,0 +1,158 @@
+"""Wire format shared by core.server and its clients.
+
+Every message is a little-endian u32 payload length, a u8 message type
+and the payload. Clients send COMMAND messages, one core.commands code
+and four floats each. The server answers a connection with HELLO and
+then sends one SNAPSHOT per server tick.
+
+A snapshot is a header followed by tagged sections of numpy records, as
+in core.savegame. It only carries what changed since the snapshot before
+it on the same connection, which TCP delivers in order, so no acks are
+needed:
+
+- AVTR/ADEL, STAT/SDEL and NPCS/NDEL: avatar positions, avatar stats and
+  NPCs that entered interest or changed, and ids that left it
+- TREE/TDEL: trees that entered interest or changed, and keys that were
+  removed
+- CELL: tree cells that left interest; the client forgets their trees
+
+A tree is identified by core.savegame.tree_key, which packs its
+position, so its record only adds the chopped and chopping flags.
+"""
+import struct
+
+import numpy as np
+
+from core.savegame import upsert
+
+FRAME = struct.Struct("<IB")
+HELLO_BODY = struct.Struct("<IIQdd")
+COMMAND_BODY = struct.Struct("<Bffff")
+SNAPSHOT_HEADER = struct.Struct("<IH")
+SECTION = struct.Struct("<4sI")
+# Longest message a peer may send before it is dropped
+MAX_MESSAGE = 1 << 24
+
+HELLO = 1
+COMMAND = 2
+SNAPSHOT = 3
+
+# Trees are streamed by square cells of this size
+TREE_CELL = 512
+
+CHOPPED = 1
+CHOPPING = 2
+
+# Positions and stats change at very different rates, so they are sent apart
+AVATAR_DTYPE = np.dtype([("id", "<u4"), ("x", "<f4"), ("y", "<f4")])
+STATS_DTYPE = np.dtype([("id", "<u4"), ("health", "<f4"), ("armor", "<f4"), ("wood", "<i4")])
+NPC_DTYPE = np.dtype([("id", "<u4"), ("x", "<f4"), ("y", "<f4"), ("state", "u1")])
+TREE_DTYPE = np.dtype([("key", "<u8"), ("flags", "u1")])
+CELL_DTYPE = np.dtype([("x", "<i4"), ("y", "<i4")])
+SECTIONS = {
+    b"AVTR": AVATAR_DTYPE,
+    b"ADEL": np.dtype("<u4"),
+    b"STAT": STATS_DTYPE,
+    b"SDEL": np.dtype("<u4"),
+    b"NPCS": NPC_DTYPE,
+    b"NDEL": np.dtype("<u4"),
+    b"TREE": TREE_DTYPE,
+    b"TDEL": np.dtype("<u8"),
+    b"CELL": CELL_DTYPE,
+}
+
+
+def frame(kind, body):
+    return FRAME.pack(len(body), kind) + body
+
+
+def hello(avatar_id, tick, seed, x, y):
+    return frame(HELLO, HELLO_BODY.pack(avatar_id, tick, seed, x, y))
+
+
+def command(code, a=0.0, b=0.0, c=0.0, d=0.0):
+    return frame(COMMAND, COMMAND_BODY.pack(code, a, b, c, d))
+
+
+def snapshot(tick, sections):
+    """SNAPSHOT frame for {tag: records}; empty sections are left out"""
+    parts = []
+    for tag, records in sections.items():
+        if len(records):
+            parts.append(SECTION.pack(tag, len(records)))
+            parts.append(records.tobytes())
+    return frame(SNAPSHOT, SNAPSHOT_HEADER.pack(tick, len(parts) // 2) + b"".join(parts))
+
+
+def decode_snapshot(body):
+    """(tick, {tag: records}) from a SNAPSHOT payload"""
+    tick, count = SNAPSHOT_HEADER.unpack_from(body, 0)
+    offset = SNAPSHOT_HEADER.size
+    sections = {}
+    for _ in range(count):
+        tag, length = SECTION.unpack_from(body, offset)
+        offset += SECTION.size
+        dtype = SECTIONS.get(tag)
+        if dtype is None:
+            raise ValueError(f"unknown snapshot section {tag!r}")
+        sections[tag] = np.frombuffer(body, dtype=dtype, count=length, offset=offset)
+        offset += length * dtype.itemsize
+    return tick, sections
+
+
+async def read_frame(reader):
+    """(type, payload) of the next message; raises IncompleteReadError at EOF"""
+    length, kind = FRAME.unpack(await reader.readexactly(FRAME.size))
+    if length > MAX_MESSAGE:
+        raise ValueError(f"message of {length} bytes")
+    return kind, await reader.readexactly(length)
+
+
+def tree_positions(keys):
+    """(x, y) arrays back from tree keys"""
+    pairs = np.ascontiguousarray(keys, dtype="<u8").view("<f4").reshape(-1, 2)
+    return pairs[:, 1], pairs[:, 0]
+
+
+def cell_ids(cell_x, cell_y):
+    """One int64 per (cell x, cell y) pair, for set operations on cells"""
+    cell_x = np.asarray(cell_x, dtype=np.int64)
+    cell_y = np.asarray(cell_y, dtype=np.int64)
+    return (cell_x << 32) | (cell_y & 0xFFFFFFFF)
+
+
+def tree_cells(keys):
+    """cell_ids of the TREE_CELL cells the trees stand in"""
+    x, y = tree_positions(keys)
+    return cell_ids(np.floor(x / TREE_CELL), np.floor(y / TREE_CELL))
+
+
+class WorldState:
+    """A client's copy of what the server has told it, kept up to date by ``apply``"""
+
+    def __init__(self):
+        self.tick = 0
+        self.avatars = np.empty(0, AVATAR_DTYPE)
+        self.stats = np.empty(0, STATS_DTYPE)
+        self.npcs = np.empty(0, NPC_DTYPE)
+        self.trees = np.empty(0, TREE_DTYPE)
+
+    def apply(self, tick, sections):
+        empty = np.empty(0, np.uint64)
+        self.tick = tick
+        self.avatars = upsert(self.avatars, "id", sections.get(b"AVTR", self.avatars[:0]),
+                              sections.get(b"ADEL", empty))
+        self.stats = upsert(self.stats, "id", sections.get(b"STAT", self.stats[:0]),
+                            sections.get(b"SDEL", empty))
+        self.npcs = upsert(self.npcs, "id", sections.get(b"NPCS", self.npcs[:0]),
+                           sections.get(b"NDEL", empty))
+        cells = sections.get(b"CELL")
+        if cells is not None and len(self.trees):
+            left = np.isin(tree_cells(self.trees["key"]), cell_ids(cells["x"], cells["y"]))
+            self.trees = self.trees[~left]
+        self.trees = upsert(self.trees, "key", sections.get(b"TREE", self.trees[:0]),
+                            sections.get(b"TDEL", empty))
+
+    def avatar(self, avatar_id):
+        rows = np.flatnonzero(self.avatars["id"] == avatar_id)
+        return self.avatars[rows[0]] if rows.size else None
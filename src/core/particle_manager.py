@@ -1,24 +1,125 @@
 
-from core.particle import WaterParticle
+import numpy as np
+
+PARTICLE_LIFETIME = 60
+FADE_START = 30
+GRAVITY = 0.1
+
 
 class ParticleManager:
-    def __init__(self):
-        self.particles = []
+    """Structure-of-arrays particle store.
+
+    Every live particle occupies one row in preallocated NumPy columns, so a
+    frame is a handful of vectorized operations instead of one Python object
+    per droplet. Dead particles are compacted by swapping live ones from the
+    tail into their slots; the alpha channel lives in ``color[:, 3]``.
+
+    ``splash_scale`` thins every splash and ``max_particles``, when set,
+    caps how many can be alive; both are lowered by the quality governor.
+    """
+
+    def __init__(self, capacity=1024, seed=None):
+        self.count = 0
+        self.rng = np.random.default_rng(seed)
+        self.renderer = None
+        self.splash_scale = 1.0
+        self.max_particles = None
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self.position = np.zeros((capacity, 2), dtype=np.float32)
+        self.velocity = np.zeros((capacity, 2), dtype=np.float32)
+        self.size = np.zeros(capacity, dtype=np.float32)
+        self.color = np.zeros((capacity, 4), dtype=np.uint8)
+        self.lifetime = np.zeros(capacity, dtype=np.int32)
+
+    def _grow(self, needed):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        old = (self.position, self.velocity, self.size, self.color, self.lifetime)
+        self._allocate(capacity)
+        n = self.count
+        for new, prev in zip(self._columns(), old):
+            new[:n] = prev[:n]
+
+    def _columns(self):
+        return (self.position, self.velocity, self.size, self.color, self.lifetime)
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self):
+        """Bytes held by the columns, live rows or not"""
+        return sum(column.nbytes for column in self._columns())
 
     def create_splash(self, x, y, count=30):
-        for _ in range(count):
-            self.particles.append(WaterParticle(x, y))
+        if self.splash_scale < 1.0:
+            count = max(1, int(count * self.splash_scale))
+        if self.max_particles is not None:
+            count = min(count, self.max_particles - self.count)
+            if count <= 0:
+                return
+        start = self.count
+        end = start + count
+        if end > self.capacity:
+            self._grow(end)
+
+        rng = self.rng
+        self.position[start:end] = (x, y)
+        self.velocity[start:end, 0] = rng.uniform(-3, 3, count)
+        self.velocity[start:end, 1] = rng.uniform(1, 5, count)
+        self.size[start:end] = rng.integers(2, 7, count)
+
+        color = self.color[start:end]
+        color[:, 0] = np.clip(rng.integers(-20, 21, count), 0, 255)
+        color[:, 1] = np.clip(rng.integers(-20, 21, count), 0, 255)
+        color[:, 2] = 255
+        color[:, 3] = 255
+
+        self.lifetime[start:end] = PARTICLE_LIFETIME
+        self.count = end
 
     def update(self):
-        particles_to_remove = []
-        for i, particle in enumerate(self.particles):
-            particle.update()
-            if not particle.is_alive():
-                particles_to_remove.append(i)
+        n = self.count
+        if n == 0:
+            return
+
+        self.position[:n] += self.velocity[:n]
+        self.velocity[:n, 1] -= GRAVITY
+        lifetime = self.lifetime[:n]
+        lifetime -= 1
+
+        fading = lifetime < FADE_START
+        self.color[:n, 3][fading] = (255 * lifetime[fading] / FADE_START).clip(0, 255).astype(np.uint8)
+
+        self._compact()
+
+    def _compact(self):
+        """Swap-remove dead particles by moving live ones in from the tail"""
+        n = self.count
+        dead = np.flatnonzero(self.lifetime[:n] <= 0)
+        if dead.size == 0:
+            return
+
+        new_count = n - dead.size
+        holes = dead[dead < new_count]
+        if holes.size:
+            tail = np.arange(new_count, n)
+            movers = tail[self.lifetime[new_count:n] > 0]
+            for column in self._columns():
+                column[holes] = column[movers]
+        self.count = new_count
 
-        for index in sorted(particles_to_remove, reverse=True):
-            self.particles.pop(index)
+    def clear(self):
+        self.count = 0
 
     def draw(self):
-        for particle in self.particles:
-            particle.draw()
+        if self.count == 0:
+            return
+        if self.renderer is None:
+            from core.particle_renderer import ParticleRenderer
+            self.renderer = ParticleRenderer()
+        self.renderer.draw(self.position, self.size, self.color, self.count)
@@ -0,0 +1,113 @@
+import arcade
+from arcade.gl import BufferDescription
+
+VERTEX_SHADER = """
+#version 330
+
+in vec2 in_vert;
+in float in_size;
+in vec4 in_color;
+
+out float v_size;
+out vec4 v_color;
+
+void main() {
+    gl_Position = vec4(in_vert, 0.0, 1.0);
+    v_size = in_size;
+    v_color = in_color;
+}
+"""
+
+GEOMETRY_SHADER = """
+#version 330
+
+uniform WindowBlock {
+    mat4 projection;
+    mat4 view;
+} window;
+
+layout (points) in;
+layout (triangle_strip, max_vertices = 4) out;
+
+in float v_size[];
+in vec4 v_color[];
+
+out vec2 g_offset;
+out vec4 g_color;
+
+void main() {
+    mat4 mvp = window.projection * window.view;
+    vec2 center = gl_in[0].gl_Position.xy;
+    float radius = v_size[0];
+
+    for (int i = 0; i < 4; i++) {
+        vec2 corner = vec2(i % 2 == 0 ? -1.0 : 1.0, i < 2 ? -1.0 : 1.0);
+        g_offset = corner;
+        g_color = v_color[0];
+        gl_Position = mvp * vec4(center + corner * radius, 0.0, 1.0);
+        EmitVertex();
+    }
+    EndPrimitive();
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 330
+
+in vec2 g_offset;
+in vec4 g_color;
+
+out vec4 f_color;
+
+void main() {
+    if (dot(g_offset, g_offset) > 1.0) {
+        discard;
+    }
+    f_color = g_color;
+}
+"""
+
+
+class ParticleRenderer:
+    """Draws every live particle as filled circles in a single draw call"""
+
+    def __init__(self, capacity=1024):
+        self.ctx = arcade.get_window().ctx
+        self.program = self.ctx.program(
+            vertex_shader=VERTEX_SHADER,
+            geometry_shader=GEOMETRY_SHADER,
+            fragment_shader=FRAGMENT_SHADER,
+        )
+        self.capacity = capacity
+        self.position_buffer = self.ctx.buffer(reserve=capacity * 8, usage="stream")
+        self.size_buffer = self.ctx.buffer(reserve=capacity * 4, usage="stream")
+        self.color_buffer = self.ctx.buffer(reserve=capacity * 4, usage="stream")
+        self.geometry = self.ctx.geometry(
+            [
+                BufferDescription(self.position_buffer, "2f", ["in_vert"]),
+                BufferDescription(self.size_buffer, "1f", ["in_size"]),
+                BufferDescription(self.color_buffer, "4f1", ["in_color"], normalized=["in_color"]),
+            ],
+            mode=self.ctx.POINTS,
+        )
+
+    def _reserve(self, count):
+        capacity = self.capacity
+        while capacity < count:
+            capacity *= 2
+        self.position_buffer.orphan(size=capacity * 8)
+        self.size_buffer.orphan(size=capacity * 4)
+        self.color_buffer.orphan(size=capacity * 4)
+        self.capacity = capacity
+
+    def draw(self, position, size, color, count):
+        """Upload the first ``count`` rows of the particle columns and draw them"""
+        if count > self.capacity:
+            self._reserve(count)
+
+        self.position_buffer.write(position[:count].tobytes())
+        self.size_buffer.write(size[:count].tobytes())
+        self.color_buffer.write(color[:count].tobytes())
+
+        with self.ctx.enabled(self.ctx.BLEND):
+            self.geometry.render(self.program, vertices=count)
@@ -0,0 +1,192 @@
+"""Tree choice and route planning for woodcutters, off the simulation thread.
+
+Idle woodcutters are handed to a Planner in batches. Each batch becomes a
+PlanJob: the agents' positions plus a compact snapshot of the free trees
+around them, and with routes on the walkability window those trees stand
+in, cut from the forest and NavGrid. ``plan_job`` is pure and module
+level, so jobs can go to any concurrent.futures executor, a process pool
+included, or run inline when there is none.
+
+Within a job every tree goes to at most one agent, so agents planned
+together never pick the same one. Agents in different jobs still can, and
+the snapshot is out of date by the time a result comes back, so results
+are only proposals: Woodcutters checks each one against the live forest
+and asks again if its tree was claimed, felled or unloaded meanwhile.
+Results are handed back exactly ``delay`` ticks after they were asked
+for, waiting for a late job if need be, so what the NPCs do never depends
+on how fast the pool is and a replay plans exactly like the live run.
+"""
+import math
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+from core.navigation import SEARCH_MARGIN, search_window
+from core.woodcutters import SEARCH_RADIUS
+
+# Ticks between asking for a plan and acting on it
+PLAN_DELAY = 3
+BATCH_SIZE = 64
+
+
+class PlanJob:
+    """One batch of agents and the part of the world they plan against"""
+
+    def __init__(self, ids, positions, trees, radius, window=None, origin=(0, 0), cell_size=0):
+        self.ids = ids
+        self.positions = positions
+        # (n, 2) float32 positions of free trees; results index into it
+        self.trees = trees
+        self.radius = radius
+        # Walkability around the trees with its [0, 0] cell at ``origin``, for routes
+        self.window = window
+        self.origin = origin
+        self.cell_size = cell_size
+
+
+class PlanResult:
+    """Per agent: index of its tree in the job (-1 for none) and the waypoints before it"""
+
+    def __init__(self, ids, choices, routes):
+        self.ids = ids
+        self.choices = choices
+        self.routes = routes
+
+
+def plan_job(job):
+    """Give each agent the nearest tree within the radius that nobody earlier in the job took"""
+    count = len(job.ids)
+    choices = np.full(count, -1, dtype=np.int64)
+    routes = [None] * count
+    if len(job.trees):
+        offset = job.positions[:, None, :] - job.trees[None, :, :]
+        distance = np.einsum("ijk,ijk->ij", offset, offset)
+        distance[distance > np.float32(job.radius * job.radius)] = np.inf
+        for agent in range(count):
+            tree = int(np.argmin(distance[agent]))
+            if distance[agent, tree] == np.inf:
+                continue
+            choices[agent] = tree
+            distance[:, tree] = np.inf
+            if job.window is not None:
+                routes[agent] = _route(job, job.positions[agent], job.trees[tree])
+    return PlanResult(job.ids, choices, routes)
+
+
+def _route(job, start, goal):
+    """Waypoints around standing trees, as NavGrid.find_path would give, minus the goal"""
+    size = job.cell_size
+    start_cell = (math.floor(start[0] / size), math.floor(start[1] / size))
+    goal_cell = (math.floor(goal[0] / size), math.floor(goal[1] / size))
+    min_x = min(start_cell[0], goal_cell[0]) - SEARCH_MARGIN
+    min_y = min(start_cell[1], goal_cell[1]) - SEARCH_MARGIN
+    width = abs(start_cell[0] - goal_cell[0]) + 2 * SEARCH_MARGIN + 1
+    height = abs(start_cell[1] - goal_cell[1]) + 2 * SEARCH_MARGIN + 1
+    col = min_x - job.origin[0]
+    row = min_y - job.origin[1]
+    window = job.window[row:row + height, col:col + width].copy()
+    cells = search_window(window, min_x, min_y, start_cell, goal_cell)
+    if cells is None:
+        return None
+    return [((cx + 0.5) * size, (cy + 0.5) * size) for cx, cy in cells[1:-1]]
+
+
+class Planner:
+    """Batches plan requests, sends them to ``executor`` and hands back due results.
+
+    ``navigation`` is the NavGrid to plan routes on; without one agents
+    walk straight at their tree. The tree snapshot is rebuilt only when the
+    forest's version has moved on since the last request.
+    """
+
+    def __init__(self, forest, navigation=None, executor=None, delay=PLAN_DELAY,
+                 batch_size=BATCH_SIZE, radius=SEARCH_RADIUS):
+        self.forest = forest
+        self.navigation = navigation
+        self.executor = executor
+        self.delay = delay
+        self.batch_size = batch_size
+        self.radius = radius
+        # (due tick, trees the job indexes, future) in submission order
+        self.jobs = deque()
+        self.trees = []
+        self.positions = np.empty((0, 2), dtype=np.float32)
+        self.version = None
+        self.planned = 0
+        # Results that were not ready by their tick and had to be waited for
+        self.late = 0
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def _snapshot(self):
+        forest = self.forest
+        if forest.version == self.version:
+            return
+        positions = forest.choppable.positions
+        self.trees = [tree for tree in positions if not tree.chopping]
+        self.positions = np.array([positions[tree] for tree in self.trees],
+                                  dtype=np.float32).reshape(-1, 2)
+        self.version = forest.version
+
+    def submit(self, tick, ids, positions):
+        """Plan for the agents with entity ``ids`` standing at ``positions`` (n, 2)"""
+        if len(ids) == 0:
+            return
+        self._snapshot()
+        # Neighbours share a job, which keeps its snapshot small and its reservations useful
+        cells = np.floor(positions / np.float32(2 * self.radius)).astype(np.int64)
+        order = np.lexsort((positions[:, 0], cells[:, 0], cells[:, 1]))
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            job, trees = self._job(ids[batch], positions[batch])
+            if self.executor is None:
+                future = Future()
+                future.set_result(plan_job(job))
+            else:
+                future = self.executor.submit(plan_job, job)
+            self.jobs.append((tick + self.delay, trees, future))
+            self.planned += len(batch)
+
+    def _job(self, ids, positions):
+        low = positions.min(axis=0) - self.radius
+        high = positions.max(axis=0) + self.radius
+        inside = np.flatnonzero(((self.positions >= low) & (self.positions <= high)).all(axis=1))
+        trees = [self.trees[index] for index in inside.tolist()]
+        job = PlanJob(np.array(ids, dtype=np.int64), np.array(positions, dtype=np.float32),
+                      self.positions[inside], self.radius)
+        navigation = self.navigation
+        if navigation is not None and trees:
+            min_x, min_y = navigation.cell_of(*low.tolist())
+            max_x, max_y = navigation.cell_of(*high.tolist())
+            min_x -= SEARCH_MARGIN
+            min_y -= SEARCH_MARGIN
+            job.window = navigation.walkable_window(min_x, min_y, max_x - min_x + SEARCH_MARGIN + 1,
+                                                    max_y - min_y + SEARCH_MARGIN + 1)
+            job.origin = (min_x, min_y)
+            job.cell_size = navigation.cell_size
+        return job, trees
+
+    def results(self, tick):
+        """(entity id, tree or None, waypoints or None) for every plan due by ``tick``"""
+        results = []
+        while self.jobs and self.jobs[0][0] <= tick:
+            _, trees, future = self.jobs.popleft()
+            if not future.done():
+                self.late += 1
+            result = future.result()
+            for entity_id, choice, route in zip(result.ids.tolist(), result.choices.tolist(), result.routes):
+                results.append((entity_id, trees[choice] if choice >= 0 else None, route))
+        return results
+
+    def clear(self):
+        for _, _, future in self.jobs:
+            future.cancel()
+        self.jobs.clear()
+
+    def close(self):
+        """Drop queued work and stop the executor without waiting on it"""
+        self.clear()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
@@ -1,4 +1,6 @@
 class PlayerStats:
+    __slots__ = ("max_health", "health", "max_armor", "armor", "wood_count")
+
     def __init__(self):
         self.max_health = 100
         self.health = self.max_health
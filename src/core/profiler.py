@@ -0,0 +1,127 @@
+import json
+import time
+from collections import deque
+
+import numpy as np
+
+DEFAULT_CAPACITY = 600
+PERCENTILES = (50, 95, 99)
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+        self.draw_calls = 0
+
+    def __enter__(self):
+        self.draw_calls = self.profiler.draw_calls
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        profiler = self.profiler
+        profiler.record(self.name, self.start, end - self.start, profiler.draw_calls - self.draw_calls)
+        return False
+
+
+class FrameProfiler:
+    """Per-stage frame timings kept in fixed-size ring buffers.
+
+    Wrap each stage in ``with profiler.stage(name):``. While disabled that
+    returns a shared no-op context manager, so instrumentation left in the
+    frame loop costs one attribute check per stage. ``draw_calls`` is bumped
+    by whatever hooks the renderer (see core.profiler_overlay) and is
+    attributed to the stage that was open at the time.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.enabled = False
+        self.frame = 0
+        self.draw_calls = 0
+        self.durations = {}
+        self.draw_counts = {}
+        self.events = deque(maxlen=capacity * 32)
+        self._stages = {}
+
+    def stage(self, name):
+        if not self.enabled:
+            return NULL_STAGE
+        stage = self._stages.get(name)
+        if stage is None:
+            stage = self._stages[name] = _Stage(self, name)
+        return stage
+
+    def next_frame(self):
+        """Start a new frame slot; call once at the top of the frame"""
+        if not self.enabled:
+            return
+        self.frame += 1
+        slot = self.frame % self.capacity
+        for row in self.durations.values():
+            row[slot] = 0.0
+        for row in self.draw_counts.values():
+            row[slot] = 0
+
+    def record(self, name, start, duration, draw_calls=0):
+        row = self.durations.get(name)
+        if row is None:
+            row = self.durations[name] = np.zeros(self.capacity)
+            self.draw_counts[name] = np.zeros(self.capacity, dtype=np.int64)
+        slot = self.frame % self.capacity
+        # A stage can run several times per frame, e.g. multiple simulation ticks
+        row[slot] += duration
+        self.draw_counts[name][slot] += draw_calls
+        self.events.append((name, start, duration, self.frame, draw_calls))
+
+    def reset(self):
+        self.frame = 0
+        self.durations.clear()
+        self.draw_counts.clear()
+        self.events.clear()
+
+    def summary(self):
+        """[(stage, p50_ms, p95_ms, p99_ms, mean_draw_calls)] over the buffered frames"""
+        frames = min(self.frame, self.capacity)
+        if frames == 0:
+            return []
+        rows = []
+        for name, row in self.durations.items():
+            # Slot 0 is only written once the ring wraps; skip it until then
+            samples = row if self.frame >= self.capacity else row[1:frames + 1]
+            p50, p95, p99 = np.percentile(samples, PERCENTILES) * 1000
+            counts = self.draw_counts[name]
+            counts = counts if self.frame >= self.capacity else counts[1:frames + 1]
+            rows.append((name, float(p50), float(p95), float(p99), float(counts.mean())))
+        return rows
+
+    def export_chrome_trace(self, path):
+        """Write buffered stage events in Chrome trace format (chrome://tracing, Perfetto)"""
+        events = list(self.events)
+        origin = events[0][1] if events else 0.0
+        trace = [{
+            "name": name,
+            "ph": "X",
+            "ts": (start - origin) * 1e6,
+            "dur": duration * 1e6,
+            "pid": 0,
+            "tid": 0,
+            "args": {"frame": frame, "draw_calls": draw_calls},
+        } for name, start, duration, frame, draw_calls in events]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+        return len(trace)
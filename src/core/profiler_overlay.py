@@ -0,0 +1,127 @@
+import arcade
+import arcade.text
+from arcade.gl import Geometry
+
+REFRESH_INTERVAL = 0.25
+LINE_HEIGHT = 16
+FONT_SIZE = 11
+PADDING = 8
+
+
+class DrawCallCounter:
+    """Counts GL draws into a profiler by wrapping Geometry.render.
+
+    Sprite lists, shape lists and the draw_* helpers all end in
+    Geometry.render; text is drawn by pyglet, so label draws are counted
+    separately. Nothing is patched until ``install`` is called.
+    """
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.original_render = None
+        self.original_label = None
+
+    def install(self):
+        if self.original_render is not None:
+            return
+        profiler = self.profiler
+        original_render = self.original_render = Geometry.render
+        original_label = self.original_label = arcade.text._draw_pyglet_label
+
+        def render(geometry, *args, **kwargs):
+            profiler.draw_calls += 1
+            return original_render(geometry, *args, **kwargs)
+
+        def draw_label(label):
+            profiler.draw_calls += 1
+            return original_label(label)
+
+        Geometry.render = render
+        arcade.text._draw_pyglet_label = draw_label
+
+    def uninstall(self):
+        if self.original_render is None:
+            return
+        Geometry.render = self.original_render
+        arcade.text._draw_pyglet_label = self.original_label
+        self.original_render = None
+        self.original_label = None
+
+
+class ProfilerOverlay:
+    """Stage percentile table drawn in screen space through the UI camera.
+
+    Given a QualityGovernor, the table ends with its level, rolling average
+    and most recent decision; given an IdleTracker, with the number of
+    frames it let the game skip; given a LodScheduler, with its tier
+    counts and estimated saving.
+    """
+
+    def __init__(self, profiler, governor=None, idle=None, lod=None):
+        self.profiler = profiler
+        self.governor = governor
+        self.idle = idle
+        self.lod = lod
+        self.counter = DrawCallCounter(profiler)
+        self.lines = []
+        self.since_refresh = REFRESH_INTERVAL
+
+    @property
+    def visible(self):
+        return self.profiler.enabled
+
+    def toggle(self):
+        profiler = self.profiler
+        profiler.enabled = not profiler.enabled
+        if profiler.enabled:
+            profiler.reset()
+            self.counter.install()
+        else:
+            self.counter.uninstall()
+
+    def update(self, delta_time):
+        self.since_refresh += delta_time
+
+    def _refresh(self):
+        rows = [f"{'stage':<18}{'p50':>7}{'p95':>7}{'p99':>7}{'draws':>7}"]
+        for name, p50, p95, p99, draws in sorted(self.profiler.summary()):
+            rows.append(f"{name:<18}{p50:7.2f}{p95:7.2f}{p99:7.2f}{draws:7.0f}")
+        governor = self.governor
+        if governor is not None:
+            rows.append(f"quality {governor.level} ({governor.settings.name}) "
+                        f"avg {governor.average * 1000:.2f} / {governor.budget * 1000:.2f} ms")
+            if governor.decisions:
+                frame, old, new, average = governor.decisions[-1]
+                rows.append(f"  frame {frame}: {old} -> {new} at {average * 1000:.2f} ms")
+        if self.idle is not None:
+            rows.append(f"idle frames skipped {self.idle.skipped}")
+        lod = self.lod
+        if lod is not None:
+            counts = " ".join(f"{tier.name} {count}" for tier, count in zip(lod.tiers, lod.counts.tolist()))
+            rows.append(f"lod {counts}  saving {lod.saved * 1000:.2f} ms/tick  "
+                        f"tiering {lod.tiering * 1000:.2f} ms/tick")
+
+        while len(self.lines) < len(rows):
+            self.lines.append(arcade.Text("", 0, 0, arcade.color.WHITE, FONT_SIZE,
+                                          font_name=("Courier New", "monospace")))
+        del self.lines[len(rows):]
+        for line, row in zip(self.lines, rows):
+            line.text = row
+
+    def draw(self, window_height):
+        if not self.visible:
+            return
+        # Relayout a few times a second rather than every frame
+        if self.since_refresh >= REFRESH_INTERVAL:
+            self.since_refresh = 0.0
+            self._refresh()
+        if not self.lines:
+            return
+
+        top = window_height - 140
+        width = max(line.content_width for line in self.lines) + PADDING * 2
+        height = len(self.lines) * LINE_HEIGHT + PADDING * 2
+        arcade.draw_lrbt_rectangle_filled(PADDING, PADDING + width, top - height, top, (0, 0, 0, 180))
+        for i, line in enumerate(self.lines):
+            line.position = (PADDING * 2, top - PADDING - (i + 1) * LINE_HEIGHT + 4)
+            line.draw()
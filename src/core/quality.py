@@ -0,0 +1,107 @@
+from collections import deque
+
+# Target work time per frame, update plus draw
+FRAME_BUDGET = 1 / 60
+# Frames averaged before each decision; refilled after every change
+WINDOW = 30
+# Step down when the average is over budget, back up only with real headroom
+DOWNGRADE_RATIO = 1.0
+UPGRADE_RATIO = 0.6
+# Consecutive frames with headroom needed before stepping back up
+UPGRADE_FRAMES = 120
+DECISION_HISTORY = 32
+
+
+class QualityLevel:
+    """What one step of the governor allows.
+
+    ``particle_cap`` bounds live particles (None for unbounded) and
+    ``splash_scale`` thins each splash. ``ui_effects`` keeps the decorative
+    HUD passes. NPCs farther than ``far_radius`` from the player choose
+    their next tree only every ``far_interval`` ticks.
+    """
+
+    def __init__(self, name, particle_cap, splash_scale, ui_effects, far_interval, far_radius=1200):
+        self.name = name
+        self.particle_cap = particle_cap
+        self.splash_scale = splash_scale
+        self.ui_effects = ui_effects
+        self.far_interval = far_interval
+        self.far_radius = far_radius
+
+
+# Best first; each step gives up a little more than the one before
+LEVELS = (
+    QualityLevel("high", None, 1.0, True, 1),
+    QualityLevel("fewer particles", 1024, 0.5, True, 1),
+    QualityLevel("plain ui", 512, 0.5, False, 1),
+    QualityLevel("far npc lod", 256, 0.25, False, 4),
+)
+
+
+class QualityGovernor:
+    """Steps ``level`` down when frames run over budget and back up with headroom.
+
+    Feed it each frame's work time through ``update``. A change empties the
+    sample window, so the next decision only sees frames rendered at the
+    new level, and stepping up also waits for UPGRADE_FRAMES frames in a
+    row under UPGRADE_RATIO of the budget; together that keeps it from
+    oscillating around the threshold. ``on_change`` is called with the new
+    QualityLevel, and ``decisions`` keeps (frame, old, new, average) for
+    the last few changes.
+    """
+
+    def __init__(self, budget=FRAME_BUDGET, levels=LEVELS, window=WINDOW):
+        self.budget = budget
+        self.levels = levels
+        self.samples = deque(maxlen=window)
+        self.level = 0
+        self.frame = 0
+        self.calm = 0
+        self.enabled = True
+        self.decisions = deque(maxlen=DECISION_HISTORY)
+        self.on_change = None
+
+    @property
+    def settings(self):
+        return self.levels[self.level]
+
+    @property
+    def average(self):
+        """Mean work time over the current window, in seconds"""
+        if not self.samples:
+            return 0.0
+        return sum(self.samples) / len(self.samples)
+
+    def update(self, frame_time):
+        """Record one frame; returns True if the level changed"""
+        self.frame += 1
+        samples = self.samples
+        samples.append(frame_time)
+        if not self.enabled or len(samples) < samples.maxlen:
+            return False
+
+        average = self.average
+        if average > self.budget * DOWNGRADE_RATIO:
+            self.calm = 0
+            if self.level < len(self.levels) - 1:
+                self.set_level(self.level + 1, average)
+                return True
+        elif average < self.budget * UPGRADE_RATIO:
+            self.calm += 1
+            if self.calm >= UPGRADE_FRAMES and self.level > 0:
+                self.set_level(self.level - 1, average)
+                return True
+        else:
+            self.calm = 0
+        return False
+
+    def set_level(self, level, average=0.0):
+        level = max(0, min(len(self.levels) - 1, level))
+        if level != self.level:
+            self.decisions.append((self.frame, self.level, level, average))
+        self.level = level
+        self.samples.clear()
+        self.calm = 0
+        if self.on_change is not None:
+            self.on_change(self.settings)
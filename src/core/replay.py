@@ -0,0 +1,170 @@
+"""Tick-stamped input recordings and deterministic replay.
+
+Every input that changes the simulation is a command from core.commands:
+a code and up to four numbers. A Recorder stamps each one with the
+simulation tick it arrived before and keeps the view rectangle the world
+was streamed around; a Replayer rebuilds the simulation from the same
+seed and feeds the commands back tick by tick, as fast as it can, timing
+each step. Two replays of one recording end in the same ``checksum``.
+
+Chunks are generated inline during a replay, streamed around the recorded
+view once per tick. That matches headless.py exactly; a windowed session
+streams once per frame with chunks arriving from a worker thread, so its
+replay is exact with itself but only close to the original.
+"""
+import hashlib
+import struct
+import time
+
+import numpy as np
+
+from core.commands import VIEW, perform
+from core.profiler import PERCENTILES
+from core.simulation import SIM_DT, SIM_RATE, Simulation
+
+MAGIC = b"RPGR"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQIIdd")
+
+EVENT_DTYPE = np.dtype([("tick", "<u4"), ("code", "u1"),
+                        ("a", "<f4"), ("b", "<f4"), ("c", "<f4"), ("d", "<f4")])
+
+
+def checksum(simulation):
+    """Short hex digest of the player, trees, NPCs, particles and clocks"""
+    digest = hashlib.sha1()
+    player = simulation.player
+    stats = simulation.player_stats
+    digest.update(struct.pack("<QdddddQ", simulation.tick, simulation.scheduler.time, player.x, player.y,
+                              stats.health, stats.armor, stats.wood_count))
+
+    trees = sorted((tree.x, tree.y, tree.chopped, tree.chopping,
+                    tree.timer.due if tree.timer is not None else -1.0) for tree in simulation.forest)
+    digest.update(np.array(trees, dtype=np.float64).tobytes())
+
+    npcs = simulation.npcs
+    n = npcs.count
+    for column in (npcs.ids, npcs.position, npcs.target, npcs.health, npcs.armor, npcs.wood, npcs.state):
+        digest.update(column[:n].tobytes())
+
+    particles = simulation.particle_manager
+    digest.update(struct.pack("<Q", particles.count))
+    digest.update(particles.position[:particles.count].tobytes())
+    return digest.hexdigest()[:16]
+
+
+class Recording:
+    def __init__(self, seed, spawn, ticks, events):
+        self.seed = seed
+        self.spawn = spawn
+        self.ticks = ticks
+        self.events = events
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, SIM_RATE, self.seed, self.ticks, len(self.events), *self.spawn))
+            f.write(np.ascontiguousarray(self.events, dtype=EVENT_DTYPE).tobytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, rate, seed, ticks, count, spawn_x, spawn_y = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError("not an input recording")
+        if version != VERSION:
+            raise ValueError(f"unsupported recording version {version}")
+        if rate != SIM_RATE:
+            raise ValueError(f"recorded at {rate} ticks/s, the simulation runs at {SIM_RATE}")
+        events = np.frombuffer(data, dtype=EVENT_DTYPE, count=count, offset=HEADER.size)
+        return cls(seed, (spawn_x, spawn_y), ticks, events)
+
+
+class Recorder:
+    """Performs commands on a simulation and remembers them.
+
+    The simulation must have been built with an explicit seed for the
+    recording to replay. Loading a save mid-session is not captured.
+    """
+
+    def __init__(self, simulation):
+        self.simulation = simulation
+        self.events = []
+        self._view = None
+
+    def perform(self, code, a=0.0, b=0.0, c=0.0, d=0.0):
+        # Rounded to what the file stores first, so the replay sees the same values
+        a, b, c, d = np.array((a, b, c, d), dtype=np.float32).tolist()
+        self.events.append((self.simulation.tick, code, a, b, c, d))
+        perform(self.simulation, code, a, b, c, d)
+
+    def view(self, left, bottom, right, top):
+        """Note the streamed view whenever it moves; chunk lookahead follows its velocity"""
+        view = tuple(np.array((left, bottom, right, top), dtype=np.float32).tolist())
+        if view != self._view:
+            self._view = view
+            self.events.append((self.simulation.tick, VIEW, *view))
+
+    def recording(self):
+        simulation = self.simulation
+        return Recording(simulation.world.seed, simulation.spawn, simulation.tick,
+                         np.array(self.events, dtype=EVENT_DTYPE))
+
+    def save(self, path):
+        self.recording().save(path)
+
+
+class Replayer:
+    """Feeds a Recording back into a fresh simulation one tick at a time"""
+
+    def __init__(self, recording, simulation=None):
+        self.recording = recording
+        if simulation is None:
+            simulation = Simulation(*recording.spawn, seed=recording.seed)
+        self.simulation = simulation
+        self.cursor = 0
+        self.view = None
+        self.step_times = []
+
+    @property
+    def done(self):
+        return self.simulation.tick >= self.recording.ticks
+
+    def step(self):
+        """Run the commands due before the next tick, then the tick; False once finished"""
+        if self.done:
+            return False
+        start = time.perf_counter()
+        simulation = self.simulation
+        events = self.recording.events
+        tick = simulation.tick
+        while self.cursor < len(events) and events[self.cursor]["tick"] <= tick:
+            _, code, a, b, c, d = events[self.cursor].tolist()
+            self.cursor += 1
+            if code == VIEW:
+                self.view = (a, b, c, d)
+            else:
+                perform(simulation, code, a, b, c, d)
+        if self.view is not None:
+            simulation.world.update(*self.view, SIM_DT)
+        simulation.step()
+        self.step_times.append(time.perf_counter() - start)
+        return True
+
+    def run(self):
+        while self.step():
+            pass
+        return self
+
+    def report(self, frame_times=None):
+        """Frame time distribution in ms plus the final checksum, as text"""
+        times = np.array(self.step_times if frame_times is None else frame_times) * 1000
+        label = "step" if frame_times is None else "frame"
+        lines = [f"{self.simulation.tick} ticks, {len(self.recording.events)} events, "
+                 f"{times.sum() / 1000:.2f}s"]
+        if times.size:
+            percentiles = np.percentile(times, PERCENTILES)
+            summary = "  ".join(f"p{p} {value:.3f}" for p, value in zip(PERCENTILES, percentiles))
+            lines.append(f"{label} ms: mean {times.mean():.3f}  {summary}  max {times.max():.3f}")
+        lines.append(f"checksum {checksum(self.simulation)}")
+        return "\n".join(lines)
@@ -0,0 +1,555 @@
+"""Versioned binary snapshots of the simulation, written off the frame loop.
+
+A save directory holds one full snapshot (``base.sav``) plus a chain of
+delta snapshots (``delta_<sequence>.sav``) that only carry the trees and
+NPCs that changed since the previous one. Every file is a header followed
+by tagged sections of fixed-layout numpy records, so loading is a memory
+map and a few ``np.frombuffer`` views rather than per-object parsing.
+
+The frame thread only captures: deltas from the trees a ChangeTracker saw
+change, or a copy of the tree table it keeps up to date for full saves,
+plus a copy of the NPC columns. Diffing the NPCs, encoding,
+writing and periodically folding the deltas back into a new base all
+happen on the SaveWriter thread.
+"""
+import mmap
+import os
+import queue
+import struct
+import threading
+
+import numpy as np
+
+from core.entities import CHOPPING as NPC_CHOPPING, IDLE, PLANNING, WALKING
+from core.tree import Tree
+
+MAGIC = b"RPGS"
+VERSION = 1
+FULL = 0
+DELTA = 1
+
+HEADER = struct.Struct("<4sHBxIQQdQ")
+SECTION = struct.Struct("<4sIQ")
+ALIGNMENT = 8
+# Smaller files are simply read; larger ones are memory-mapped
+MMAP_THRESHOLD = 1 << 20
+
+BASE_NAME = "base.sav"
+DELTA_PREFIX = "delta_"
+SUFFIX = ".sav"
+COMPACT_EVERY = 10
+AUTOSAVE_INTERVAL = 30.0
+
+CHOPPED = 1
+CHOPPING = 2
+GENERATED = 4
+
+PLAYER_DTYPE = np.dtype([
+    ("x", "<f8"), ("y", "<f8"), ("camera_x", "<f8"), ("camera_y", "<f8"),
+    ("health", "<f8"), ("max_health", "<f8"), ("armor", "<f8"), ("max_armor", "<f8"),
+    ("wood", "<i8"),
+])
+TREE_DTYPE = np.dtype([("key", "<u8"), ("x", "<f8"), ("y", "<f8"), ("flags", "u1"), ("due", "<f8")])
+# For NPCs walking to or chopping a tree the target is the tree itself,
+# since planned routes aren't saved
+NPC_DTYPE = np.dtype([
+    ("id", "<i8"), ("x", "<f4"), ("y", "<f4"), ("target_x", "<f4"), ("target_y", "<f4"),
+    ("moving", "u1"), ("state", "u1"), ("speed", "<f4"), ("health", "<f4"), ("max_health", "<f4"),
+    ("armor", "<f4"), ("max_armor", "<f4"), ("wood", "<i4"),
+])
+SECTIONS = {
+    b"PLYR": PLAYER_DTYPE,
+    b"TREE": TREE_DTYPE,
+    b"TDEL": np.dtype("<u8"),
+    b"NPCS": NPC_DTYPE,
+    b"NDEL": np.dtype("<i8"),
+}
+
+
+_POSITION = struct.Struct("<ff")
+_KEY = struct.Struct("<Q")
+
+
+def tree_key(x, y):
+    """Stable 64-bit identity for a tree: the float32 bits of its position"""
+    return _KEY.unpack(_POSITION.pack(y, x))[0]
+
+
+def tree_keys(x, y):
+    """``tree_key`` over arrays of positions"""
+    pairs = np.empty((len(x), 2), dtype="<f4")
+    pairs[:, 0] = y
+    pairs[:, 1] = x
+    return pairs.view("<u8").ravel()
+
+
+class Snapshot:
+    """One decoded save file, or several merged into a full one"""
+
+    def __init__(self, kind, sequence, tick, time, seed, player, trees,
+                 removed_trees=None, npcs=None, removed_npcs=None):
+        self.kind = kind
+        self.sequence = sequence
+        self.tick = tick
+        self.time = time
+        self.seed = seed
+        self.player = player
+        self.trees = trees
+        self.removed_trees = removed_trees if removed_trees is not None else np.empty(0, "<u8")
+        self.npcs = npcs if npcs is not None else np.empty(0, NPC_DTYPE)
+        self.removed_npcs = removed_npcs if removed_npcs is not None else np.empty(0, "<i8")
+
+    def sections(self):
+        return {
+            b"PLYR": self.player,
+            b"TREE": self.trees,
+            b"TDEL": self.removed_trees,
+            b"NPCS": self.npcs,
+            b"NDEL": self.removed_npcs,
+        }
+
+    def apply(self, delta):
+        """Fold a later delta into this full snapshot"""
+        self.sequence = delta.sequence
+        self.tick = delta.tick
+        self.time = delta.time
+        self.seed = delta.seed
+        self.player = delta.player
+        self.trees = upsert(self.trees, "key", delta.trees, delta.removed_trees)
+        self.npcs = upsert(self.npcs, "id", delta.npcs, delta.removed_npcs)
+
+
+def upsert(table, field, records, removed):
+    """Replace rows of ``table`` with ``records`` by ``field`` and drop ``removed``"""
+    if len(records) == 0 and len(removed) == 0:
+        return table
+    gone = np.concatenate((records[field], removed)) if len(removed) else records[field]
+    keep = ~np.isin(table[field], gone)
+    return np.concatenate((table[keep], records))
+
+
+def diff(previous, current, field):
+    """(changed or new rows of ``current``, ``field`` values missing from it)"""
+    common, current_index, previous_index = np.intersect1d(
+        current[field], previous[field], assume_unique=True, return_indices=True)
+    changed = np.ones(len(current), dtype=bool)
+    changed[current_index] = current[current_index] != previous[previous_index]
+    removed = np.setdiff1d(previous[field], common, assume_unique=True)
+    return current[changed], removed
+
+
+def encode(snapshot):
+    parts = []
+    sections = snapshot.sections()
+    parts.append(HEADER.pack(MAGIC, VERSION, snapshot.kind, len(sections), snapshot.sequence,
+                             snapshot.tick, snapshot.time, snapshot.seed))
+    for tag, array in sections.items():
+        data = np.ascontiguousarray(array, dtype=SECTIONS[tag]).tobytes()
+        parts.append(SECTION.pack(tag, len(array), len(data)))
+        parts.append(data)
+        parts.append(b"\0" * (-len(data) % ALIGNMENT))
+    return b"".join(parts)
+
+
+def write_file(path, snapshot):
+    """Write atomically, so a crash mid-save never leaves a torn file"""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(encode(snapshot))
+    os.replace(tmp, path)
+
+
+def read_file(path):
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size >= MMAP_THRESHOLD:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            buffer = f.read()
+    return decode(buffer)
+
+
+def decode(buffer):
+    magic, version, kind, count, sequence, tick, time, seed = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError("not a save file")
+    if version != VERSION:
+        raise ValueError(f"unsupported save version {version}")
+    offset = HEADER.size
+    arrays = {}
+    for _ in range(count):
+        tag, length, size = SECTION.unpack_from(buffer, offset)
+        offset += SECTION.size
+        dtype = SECTIONS.get(tag)
+        if dtype is not None:
+            # A view straight onto the file; nothing is copied until it is modified
+            arrays[tag] = np.frombuffer(buffer, dtype=dtype, count=length, offset=offset)
+        offset += size + (-size % ALIGNMENT)
+    return Snapshot(kind, sequence, tick, time, seed, arrays[b"PLYR"], arrays[b"TREE"],
+                    arrays.get(b"TDEL"), arrays.get(b"NPCS"), arrays.get(b"NDEL"))
+
+
+def delta_paths(directory):
+    names = [name for name in os.listdir(directory)
+             if name.startswith(DELTA_PREFIX) and name.endswith(SUFFIX)]
+    return [os.path.join(directory, name) for name in sorted(names)]
+
+
+def load(directory):
+    """Merge the base snapshot and every newer delta in ``directory``"""
+    snapshot = read_file(os.path.join(directory, BASE_NAME))
+    for path in delta_paths(directory):
+        delta = read_file(path)
+        if delta.sequence > snapshot.sequence:
+            snapshot.apply(delta)
+    return snapshot
+
+
+class ChangeTracker:
+    """Trees whose state changed since the last capture; fed by the forest hook.
+
+    ``modified`` holds the keys of generated trees the last capture saved
+    as chopped, so a delta only has to mention a generated tree going back
+    to its default state if it was saved otherwise.
+
+    ``table`` holds a TREE record for every tree a full snapshot saves,
+    rewritten as each one changes, so a full capture copies it instead of
+    walking the forest. ``saved`` lists the tree behind each row.
+    """
+
+    def __init__(self, capacity=256):
+        self.trees = {}
+        self.modified = set()
+        self.table = np.zeros(capacity, dtype=TREE_DTYPE)
+        self.saved = []
+        self.rows = {}
+
+    def tree_changed(self, tree):
+        self.trees[tree] = None
+        row = self.rows.get(tree)
+        if tree.forest is not None and (tree.chunk is None or tree.chopped or tree.chopping):
+            if row is None:
+                row = len(self.saved)
+                if row == len(self.table):
+                    self.table = np.concatenate((self.table, np.zeros(row, dtype=TREE_DTYPE)))
+                self.saved.append(tree)
+                self.rows[tree] = row
+            self.table[row] = tree_record(tree)
+        elif row is not None:
+            # Fill the gap with the last row
+            del self.rows[tree]
+            last = self.saved.pop()
+            if last is not tree:
+                self.saved[row] = last
+                self.rows[last] = row
+                self.table[row] = self.table[len(self.saved)]
+
+    def saved_trees(self):
+        """Records of every tree a full snapshot saves, except evicted stumps; a view"""
+        return self.table[:len(self.saved)]
+
+    def take(self):
+        trees = self.trees
+        self.trees = {}
+        return trees
+
+
+def tree_record(tree):
+    flags = 0
+    due = 0.0
+    if tree.chopped:
+        flags |= CHOPPED
+    elif tree.chopping:
+        flags |= CHOPPING
+    if tree.timer is not None:
+        due = tree.timer.due
+    if tree.chunk is not None:
+        flags |= GENERATED
+    return (0, tree.x, tree.y, flags, due)
+
+
+def capture(simulation, camera=(0.0, 0.0), full=False):
+    """Snapshot the simulation on the calling thread.
+
+    Hand-placed trees are always saved; generated ones only while they
+    differ from what their chunk would generate, i.e. chopped or being
+    chopped. A delta only looks at the trees the ChangeTracker reported;
+    a full snapshot copies its table.
+    """
+    player = simulation.player
+    stats = simulation.player_stats
+    player_record = np.array([(player.x, player.y, camera[0], camera[1], stats.health, stats.max_health,
+                               stats.armor, stats.max_armor, stats.wood_count)], dtype=PLAYER_DTYPE)
+
+    changes = simulation.changes
+    changed = changes.take()
+    records = []
+    removed = []
+    if full:
+        for (x, y), due in simulation.world.overrides.items():
+            records.append((0, x, y, CHOPPED | GENERATED, due))
+    else:
+        for tree in changed:
+            key = tree_key(tree.x, tree.y)
+            if tree.chunk is None:
+                if tree.forest is None:
+                    removed.append(key)
+                else:
+                    records.append(tree_record(tree))
+            elif tree.forest is None:
+                # Evicted; a stump lives on in the world's overrides
+                continue
+            elif tree.chopped or tree.chopping:
+                changes.modified.add(key)
+                records.append(tree_record(tree))
+            elif key in changes.modified:
+                changes.modified.discard(key)
+                removed.append(key)
+
+    store = simulation.npcs
+    n = store.count
+    npcs = np.empty(n, dtype=NPC_DTYPE)
+    npcs["id"] = store.ids[:n]
+    npcs["x"] = store.position[:n, 0]
+    npcs["y"] = store.position[:n, 1]
+    npcs["target_x"] = store.target[:n, 0]
+    npcs["target_y"] = store.target[:n, 1]
+    npcs["moving"] = store.moving[:n]
+    npcs["state"] = store.state[:n]
+    state = npcs["state"]
+    busy = np.flatnonzero((state == WALKING) | (state == NPC_CHOPPING))
+    if len(busy):
+        trees = [store.tree[row] for row in busy.tolist()]
+        npcs["target_x"][busy] = [tree.x for tree in trees]
+        npcs["target_y"][busy] = [tree.y for tree in trees]
+    for field in ("speed", "health", "max_health", "armor", "max_armor", "wood"):
+        npcs[field] = getattr(store, field)[:n]
+
+    trees = np.array(records, dtype=TREE_DTYPE)
+    if full:
+        trees = np.concatenate((changes.saved_trees(), trees))
+    trees["key"] = tree_keys(trees["x"], trees["y"])
+    if full:
+        changes.modified = set(trees["key"][(trees["flags"] & GENERATED) != 0].tolist())
+    return Snapshot(FULL if full else DELTA, 0, simulation.tick, simulation.scheduler.time,
+                    simulation.world.seed, player_record, trees, np.array(removed, dtype="<u8"), npcs)
+
+
+def restore(simulation, snapshot):
+    """Replace the simulation's state with a full snapshot; returns the camera position.
+
+    Known limit: hand-placed trees are rebuilt one at a time through the
+    forest, navigation and collision hooks, so 100k of them take seconds.
+    It only runs on an explicit load, never on the frame loop.
+    """
+    simulation.cancel()
+    simulation.world.clear()
+    simulation.woodcutters.clear()
+    for tree in list(simulation.forest):
+        simulation.forest.remove(tree)
+    simulation.scheduler.clear(snapshot.time)
+    simulation.tick = snapshot.tick
+    simulation.accumulator = 0.0
+
+    player = snapshot.player[0]
+    simulation.player.teleport(float(player["x"]), float(player["y"]))
+    stats = simulation.player_stats
+    stats.max_health = float(player["max_health"])
+    stats.health = float(player["health"])
+    stats.max_armor = float(player["max_armor"])
+    stats.armor = float(player["armor"])
+    stats.wood_count = int(player["wood"])
+
+    trees = snapshot.trees
+    generated = (trees["flags"] & GENERATED) != 0
+    world = simulation.world
+    world.seed = int(snapshot.seed)
+    world.overrides = {}
+    for x, y, flags, due in zip(trees["x"][generated].tolist(), trees["y"][generated].tolist(),
+                                trees["flags"][generated].tolist(), trees["due"][generated].tolist()):
+        # A chop in progress stops with nobody there to finish it
+        if flags & CHOPPED:
+            world.overrides[(x, y)] = due
+    manual = trees[~generated]
+    forest = simulation.forest
+    by_key = {}
+    for key, x, y, flags, due in zip(manual["key"].tolist(), manual["x"].tolist(), manual["y"].tolist(),
+                                     manual["flags"].tolist(), manual["due"].tolist()):
+        tree = Tree(x, y, simulation.scheduler)
+        if flags & (CHOPPED | CHOPPING):
+            # Before it joins the forest, so the hooks only see it once
+            tree.restore(bool(flags & CHOPPED), bool(flags & CHOPPING), due)
+        forest.add(tree)
+        by_key[key] = tree
+
+    npcs = snapshot.npcs
+    if len(npcs):
+        store = simulation.npcs
+        store.spawn(np.column_stack((npcs["x"], npcs["y"])))
+        n = len(npcs)
+        store.ids[:n] = npcs["id"]
+        store.rows = dict(zip(npcs["id"].tolist(), range(n)))
+        store.next_id = int(npcs["id"].max()) + 1
+        store.target[:n, 0] = npcs["target_x"]
+        store.target[:n, 1] = npcs["target_y"]
+        store.moving[:n] = npcs["moving"]
+        # Plans in flight are lost; those NPCs ask again
+        store.state[:n] = np.where(npcs["state"] == PLANNING, IDLE, npcs["state"])
+        for field in ("speed", "health", "max_health", "armor", "max_armor", "wood"):
+            getattr(store, field)[:n] = npcs[field]
+        simulation.woodcutters.resume(lambda x, y: by_key.get(tree_key(x, y)))
+
+    simulation.changes.take()
+    chopped = (trees["flags"] & CHOPPED) != 0
+    simulation.changes.modified = set(trees["key"][generated & chopped].tolist())
+    return float(player["camera_x"]), float(player["camera_y"])
+
+
+class SaveError(Exception):
+    """A snapshot the SaveWriter failed to write; the cause is chained"""
+
+
+class SaveWriter:
+    """Background thread that diffs, encodes and writes captured snapshots.
+
+    It keeps the merged state of everything written so far, so after
+    ``compact_every`` deltas it can write a fresh base and delete the chain
+    without asking the frame thread for anything. The first write that
+    fails is kept and raised as a SaveError from ``flush``, ``close`` or
+    ``check``.
+    """
+
+    def __init__(self, directory, compact_every=COMPACT_EVERY):
+        self.directory = directory
+        self.compact_every = compact_every
+        self.state = None
+        self.sequence = 0
+        self.deltas = 0
+        self.error = None
+        self.error_lock = threading.Lock()
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="save-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, snapshot):
+        self.queue.put(snapshot)
+
+    def flush(self):
+        """Block until everything submitted so far is on disk"""
+        self.queue.join()
+        self.check()
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        self.check()
+
+    def take_error(self):
+        """A SaveError for the first write that failed since the last call, or None"""
+        with self.error_lock:
+            cause, self.error = self.error, None
+        if cause is None:
+            return None
+        error = SaveError(f"saving to {self.directory} failed: {cause}")
+        error.__cause__ = cause
+        return error
+
+    def check(self):
+        error = self.take_error()
+        if error is not None:
+            raise error
+
+    def _run(self):
+        while True:
+            snapshot = self.queue.get()
+            try:
+                if snapshot is None:
+                    return
+                self.write(snapshot)
+            except Exception as error:
+                # Kept for the caller; the thread carries on so flush() can't hang
+                with self.error_lock:
+                    if self.error is None:
+                        self.error = error
+            finally:
+                self.queue.task_done()
+
+    def write(self, snapshot):
+        os.makedirs(self.directory, exist_ok=True)
+        self.sequence += 1
+        snapshot.sequence = self.sequence
+        if snapshot.kind == FULL or self.state is None:
+            snapshot.kind = FULL
+            self.state = snapshot
+            self._write_base()
+            return
+
+        # Only the NPC rows that differ from the last write go into the delta
+        snapshot.npcs, snapshot.removed_npcs = diff(self.state.npcs, snapshot.npcs, "id")
+        self.state.apply(snapshot)
+        write_file(os.path.join(self.directory, f"{DELTA_PREFIX}{self.sequence:08d}{SUFFIX}"), snapshot)
+        self.deltas += 1
+        if self.deltas >= self.compact_every:
+            self._write_base()
+
+    def _write_base(self):
+        self.state.kind = FULL
+        self.state.sequence = self.sequence
+        write_file(os.path.join(self.directory, BASE_NAME), self.state)
+        for path in delta_paths(self.directory):
+            os.remove(path)
+        self.deltas = 0
+
+
+class Autosave:
+    """Periodic delta saves of a simulation through a SaveWriter.
+
+    A failed write is reported on the next ``save``, ``load`` or ``close``
+    by calling ``on_error`` with a SaveError, or by raising it when that is
+    unset. The next save after a failure is a full one, since the delta
+    chain on disk is missing whatever failed to write.
+    """
+
+    def __init__(self, simulation, directory, interval=AUTOSAVE_INTERVAL):
+        self.simulation = simulation
+        self.writer = SaveWriter(directory)
+        self.interval = interval
+        self.since_save = 0.0
+        self.saved_full = False
+        self.on_error = None
+
+    def update(self, delta_time, camera):
+        self.since_save += delta_time
+        if self.since_save >= self.interval:
+            self.save(camera)
+
+    def save(self, camera, full=False):
+        failed = self.writer.take_error()
+        # The writer needs one full snapshot before deltas mean anything
+        full = full or failed is not None or not self.saved_full
+        self.writer.submit(capture(self.simulation, camera, full))
+        self.saved_full = True
+        self.since_save = 0.0
+        if failed is not None:
+            self._report(failed)
+
+    def load(self):
+        try:
+            self.writer.flush()
+        except SaveError as error:
+            # Whatever did reach the disk still loads
+            self._report(error)
+        camera = restore(self.simulation, load(self.writer.directory))
+        # Start a new chain from the restored state
+        self.saved_full = False
+        return camera
+
+    def close(self):
+        try:
+            self.writer.close()
+        except SaveError as error:
+            self._report(error)
+
+    def _report(self, error):
+        if self.on_error is None:
+            raise error
+        self.on_error(error)
@@ -0,0 +1,71 @@
+import heapq
+import itertools
+
+
+class Timer:
+    """Handle for a scheduled callback; cancelling is O(1) and lazy"""
+
+    __slots__ = ("due", "callback", "args", "cancelled")
+
+    def __init__(self, due, callback, args):
+        self.due = due
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class Scheduler:
+    """Simulation clock with a min-heap of timed callbacks.
+
+    The clock only moves when ``advance`` is called, scaled by ``time_scale``
+    and frozen while ``paused``, so anything timed against it pauses and
+    speeds up with the game. Nothing is polled per frame: the heap is only
+    touched when the earliest timer is due.
+    """
+
+    def __init__(self):
+        self.time = 0.0
+        self.time_scale = 1.0
+        self.paused = False
+        self._queue = []
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._queue)
+
+    def advance(self, delta_time):
+        """Move the clock forward, fire due timers and return the scaled delta"""
+        if self.paused:
+            return 0.0
+        delta_time *= self.time_scale
+        self.time += delta_time
+
+        queue = self._queue
+        while queue and queue[0][0] <= self.time:
+            _, _, timer = heapq.heappop(queue)
+            if not timer.cancelled:
+                timer.callback(*timer.args)
+        return delta_time
+
+    def schedule(self, delay, callback, *args):
+        return self.schedule_at(self.time + delay, callback, *args)
+
+    def schedule_at(self, due, callback, *args):
+        timer = Timer(due, callback, args)
+        heapq.heappush(self._queue, (due, next(self._counter), timer))
+        return timer
+
+    def clear(self, time=0.0):
+        """Drop every pending timer and set the clock"""
+        self._queue.clear()
+        self.time = time
+
+    def next_due(self):
+        """Time of the earliest pending timer, or None"""
+        queue = self._queue
+        while queue and queue[0][2].cancelled:
+            heapq.heappop(queue)
+        return queue[0][0] if queue else None
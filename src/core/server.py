@@ -0,0 +1,350 @@
+"""Authoritative multiplayer server: one Simulation, many remote players.
+
+Each connection gets an Avatar in the shared simulation. Its commands are
+queued as they arrive and applied at the start of the next server tick,
+then the simulation advances and every client is sent a snapshot of the
+avatars, NPCs and trees around its own avatar (see core.net for the wire
+format). Snapshots are deltas against what that client was sent last.
+
+Avatars and NPCs are filtered by distance, trees by TREE_CELL cells so a
+cell's records can be cached and shared between clients until one of its
+trees changes. Which moving entities changed is worked out once per tick
+in a Feed, so a client's delta is a few boolean operations over rows. A
+client whose socket is backed up skips snapshots until it drains; its
+next one resends everything in view.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+
+import numpy as np
+
+from core import net
+from core.commands import CHOP, CLICK, DAMAGE, HEAL, MOVE, PLAYER_COMMANDS, REPAIR, perform
+from core.savegame import tree_key, tree_keys
+
+SERVER_RATE = 20
+INTEREST_RADIUS = 1024
+# Commands that change stats are clamped to this much per command
+MAX_STAT_CHANGE = 20
+# ...and world coordinates to this far from the origin either way
+MAX_COORDINATE = 1_000_000
+# Commands kept per client per tick; the rest are dropped and counted as rejected
+MAX_COMMANDS = 8
+# Skip a client's snapshot while this much is still queued for it
+MAX_BUFFERED = 256 * 1024
+SPAWN_SPREAD = 200
+TICK_HISTORY = 600
+
+
+def tree_flags(tree):
+    return (net.CHOPPED if tree.chopped else 0) | (net.CHOPPING if tree.chopping else 0)
+
+
+def cell_of(x, y):
+    return math.floor(x / net.TREE_CELL), math.floor(y / net.TREE_CELL)
+
+
+class Interest:
+    """Which rows of a Feed one client was sent last tick, and their ids"""
+
+    def __init__(self):
+        self.mask = None
+        self.ids = np.empty(0, "<u4")
+        self.layout = -1
+
+
+class Feed:
+    """This tick's records of one kind of entity, and which rows changed since the last.
+
+    ``layout`` moves whenever entities come or go; a client's Interest from
+    an older layout (or one that missed a snapshot) is brought up to date by
+    comparing ids instead of rows.
+    """
+
+    def __init__(self, dtype):
+        self.records = np.empty(0, dtype)
+        self.changed = np.empty(0, bool)
+        self.layout = 0
+        self.x = self.y = None
+
+    def near(self, x, y, radius):
+        """Rows within ``radius`` of (x, y); needs records with positions"""
+        if self.x is None:
+            # Contiguous copies; distance tests on the record fields are strided
+            self.x = np.ascontiguousarray(self.records["x"])
+            self.y = np.ascontiguousarray(self.records["y"])
+        dx = self.x - x
+        dy = self.y - y
+        return dx * dx + dy * dy <= radius * radius
+
+    def update(self, records):
+        previous = self.records
+        if len(previous) == len(records) and np.array_equal(previous["id"], records["id"]):
+            self.changed = previous != records
+        else:
+            self.layout += 1
+        self.records = records
+        self.x = self.y = None
+
+    def delta(self, interest, near):
+        """(records to send, ids that left) for a client that now sees rows ``near``"""
+        records = self.records
+        ids = records["id"]
+        if interest.layout == self.layout:
+            send = near & (~interest.mask | self.changed)
+            removed = ids[interest.mask & ~near]
+        else:
+            send = near
+            removed = np.setdiff1d(interest.ids, ids[near], assume_unique=True)
+        interest.mask = near
+        interest.ids = ids[near]
+        interest.layout = self.layout
+        return records[send], removed.astype("<u4")
+
+
+class Session:
+    """One connected client: its avatar, command queue and what it was last sent"""
+
+    def __init__(self, avatar_id, avatar, writer):
+        self.id = avatar_id
+        self.avatar = avatar
+        self.writer = writer
+        self.commands = []
+        self.cells = set()
+        self.avatars = Interest()
+        self.stats = Interest()
+        self.npcs = Interest()
+        self.bytes_sent = 0
+        self.skipped = 0
+        self.rejected = 0
+
+    def resync(self):
+        """Forget what was sent, so the next snapshot resends everything in view"""
+        self.avatars.layout = self.stats.layout = self.npcs.layout = -1
+        # Tree changes in the skipped snapshots were never sent either
+        self.cells = set()
+
+
+class GameServer:
+    """Runs ``simulation`` at SERVER_RATE ticks per second for whoever connects.
+
+    ``start`` opens the listening socket and ``run`` ticks until cancelled
+    or, given ``duration``, for that many seconds. ``tick`` does one tick
+    without any networking wait, which is what the benchmarks time.
+    """
+
+    def __init__(self, simulation, rate=SERVER_RATE, interest_radius=INTEREST_RADIUS, seed=None):
+        self.simulation = simulation
+        self.rate = rate
+        self.interest_radius = interest_radius
+        self.sessions = {}
+        self.next_id = 1
+        self.rng = np.random.default_rng(seed)
+        self.server = None
+        self.tick_count = 0
+        self.tick_times = deque(maxlen=TICK_HISTORY)
+        self.bytes_sent = 0
+        self.cell_records = {}
+        self.changed_trees = {}
+        self.avatar_feed = Feed(net.AVATAR_DTYPE)
+        self.stats_feed = Feed(net.STATS_DTYPE)
+        self.npc_feed = Feed(net.NPC_DTYPE)
+        simulation.on_tree_changed = self._tree_changed
+        # Remote players make their own splashes
+        simulation.particle_manager.max_particles = 0
+
+    async def start(self, host="127.0.0.1", port=0):
+        self.server = await asyncio.start_server(self._serve, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def run(self, duration=None):
+        loop = asyncio.get_running_loop()
+        interval = 1 / self.rate
+        end = None if duration is None else loop.time() + duration
+        next_tick = loop.time()
+        while end is None or next_tick < end:
+            self.tick()
+            next_tick += interval
+            delay = next_tick - loop.time()
+            if delay < -interval:
+                # Too far behind to catch up; drop the missed ticks
+                next_tick = loop.time()
+            await asyncio.sleep(max(0.0, delay))
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for session in list(self.sessions.values()):
+            session.writer.close()
+
+    def connect(self, writer):
+        """Give a new client an avatar near the spawn point"""
+        spawn_x, spawn_y = self.simulation.spawn
+        dx, dy = self.rng.uniform(-SPAWN_SPREAD, SPAWN_SPREAD, 2).tolist()
+        avatar = self.simulation.add_avatar(spawn_x + dx, spawn_y + dy)
+        session = Session(self.next_id, avatar, writer)
+        self.next_id += 1
+        self.sessions[session.id] = session
+        return session
+
+    def disconnect(self, session):
+        if self.sessions.pop(session.id, None) is not None:
+            self.simulation.remove_avatar(session.avatar)
+
+    async def _serve(self, reader, writer):
+        session = self.connect(writer)
+        player = session.avatar.player
+        writer.write(net.hello(session.id, self.simulation.tick, self.simulation.world.seed,
+                               player.x, player.y))
+        try:
+            while True:
+                kind, body = await net.read_frame(reader)
+                if kind != net.COMMAND:
+                    break
+                code, *args = net.COMMAND_BODY.unpack(body)
+                if len(session.commands) >= MAX_COMMANDS:
+                    # A flood must not stretch the tick for everyone else
+                    session.rejected += 1
+                elif code in PLAYER_COMMANDS and all(math.isfinite(arg) for arg in args):
+                    session.commands.append((code, *args))
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError, asyncio.CancelledError):
+            # Cancelled only when the server shuts down
+            pass
+        finally:
+            self.disconnect(session)
+            writer.close()
+
+    def tick(self):
+        start = time.perf_counter()
+        simulation = self.simulation
+        for session in self.sessions.values():
+            for code, a, b, c, d in session.commands:
+                if code in (HEAL, DAMAGE, REPAIR):
+                    a = min(max(a, 0.0), MAX_STAT_CHANGE)
+                elif code in (CLICK, MOVE, CHOP):
+                    a = min(max(a, -MAX_COORDINATE), MAX_COORDINATE)
+                    b = min(max(b, -MAX_COORDINATE), MAX_COORDINATE)
+                try:
+                    perform(simulation, code, a, b, c, d, avatar=session.avatar)
+                except Exception:
+                    # One client's bad command must not stop the tick for everyone
+                    session.rejected += 1
+            session.commands.clear()
+        simulation.update(1 / self.rate)
+        self.broadcast()
+        self.tick_count += 1
+        self.tick_times.append(time.perf_counter() - start)
+
+    def _tree_changed(self, tree):
+        self.changed_trees[tree] = None
+        self.cell_records.pop(cell_of(tree.x, tree.y), None)
+
+    def _cell(self, cell):
+        """TREE records of every tree standing in ``cell``, cached until one changes"""
+        records = self.cell_records.get(cell)
+        if records is None:
+            size = net.TREE_CELL
+            left, bottom = cell[0] * size, cell[1] * size
+            trees = [tree for tree in self.simulation.forest.trees_in_rect(left, bottom, left + size, bottom + size)
+                     if cell_of(tree.x, tree.y) == cell]
+            records = np.empty(len(trees), net.TREE_DTYPE)
+            records["key"] = tree_keys([tree.x for tree in trees], [tree.y for tree in trees])
+            records["flags"] = [tree_flags(tree) for tree in trees]
+            self.cell_records[cell] = records
+        return records
+
+    def _changes(self):
+        """(TREE records, their cells, removed keys, their cells) for the trees changed this tick"""
+        standing = [tree for tree in self.changed_trees if tree.forest is not None]
+        removed = [tree for tree in self.changed_trees if tree.forest is None]
+        self.changed_trees = {}
+        records = np.empty(len(standing), net.TREE_DTYPE)
+        records["key"] = [tree_key(tree.x, tree.y) for tree in standing]
+        records["flags"] = [tree_flags(tree) for tree in standing]
+        cells = [cell_of(tree.x, tree.y) for tree in standing]
+        removed_keys = np.array([tree_key(tree.x, tree.y) for tree in removed], dtype="<u8")
+        removed_cells = [cell_of(tree.x, tree.y) for tree in removed]
+        return records, cells, removed_keys, removed_cells
+
+    def _update_avatars(self):
+        sessions = list(self.sessions.values())
+        ids = [session.id for session in sessions]
+        positions = np.empty(len(sessions), net.AVATAR_DTYPE)
+        positions["id"] = ids
+        positions["x"] = [session.avatar.player.x for session in sessions]
+        positions["y"] = [session.avatar.player.y for session in sessions]
+        self.avatar_feed.update(positions)
+        stats = np.empty(len(sessions), net.STATS_DTYPE)
+        stats["id"] = ids
+        stats["health"] = [session.avatar.stats.health for session in sessions]
+        stats["armor"] = [session.avatar.stats.armor for session in sessions]
+        stats["wood"] = [session.avatar.stats.wood_count for session in sessions]
+        self.stats_feed.update(stats)
+
+    def _npc_records(self):
+        store = self.simulation.npcs
+        n = store.count
+        records = np.empty(n, net.NPC_DTYPE)
+        records["id"] = store.ids[:n]
+        records["x"] = store.position[:n, 0]
+        records["y"] = store.position[:n, 1]
+        records["state"] = store.state[:n]
+        return records
+
+    def broadcast(self):
+        tree_records, tree_cells, removed_keys, removed_cells = self._changes()
+        self._update_avatars()
+        self.npc_feed.update(self._npc_records())
+        if not self.sessions:
+            return
+        radius = self.interest_radius
+        for session in self.sessions.values():
+            if session.writer.transport.get_write_buffer_size() > MAX_BUFFERED:
+                session.skipped += 1
+                session.resync()
+                continue
+            player = session.avatar.player
+            x, y = player.x, player.y
+
+            near = self.avatar_feed.near(x, y, radius)
+            changed_avatars, gone_avatars = self.avatar_feed.delta(session.avatars, near)
+            changed_stats, gone_stats = self.stats_feed.delta(session.stats, near)
+            near = self.npc_feed.near(x, y, radius)
+            changed_npcs, gone_npcs = self.npc_feed.delta(session.npcs, near)
+
+            min_x, min_y = cell_of(x - radius, y - radius)
+            max_x, max_y = cell_of(x + radius, y + radius)
+            wanted = {(cx, cy) for cx in range(min_x, max_x + 1) for cy in range(min_y, max_y + 1)}
+            kept = session.cells & wanted
+            entered = wanted - kept
+            left = session.cells - kept
+            trees = [self._cell(cell) for cell in entered]
+            if len(tree_records):
+                trees.append(tree_records[[cell in kept for cell in tree_cells]])
+            removed = removed_keys[[cell in kept for cell in removed_cells]] if len(removed_keys) else removed_keys
+            session.cells = wanted
+
+            message = net.snapshot(self.simulation.tick, {
+                b"AVTR": changed_avatars,
+                b"ADEL": gone_avatars,
+                b"STAT": changed_stats,
+                b"SDEL": gone_stats,
+                b"NPCS": changed_npcs,
+                b"NDEL": gone_npcs,
+                b"TREE": np.concatenate(trees) if trees else tree_records[:0],
+                b"TDEL": removed,
+                b"CELL": np.array(sorted(left), dtype=net.CELL_DTYPE),
+            })
+            session.writer.write(message)
+            session.bytes_sent += len(message)
+            self.bytes_sent += len(message)
+
+    def stats(self):
+        """(ticks run, mean tick ms, p95 tick ms, total bytes sent)"""
+        times = np.array(self.tick_times) * 1000
+        if times.size == 0:
+            return self.tick_count, 0.0, 0.0, self.bytes_sent
+        return self.tick_count, float(times.mean()), float(np.percentile(times, 95)), self.bytes_sent
@@ -0,0 +1,205 @@
+import random
+from core.avatar import Avatar
+from core.collision import Collision
+from core.forest import Forest
+from core.lod import LodScheduler
+from core.navigation import NavGrid
+from core.particle_manager import ParticleManager
+from core.planner import Planner
+from core.profiler import FrameProfiler
+from core.savegame import ChangeTracker
+from core.scheduler import Scheduler
+from core.tree import Tree
+from core.woodcutters import Woodcutters
+from core.world import ChunkManager
+
+SIM_RATE = 60
+SIM_DT = 1 / SIM_RATE
+# Drop accumulated time beyond this many steps so one long hitch can't spiral
+MAX_STEPS_PER_UPDATE = 8
+
+WOOD_PER_TREE = 3
+# No generated trees this close to the spawn point
+SPAWN_CLEARING = 150
+
+
+class Simulation:
+    """Game state and rules, advanced in fixed SIM_DT ticks.
+
+    Nothing here touches arcade or a GL context, so it runs headless. Call
+    ``update`` with the real frame time; it runs as many whole ticks as the
+    accumulator allows and leaves ``alpha``, the fraction of a tick left
+    over, for the renderer to interpolate with. Commands (``click``,
+    ``cancel``, the stat mutators on ``player_stats``) only change state and
+    take effect on the next tick.
+
+    The local player is ``avatar``; ``player``, ``player_stats`` and the
+    command methods here are shortcuts to it. ``add_avatar`` puts more
+    players in the same world, e.g. for core.server.
+
+    ``world`` streams procedurally generated chunks into the forest; it
+    only does so when its ``update`` is called with a view rectangle.
+    ``use_planner`` moves NPC decisions onto ``plan_executor``, or plans
+    inline without one; either way the NPCs act the same. ``lod`` updates
+    NPCs far from every player and the streamed view less often.
+    ``use_collision`` keeps NPCs and players out of trunks and each other.
+    """
+
+    def __init__(self, spawn_x, spawn_y, seed=None, executor=None, plan_executor=None):
+        self.spawn = (spawn_x, spawn_y)
+        self.scheduler = Scheduler()
+        self.forest = Forest(self.scheduler)
+        self.forest.on_tree_chopped = self.on_tree_chopped
+        self.navigation = NavGrid()
+        # Trees changed since the last save, for delta snapshots
+        self.changes = ChangeTracker()
+        # Extra listener for tree changes, e.g. the minimap
+        self.on_tree_changed = None
+        self.forest.on_tree_changed = self._tree_changed
+        self.particle_manager = ParticleManager(seed=seed)
+        # Tree -> the avatar chopping it, shared by every avatar
+        self.choppers = {}
+        self.avatar = Avatar(spawn_x, spawn_y, self.forest, self.navigation,
+                             self.particle_manager, self.choppers)
+        self.avatars = [self.avatar]
+        self.player = self.avatar.player
+        self.player_stats = self.avatar.stats
+        self.woodcutters = Woodcutters(self.forest, seed=seed, wood_per_tree=WOOD_PER_TREE)
+        self.npcs = self.woodcutters.store
+        self.woodcutters.focus = self.player
+        self.lod = LodScheduler()
+        self.woodcutters.lod = self.lod
+        self.plan_executor = plan_executor
+        self.collision = None
+        self.profiler = FrameProfiler()
+        world_seed = seed if seed is not None else random.getrandbits(32)
+        self.world = ChunkManager(self.forest, world_seed, executor,
+                                  clearings=[(spawn_x, spawn_y, SPAWN_CLEARING)])
+
+        self.tick = 0
+        self.accumulator = 0.0
+        self.alpha = 0.0
+        self.paused = False
+        self.time_scale = 1.0
+
+    @property
+    def is_chopping(self):
+        return self.avatar.is_chopping
+
+    @property
+    def target_position(self):
+        return self.avatar.target_position
+
+    @property
+    def chop_tree(self):
+        return self.avatar.chop_tree
+
+    @property
+    def path(self):
+        return self.avatar.path
+
+    def add_avatar(self, x, y):
+        """Another player in this world; splashes are left to its own client"""
+        avatar = Avatar(x, y, self.forest, self.navigation, choppers=self.choppers)
+        self.avatars.append(avatar)
+        return avatar
+
+    def remove_avatar(self, avatar):
+        avatar.cancel()
+        self.avatars.remove(avatar)
+
+    def add_tree(self, x, y):
+        tree = Tree(x, y)
+        self.forest.add(tree)
+        return tree
+
+    def use_planner(self, routes=False):
+        """Let a core.planner.Planner choose trees for idle NPCs, and their routes if ``routes``"""
+        if self.woodcutters.planner is None:
+            navigation = self.navigation if routes else None
+            self.woodcutters.planner = Planner(self.forest, navigation, self.plan_executor)
+        return self.woodcutters.planner
+
+    def use_collision(self):
+        """Push bodies out of trunks and apart after they move, from the next tick on"""
+        if self.collision is None:
+            self.collision = Collision()
+            for tree in self.forest:
+                self.collision.tree_changed(tree)
+        return self.collision
+
+    def apply_quality(self, level):
+        """Take the particle and NPC settings of a core.quality.QualityLevel"""
+        self.particle_manager.max_particles = level.particle_cap
+        self.particle_manager.splash_scale = level.splash_scale
+        self.woodcutters.far_interval = level.far_interval
+        self.woodcutters.far_radius = level.far_radius
+
+    def reset(self):
+        self.player.teleport(*self.spawn)
+        self.avatar.cancel()
+
+    def update(self, delta_time):
+        """Advance by real frame time; returns the number of ticks run"""
+        if self.paused:
+            return 0
+        self.accumulator += delta_time * self.time_scale
+        steps = 0
+        while self.accumulator >= SIM_DT and steps < MAX_STEPS_PER_UPDATE:
+            self.step()
+            self.accumulator -= SIM_DT
+            steps += 1
+        if steps == MAX_STEPS_PER_UPDATE:
+            self.accumulator = min(self.accumulator, SIM_DT)
+        self.alpha = self.accumulator / SIM_DT
+        return steps
+
+    def step(self):
+        """Run exactly one fixed tick"""
+        profiler = self.profiler
+        with profiler.stage("sim.timers"):
+            self.scheduler.advance(SIM_DT)
+        with profiler.stage("sim.particles"):
+            self.particle_manager.update()
+        with profiler.stage("sim.movement"):
+            for avatar in self.avatars:
+                avatar.update(SIM_DT)
+        with profiler.stage("sim.npcs"):
+            self.woodcutters.lod_points = self.lod_points()
+            self.woodcutters.update(SIM_DT)
+            self.woodcutters.remove_dead()
+        if self.collision is not None:
+            with profiler.stage("sim.collision"):
+                self.collision.resolve(self.npcs, self.avatars)
+        self.tick += 1
+
+    def lod_points(self):
+        """Where LOD distances are measured from: every player and the middle of the streamed view"""
+        points = [(avatar.player.x, avatar.player.y) for avatar in self.avatars]
+        if self.world.center is not None:
+            points.append(self.world.center)
+        return points
+
+    def _tree_changed(self, tree):
+        self.navigation.tree_changed(tree)
+        self.changes.tree_changed(tree)
+        if self.collision is not None:
+            self.collision.tree_changed(tree)
+        if self.on_tree_changed is not None:
+            self.on_tree_changed(tree)
+
+    def on_tree_chopped(self, tree):
+        if not self.woodcutters.tree_chopped(tree):
+            # Nobody on record, e.g. a chop restored from a save: the local player
+            self.choppers.get(tree, self.avatar).stats.add_wood(WOOD_PER_TREE)
+
+    def click(self, world_x, world_y):
+        """Left click in world space: toggle chopping a tree or walk there"""
+        self.avatar.click(world_x, world_y)
+
+    def cancel(self):
+        self.avatar.cancel()
+
+    def stop_chopping(self):
+        """Cancel the current chop, if any"""
+        self.avatar.stop_chopping()
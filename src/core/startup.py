@@ -0,0 +1,106 @@
+import importlib
+import threading
+import time
+
+from core.assets import MANIFEST, AssetCache
+
+
+class StartupTimer:
+    """Start and end of each named startup phase, relative to ``origin``.
+
+    Phases may overlap and may run on other threads; ``report`` lists them
+    in the order they started.
+    """
+
+    def __init__(self, origin=None):
+        self.origin = origin if origin is not None else time.perf_counter()
+        self.phases = []
+        self.last = self.origin
+
+    def record(self, name, start, end):
+        self.phases.append((name, start - self.origin, end - start))
+
+    def mark(self, name):
+        """End a main-thread phase that began where the previous mark left off"""
+        now = time.perf_counter()
+        self.record(name, self.last, now)
+        self.last = now
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def report(self):
+        lines = [f"{'phase':<28}{'start ms':>10}{'took ms':>10}"]
+        for name, start, duration in sorted(self.phases, key=lambda phase: phase[1]):
+            lines.append(f"{name:<28}{start * 1000:>10.1f}{duration * 1000:>10.1f}")
+        lines.append(f"{'total':<28}{'':>10}{(time.perf_counter() - self.origin) * 1000:>10.1f}")
+        return "\n".join(lines)
+
+
+class _Phase:
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.timer.record(self.name, self.start, time.perf_counter())
+        return False
+
+
+class Preloader:
+    """Imports game modules and decodes the asset manifest on a background thread.
+
+    The main thread keeps drawing a loading screen and polls ``progress``;
+    once ``done`` it calls ``textures`` to wrap the decoded images. Any
+    error on the thread is re-raised there rather than lost.
+    """
+
+    def __init__(self, modules=(), manifest=MANIFEST, cache=None, timer=None):
+        self.modules = list(modules)
+        self.manifest = dict(manifest)
+        self.cache = cache if cache is not None else AssetCache()
+        self.timer = timer if timer is not None else StartupTimer()
+        self.images = {}
+        self.loaded = 0
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name="preload", daemon=True)
+
+    @property
+    def total(self):
+        return len(self.modules) + len(self.manifest)
+
+    @property
+    def progress(self):
+        return self.loaded / self.total if self.total else 1.0
+
+    @property
+    def done(self):
+        return not self.thread.is_alive() and self.thread.ident is not None
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def _run(self):
+        try:
+            with self.timer.phase("preload.imports"):
+                for module in self.modules:
+                    importlib.import_module(module)
+                    self.loaded += 1
+            with self.timer.phase("preload.assets"):
+                for name, path in self.manifest.items():
+                    self.images[name] = self.cache.load_image(path)
+                    self.loaded += 1
+        except Exception as error:
+            self.error = error
+
+    def textures(self):
+        """arcade Textures for the manifest; call on the main thread once done"""
+        if self.error is not None:
+            raise self.error
+        import arcade
+        return {name: arcade.Texture(image, hash=f"asset:{name}") for name, image in self.images.items()}
@@ -0,0 +1,79 @@
+import arcade
+from collections import OrderedDict
+
+
+class CachedText:
+    """Text laid out once, with an optional drop shadow drawn underneath"""
+
+    def __init__(self, text, font_size, font_name, bold, anchor_x, anchor_y, shadow_offset):
+        self.shadow_offset = shadow_offset
+        self.label = arcade.Text(text, 0, 0, arcade.color.WHITE, font_size,
+                                 font_name=font_name, bold=bold,
+                                 anchor_x=anchor_x, anchor_y=anchor_y)
+        self.shadow = None
+        if shadow_offset is not None:
+            self.shadow = arcade.Text(text, 0, 0, arcade.color.BLACK, font_size,
+                                      font_name=font_name, bold=bold,
+                                      anchor_x=anchor_x, anchor_y=anchor_y)
+        self.position = None
+        self.color = None
+        self.shadow_color = None
+
+    def draw(self, x, y, color, shadow_color=None):
+        # Moving or recoloring a label only touches its vertex data, not the glyph layout
+        if (x, y) != self.position:
+            self.position = (x, y)
+            self.label.position = (x, y)
+            if self.shadow is not None:
+                dx, dy = self.shadow_offset
+                self.shadow.position = (x + dx, y + dy)
+        if color != self.color:
+            self.color = color
+            self.label.color = color
+        if self.shadow is not None:
+            if shadow_color != self.shadow_color:
+                self.shadow_color = shadow_color
+                self.shadow.color = shadow_color
+            self.shadow.draw()
+        self.label.draw()
+
+
+class TextCache:
+    """LRU cache of laid-out HUD text keyed by content, font, size and style.
+
+    ``misses`` counts glyph layouts; on a frame where no bound value changed
+    it should not move.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text, font_size, font_name="Arial", bold=False,
+            anchor_x="left", anchor_y="baseline", shadow_offset=None):
+        key = (text, font_size, font_name, bold, anchor_x, anchor_y, shadow_offset)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry
+
+        self.misses += 1
+        entry = CachedText(text, font_size, font_name, bold, anchor_x, anchor_y, shadow_offset)
+        self.entries[key] = entry
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return entry
+
+    def draw(self, text, x, y, color, font_size, shadow_color=None, shadow_offset=None, **style):
+        """Drop-in for arcade.draw_text that reuses the cached layout"""
+        self.get(text, font_size, shadow_offset=shadow_offset, **style).draw(x, y, color, shadow_color)
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
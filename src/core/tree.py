@@ -1,78 +1,43 @@
-import arcade
-import time
-
 class Tree:
-    def __init__(self, x, y):
+    """A choppable tree whose chop and regrow timers live on a Scheduler.
+
+    Nothing runs per frame: start_chopping schedules the chop completion,
+    which in turn schedules the regrow, and progress is derived from the
+    scheduler clock when it is drawn. The owning Forest sets ``forest`` and
+    ``scheduler`` when the tree is added. Slotted, since a streamed world
+    holds thousands of them.
+    """
+
+    __slots__ = ("x", "y", "width", "height", "chopping", "chop_duration", "chop_start_time",
+                 "regrow_time", "chopped", "regrow_start_time", "scheduler", "forest", "timer", "chunk")
+
+    def __init__(self, x, y, scheduler=None):
         self.x = x
         self.y = y
         self.width = 40
         self.height = 80
         self.chopping = False
-        self.chop_progress = 0.0
         self.chop_duration = 3.0
-        self.last_update_time = None
+        self.chop_start_time = None
         self.regrow_time = 5.0
         self.chopped = False
         self.regrow_start_time = None
-
-        self.default_cursor = None
-        self.axe_cursor = None
+        self.scheduler = scheduler
+        self.forest = None
+        self.timer = None
+        # Key of the world chunk that generated this tree, if any
+        self.chunk = None
 
     def draw(self):
-        if self.chopped:
-            left = self.x - self.width / 2
-            right = self.x + self.width / 2
-            bottom = self.y - self.height / 4 - self.height / 4
-            top = self.y - self.height / 4 + self.height / 4
-            arcade.draw_lrbt_rectangle_filled(left, right, bottom, top, arcade.color.DARK_BROWN)
-        else:
-            left = self.x - (self.width / 3) / 2
-            right = self.x + (self.width / 3) / 2
-            bottom = self.y - self.height / 2
-            top = self.y + self.height / 2
-            arcade.draw_lrbt_rectangle_filled(left, right, bottom, top, arcade.color.DARK_BROWN)
-            arcade.draw_circle_filled(self.x, self.y + self.height / 2, self.width, arcade.color.DARK_GREEN)
-            arcade.draw_circle_filled(self.x - self.width / 2, self.y + self.height / 3, self.width / 2, arcade.color.DARK_GREEN)
-            arcade.draw_circle_filled(self.x + self.width / 2, self.y + self.height / 3, self.width / 2, arcade.color.DARK_GREEN)
-
-        if self.chopping:
-            bar_width = self.width
-            bar_height = 10
-            bar_x = self.x
-            bar_y = self.y + self.height / 2 + 20
-
-            left = bar_x - bar_width / 2
-            right = bar_x + bar_width / 2
-            bottom = bar_y - bar_height / 2
-            top = bar_y + bar_height / 2
-            arcade.draw_lrbt_rectangle_filled(left, right, bottom, top, arcade.color.GRAY)
-            progress_width = bar_width * (self.chop_progress / self.chop_duration)
-            left = bar_x - bar_width / 2
-            right = left + progress_width
-            arcade.draw_lrbt_rectangle_filled(left, right, bottom, top, arcade.color.GREEN)
-
-    def update(self, delta_time):
-        if self.chopping:
-            if self.last_update_time is None:
-                self.last_update_time = time.time()
-            else:
-                now = time.time()
-                elapsed = now - self.last_update_time
-                self.last_update_time = now
-                self.chop_progress += elapsed
-                if self.chop_progress >= self.chop_duration:
-                    self.chopping = False
-                    self.chopped = True
-                    self.chop_progress = 0.0
-                    self.regrow_start_time = time.time()
-                    return True
+        from core.tree_renderer import draw_tree
+        draw_tree(self)
 
-        if self.chopped and self.regrow_start_time is not None:
-            if time.time() - self.regrow_start_time >= self.regrow_time:
-                self.chopped = False
-                self.regrow_start_time = None
-        
-        return False
+    @property
+    def chop_progress(self):
+        """Seconds of chopping done so far"""
+        if not self.chopping:
+            return 0.0
+        return min(self.chop_duration, self.scheduler.time - self.chop_start_time)
 
     def check_hover(self, x, y):
         left = self.x - self.width / 2
@@ -81,14 +46,61 @@ class Tree:
         top = self.y + self.height / 2
         return left <= x <= right and bottom <= y <= top
 
+    def trunk(self):
+        """(left, bottom, right, top) of the trunk: the lower half of the tree, half as wide"""
+        return (self.x - self.width / 4, self.y - self.height / 2, self.x + self.width / 4, self.y)
+
     def start_chopping(self):
         if not self.chopped and not self.chopping:
             self.chopping = True
-            self.chop_progress = 0.0
-            self.last_update_time = time.time()
+            self.chop_start_time = self.scheduler.time
+            self.timer = self.scheduler.schedule(self.chop_duration, self._finish_chopping)
+            self._changed()
 
     def stop_chopping(self):
+        if self.chopping:
+            self.timer.cancel()
+            self.timer = None
+            self.chopping = False
+            self.chop_start_time = None
+            self._changed()
+
+    def restore(self, chopped, chopping, due):
+        """Resume a saved chop or regrow whose timer fires at ``due`` on the scheduler clock"""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        self.chopped = chopped
+        self.chopping = chopping and not chopped
+        self.chop_start_time = None
+        self.regrow_start_time = None
+        if self.chopped:
+            self.regrow_start_time = due - self.regrow_time
+            self.timer = self.scheduler.schedule_at(due, self._regrow)
+        elif self.chopping:
+            self.chop_start_time = due - self.chop_duration
+            self.timer = self.scheduler.schedule_at(due, self._finish_chopping)
+        self._changed()
+
+    def _changed(self):
+        if self.forest is not None:
+            self.forest.tree_changed(self)
+
+    def _finish_chopping(self):
+        # From when the chop was due, not when the tick got to it, so the
+        # timeline doesn't drift by a tick's overshoot every cycle
+        felled = self.timer.due
         self.chopping = False
-        self.chop_progress = 0.0
-        self.last_update_time = None
+        self.chop_start_time = None
+        self.chopped = True
+        self.regrow_start_time = felled
+        self.timer = self.scheduler.schedule_at(felled + self.regrow_time, self._regrow)
+        if self.forest is not None:
+            self.forest.tree_chopped(self)
 
+    def _regrow(self):
+        self.chopped = False
+        self.regrow_start_time = None
+        self.timer = None
+        if self.forest is not None:
+            self.forest.tree_regrown(self)
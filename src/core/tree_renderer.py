@@ -0,0 +1,204 @@
+import math
+
+import arcade
+
+
+def draw_tree(tree):
+    """Draw a tree, or its stump, plus the chop progress bar"""
+    if tree.chopped:
+        left = tree.x - tree.width / 2
+        right = tree.x + tree.width / 2
+        bottom = tree.y - tree.height / 4 - tree.height / 4
+        top = tree.y - tree.height / 4 + tree.height / 4
+        arcade.draw_lrbt_rectangle_filled(left, right, bottom, top, arcade.color.DARK_BROWN)
+    else:
+        left = tree.x - (tree.width / 3) / 2
+        right = tree.x + (tree.width / 3) / 2
+        bottom = tree.y - tree.height / 2
+        top = tree.y + tree.height / 2
+        arcade.draw_lrbt_rectangle_filled(left, right, bottom, top, arcade.color.DARK_BROWN)
+        arcade.draw_circle_filled(tree.x, tree.y + tree.height / 2, tree.width, arcade.color.DARK_GREEN)
+        arcade.draw_circle_filled(tree.x - tree.width / 2, tree.y + tree.height / 3, tree.width / 2, arcade.color.DARK_GREEN)
+        arcade.draw_circle_filled(tree.x + tree.width / 2, tree.y + tree.height / 3, tree.width / 2, arcade.color.DARK_GREEN)
+
+    if tree.chopping:
+        bar_width = tree.width
+        bar_height = 10
+        bar_x = tree.x
+        bar_y = tree.y + tree.height / 2 + 20
+
+        left = bar_x - bar_width / 2
+        right = bar_x + bar_width / 2
+        bottom = bar_y - bar_height / 2
+        top = bar_y + bar_height / 2
+        arcade.draw_lrbt_rectangle_filled(left, right, bottom, top, arcade.color.GRAY)
+        progress_width = bar_width * (tree.chop_progress / tree.chop_duration)
+        left = bar_x - bar_width / 2
+        right = left + progress_width
+        arcade.draw_lrbt_rectangle_filled(left, right, bottom, top, arcade.color.GREEN)
+
+
+# Chop progress is drawn in this many steps, one pixel each at the default width
+BAR_STEPS = 40
+BAR_HEIGHT = 10
+BAR_GAP = 20
+# Trees are batched into square sprite lists of this size, culled as a whole
+BATCH_SIZE = 1024
+
+
+def tree_images(width, height):
+    """(standing, stump, bars) PIL images matching draw_tree for trees of this size"""
+    from PIL import Image, ImageDraw
+
+    # Standing: canopy circles reach ``width`` past the centre sideways and above the top
+    standing = Image.new("RGBA", (round(2 * width), round(height + width)))
+    draw = ImageDraw.Draw(standing)
+    top = height / 2 + width
+    draw.rectangle((width - width / 6, top - height / 2, width + width / 6, top + height / 2 - 1),
+                   fill=arcade.color.DARK_BROWN)
+    for x, y, radius in ((0, height / 2, width), (-width / 2, height / 3, width / 2),
+                         (width / 2, height / 3, width / 2)):
+        cx, cy = width + x, top - y
+        draw.ellipse((cx - radius, cy - radius, cx + radius - 1, cy + radius - 1),
+                     fill=arcade.color.DARK_GREEN)
+
+    stump = Image.new("RGBA", (round(width), round(height / 2)), arcade.color.DARK_BROWN)
+
+    bars = []
+    for step in range(BAR_STEPS + 1):
+        bar = Image.new("RGBA", (round(width), BAR_HEIGHT), arcade.color.GRAY)
+        filled = round(width * step / BAR_STEPS)
+        if filled:
+            ImageDraw.Draw(bar).rectangle((0, 0, filled - 1, BAR_HEIGHT - 1), fill=arcade.color.GREEN)
+        bars.append(bar)
+    return standing, stump, bars
+
+
+class TreeRenderer:
+    """Draws a forest as sprites from textures baked once per tree size.
+
+    Every tree is a sprite in the sprite list of the BATCH_SIZE square it
+    stands in, and only batches overlapping the view are drawn, one draw
+    call each, top row first so lower trees overlap the ones behind them
+    as in Forest.draw. Sprites only change when ``tree_changed`` reports
+    that their tree did. Progress bars of trees being chopped are batched
+    the same way in lists of their own, drawn over the trees, and only
+    visible ones are stepped each draw.
+    """
+
+    def __init__(self, forest):
+        self.forest = forest
+        self.textures = {}
+        # (batch x, batch y) -> SpriteList, and whether it needs sorting
+        self.batches = {}
+        self.unsorted = set()
+        self.sprites = {}
+        self.bars = {}
+        self.bar_batches = {}
+        for tree in forest:
+            self.tree_changed(tree)
+
+    def _textures(self, tree):
+        key = (tree.width, tree.height)
+        textures = self.textures.get(key)
+        if textures is None:
+            from arcade.hitbox import algo_bounding_box
+
+            standing, stump, bars = tree_images(tree.width, tree.height)
+            name = f"tree:{tree.width}x{tree.height}"
+            textures = (
+                arcade.Texture(standing, hash=f"{name}:standing", hit_box_algorithm=algo_bounding_box),
+                arcade.Texture(stump, hash=f"{name}:stump", hit_box_algorithm=algo_bounding_box),
+                [arcade.Texture(bar, hash=f"{name}:bar:{step}", hit_box_algorithm=algo_bounding_box)
+                 for step, bar in enumerate(bars)],
+            )
+            self.textures[key] = textures
+        return textures
+
+    def batch_of(self, x, y):
+        return (math.floor(x / BATCH_SIZE), math.floor(y / BATCH_SIZE))
+
+    def tree_changed(self, tree):
+        """Forest hook: add, restyle or drop the sprites of ``tree``"""
+        sprite = self.sprites.get(tree)
+        if tree.forest is None:
+            if sprite is not None:
+                del self.sprites[tree]
+                key = self.batch_of(tree.x, tree.y)
+                batch = self.batches[key]
+                batch.remove(sprite)
+                if not batch:
+                    # Streamed-out squares would otherwise keep their lists for good
+                    del self.batches[key]
+                    self.unsorted.discard(key)
+            self._set_bar(tree, False)
+            return
+
+        standing, stump, _ = self._textures(tree)
+        texture = stump if tree.chopped else standing
+        if sprite is None:
+            sprite = arcade.Sprite(texture)
+            # Draw order key; the centre moves with the texture
+            sprite.properties["y"] = tree.y
+            self.sprites[tree] = sprite
+            key = self.batch_of(tree.x, tree.y)
+            batch = self.batches.get(key)
+            if batch is None:
+                batch = self.batches[key] = arcade.SpriteList()
+            batch.append(sprite)
+            self.unsorted.add(key)
+        elif sprite.texture is not texture:
+            sprite.texture = texture
+        # Both textures are laid out around the tree's hit box like draw_tree
+        sprite.center_x = tree.x
+        sprite.center_y = tree.y - tree.height / 4 if tree.chopped else tree.y + tree.width / 2
+        self._set_bar(tree, tree.chopping)
+
+    def _set_bar(self, tree, chopping):
+        bar = self.bars.get(tree)
+        if chopping and bar is None:
+            bar = arcade.Sprite(self._textures(tree)[2][0], center_x=tree.x,
+                                center_y=tree.y + tree.height / 2 + BAR_GAP)
+            bar.properties["tree"] = tree
+            self.bars[tree] = bar
+            key = self.batch_of(tree.x, tree.y)
+            batch = self.bar_batches.get(key)
+            if batch is None:
+                batch = self.bar_batches[key] = arcade.SpriteList()
+            batch.append(bar)
+        elif not chopping and bar is not None:
+            del self.bars[tree]
+            key = self.batch_of(tree.x, tree.y)
+            batch = self.bar_batches[key]
+            batch.remove(bar)
+            if not batch:
+                del self.bar_batches[key]
+
+    def visible_batches(self, bounds):
+        """Keys of the batches overlapping ``bounds`` (l, b, r, t), top row first"""
+        left, bottom, right, top = bounds
+        min_x, min_y = self.batch_of(left, bottom)
+        max_x, max_y = self.batch_of(right, top)
+        return [(bx, by) for by in range(max_y, min_y - 1, -1) for bx in range(min_x, max_x + 1)
+                if (bx, by) in self.batches]
+
+    def draw(self, bounds):
+        """Draw the trees in batches overlapping ``bounds``, then their chop progress bars"""
+        visible = self.visible_batches(bounds)
+        for key in visible:
+            batch = self.batches[key]
+            if key in self.unsorted:
+                self.unsorted.discard(key)
+                batch.sort(key=lambda sprite: -sprite.properties["y"])
+            batch.draw()
+        for key in visible:
+            bars = self.bar_batches.get(key)
+            if not bars:
+                continue
+            for bar in bars:
+                tree = bar.properties["tree"]
+                step = round(tree.chop_progress / tree.chop_duration * BAR_STEPS)
+                texture = self._textures(tree)[2][step]
+                if bar.texture is not texture:
+                    bar.texture = texture
+            bars.draw()
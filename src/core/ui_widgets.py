@@ -0,0 +1,490 @@
+import arcade
+import math
+from array import array
+from arcade.gl import BufferDescription
+from arcade.shape_list import (
+    ShapeElementList,
+    create_ellipse_filled,
+    create_line,
+    create_polygon,
+    create_rectangle_filled,
+    create_rectangle_outline,
+    create_triangles_strip_filled_with_colors,
+)
+
+CIRCLE_SEGMENTS = 32
+GRADIENT_STEPS = 30
+# Without effects the panel gradient is baked in fewer, taller bands
+PLAIN_GRADIENT_STEPS = 6
+# x, y, radius and phase of one glow circle as float32
+CIRCLE_BYTES = 16
+
+GLOW_VERTEX_SHADER = """
+#version 330
+
+in vec2 in_vert;
+in float in_radius;
+in float in_phase;
+
+out float v_radius;
+out float v_phase;
+
+void main() {
+    gl_Position = vec4(in_vert, 0.0, 1.0);
+    v_radius = in_radius;
+    v_phase = in_phase;
+}
+"""
+
+GLOW_GEOMETRY_SHADER = """
+#version 330
+
+uniform WindowBlock {
+    mat4 projection;
+    mat4 view;
+} window;
+
+uniform float time;
+uniform float speed;
+uniform float base;
+uniform float amplitude;
+
+layout (points) in;
+layout (triangle_strip, max_vertices = 4) out;
+
+in float v_radius[];
+in float v_phase[];
+
+out vec2 g_offset;
+out float g_alpha;
+
+void main() {
+    mat4 mvp = window.projection * window.view;
+    vec2 center = gl_in[0].gl_Position.xy;
+    float alpha = clamp(base + amplitude * sin(time * speed + v_phase[0]), 50.0, 255.0) / 255.0;
+
+    for (int i = 0; i < 4; i++) {
+        vec2 corner = vec2(i % 2 == 0 ? -1.0 : 1.0, i < 2 ? -1.0 : 1.0);
+        g_offset = corner;
+        g_alpha = alpha;
+        gl_Position = mvp * vec4(center + corner * v_radius[0], 0.0, 1.0);
+        EmitVertex();
+    }
+    EndPrimitive();
+}
+"""
+
+GLOW_FRAGMENT_SHADER = """
+#version 330
+
+uniform vec3 color;
+
+in vec2 g_offset;
+in float g_alpha;
+
+out vec4 f_color;
+
+void main() {
+    if (dot(g_offset, g_offset) > 1.0) {
+        discard;
+    }
+    f_color = vec4(color, g_alpha);
+}
+"""
+
+
+def lrbt_rectangle(left, right, bottom, top, color):
+    """Shape equivalent of arcade.draw_lrbt_rectangle_filled"""
+    return create_rectangle_filled(
+        (left + right) / 2, (bottom + top) / 2, right - left, top - bottom, color
+    )
+
+
+def circle(x, y, radius, color):
+    return create_ellipse_filled(x, y, radius * 2, radius * 2, color, num_segments=CIRCLE_SEGMENTS)
+
+
+def ring(x, y, width, height, color, border_width):
+    """Thick ellipse outline as a triangle strip, so it batches with the fills"""
+    points = []
+    for segment in range(CIRCLE_SEGMENTS + 1):
+        theta = 2 * math.pi * segment / CIRCLE_SEGMENTS
+        cos_t, sin_t = math.cos(theta), math.sin(theta)
+        points.append((x + (width + border_width) / 2 * cos_t, y + (height + border_width) / 2 * sin_t))
+        points.append((x + (width - border_width) / 2 * cos_t, y + (height - border_width) / 2 * sin_t))
+    return create_triangles_strip_filled_with_colors(points, [color] * len(points))
+
+
+def add_ornate_frame(shapes, x, y, width, height, primary_color, secondary_color):
+    """Bake an ornate RPG-style frame into a shape list"""
+    for i in range(5):
+        alpha = 200 - (i * 30)
+        shapes.append(lrbt_rectangle(
+            x - width/2 + i, x + width/2 - i,
+            y - height/2 + i, y + height/2 - i,
+            (*primary_color[:3], alpha)
+        ))
+
+    shapes.append(create_rectangle_outline(x, y, width, height, secondary_color, 3))
+
+    corner_size = 8
+    corners = [
+        (x - width/2, y - height/2),  # bottom-left
+        (x + width/2, y - height/2),  # bottom-right
+        (x - width/2, y + height/2),  # top-left
+        (x + width/2, y + height/2)   # top-right
+    ]
+
+    for corner_x, corner_y in corners:
+        shapes.append(circle(corner_x, corner_y, corner_size, secondary_color))
+        shapes.append(circle(corner_x, corner_y, corner_size - 2, primary_color))
+
+
+class GlowBatch:
+    """Pulsing circles whose alpha is animated on the GPU from a time uniform.
+
+    One buffer is kept and rewritten on every ``set_circles``; it is only
+    orphaned to a larger size when more circles than ``capacity`` arrive.
+    """
+
+    program = None
+
+    def __init__(self, color, base, amplitude, speed, capacity=16):
+        self.color = color
+        self.base = base
+        self.amplitude = amplitude
+        self.speed = speed
+        self.count = 0
+        self.capacity = capacity
+        self.buffer = None
+        self.geometry = None
+
+    def set_circles(self, circles):
+        """Upload (x, y, radius, phase) tuples; done once per layout change"""
+        ctx = arcade.get_window().ctx
+        if GlowBatch.program is None:
+            GlowBatch.program = ctx.program(
+                vertex_shader=GLOW_VERTEX_SHADER,
+                geometry_shader=GLOW_GEOMETRY_SHADER,
+                fragment_shader=GLOW_FRAGMENT_SHADER,
+            )
+
+        if self.buffer is None:
+            self.buffer = ctx.buffer(reserve=self.capacity * CIRCLE_BYTES)
+            self.geometry = ctx.geometry(
+                [BufferDescription(self.buffer, "2f 1f 1f", ["in_vert", "in_radius", "in_phase"])],
+                mode=ctx.POINTS,
+            )
+        if len(circles) > self.capacity:
+            capacity = self.capacity
+            while capacity < len(circles):
+                capacity *= 2
+            self.buffer.orphan(size=capacity * CIRCLE_BYTES)
+            self.capacity = capacity
+
+        self.count = len(circles)
+        if self.count:
+            self.buffer.write(array("f", [value for c in circles for value in c]))
+
+    def draw(self, animation_time):
+        if self.count == 0:
+            return
+        program = GlowBatch.program
+        program["time"] = animation_time
+        program["speed"] = self.speed
+        program["base"] = self.base
+        program["amplitude"] = self.amplitude
+        program["color"] = tuple(c / 255 for c in self.color[:3])
+        with program.ctx.enabled(program.ctx.BLEND):
+            self.geometry.render(program, vertices=self.count)
+
+
+class Widget:
+    """Retained HUD element.
+
+    Static geometry is baked into a ShapeElementList by ``bake`` and only
+    rebuilt after ``layout`` or when the values returned by ``bind`` change.
+    ``draw_animated`` runs every frame for the parts that move. Text units
+    are fetched from the shared TextCache in ``bake`` as well, so their glyph
+    layout is only redone when a bound value changes. With ``effects`` off
+    a widget skips its decorative passes (glows, shine, separators).
+    """
+
+    def __init__(self, text_cache=None):
+        self.text_cache = text_cache
+        self.shapes = None
+        self.bound = None
+        self.dirty = True
+        self.visible = True
+        self.effects = True
+
+    def layout(self, window_width, window_height):
+        """Recompute position from the window size"""
+        self.dirty = True
+
+    def bind(self):
+        """Values the baked geometry depends on"""
+        return None
+
+    def set_effects(self, effects):
+        if effects != self.effects:
+            self.effects = effects
+            self.dirty = True
+
+    def bake(self, shapes):
+        pass
+
+    def draw_animated(self, animation_time):
+        pass
+
+    def draw(self, animation_time):
+        if not self.visible:
+            return
+        bound = self.bind()
+        if self.dirty or bound != self.bound:
+            self.bound = bound
+            self.shapes = ShapeElementList()
+            self.bake(self.shapes)
+            self.dirty = False
+        self.shapes.draw()
+        self.draw_animated(animation_time)
+
+
+class BackgroundPanel(Widget):
+    """Top gradient panel with the gold border and pulsing diamonds"""
+
+    def __init__(self):
+        super().__init__()
+        self.glows = GlowBatch(arcade.color.GOLD, 100, 50, 3)
+
+    def layout(self, window_width, window_height):
+        super().layout(window_width, window_height)
+        self.window_width = window_width
+        self.window_height = window_height
+        self.panel_height = min(120, window_height * 0.15)
+        self.border_y = window_height - self.panel_height
+
+    def bake(self, shapes):
+        gradient_steps = GRADIENT_STEPS if self.effects else PLAIN_GRADIENT_STEPS
+        step_height = self.panel_height / gradient_steps
+        for i in range(gradient_steps):
+            alpha = max(0, int(140 - (i * 4 * GRADIENT_STEPS / gradient_steps)))
+            y_offset = i * step_height
+
+            color_variation = max(0, int(10 + 10 * math.sin(i * 0.3 * GRADIENT_STEPS / gradient_steps)))
+            shapes.append(lrbt_rectangle(
+                0, self.window_width,
+                self.window_height - y_offset - step_height,
+                self.window_height - y_offset,
+                (color_variation, color_variation, color_variation, alpha)
+            ))
+
+        border_y = self.border_y
+        shapes.append(create_line(0, border_y, self.window_width, border_y, arcade.color.GOLD, 4))
+
+        pattern_spacing = 60
+        size = 6
+        glows = []
+        for i in range(0, self.window_width, pattern_spacing):
+            shapes.append(create_polygon([
+                (i, border_y - size),
+                (i + size, border_y),
+                (i, border_y + size),
+                (i - size, border_y)
+            ], arcade.color.GOLD))
+            glows.append((i, border_y, size + 2, i * 0.1))
+        self.glows.set_circles(glows)
+
+        corner_size = 15
+        corners = [
+            (corner_size, self.window_height - corner_size),
+            (self.window_width - corner_size, self.window_height - corner_size)
+        ]
+
+        for corner_x, corner_y in corners:
+            shapes.append(circle(corner_x, corner_y, corner_size, (*arcade.color.GOLD[:3], 150)))
+            shapes.append(ring(corner_x, corner_y, corner_size * 2, corner_size * 2, arcade.color.GOLD, 3))
+            shapes.append(circle(corner_x, corner_y, corner_size - 5, (101, 67, 33, 180)))
+
+    def draw_animated(self, animation_time):
+        if self.effects:
+            self.glows.draw(animation_time)
+
+
+class WoodCounter(Widget):
+    """Framed log icon with the player's wood count"""
+
+    def __init__(self, player_stats, text_cache):
+        super().__init__(text_cache)
+        self.player_stats = player_stats
+        self.glow = GlowBatch(arcade.color.GOLD, 50, 30, 2)
+
+    def layout(self, window_width, window_height):
+        super().layout(window_width, window_height)
+        padding = 20
+        frame_width = 120
+        frame_height = 60
+
+        self.x = padding + frame_width/2
+        self.y = window_height - padding - frame_height/2
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+
+    def bind(self):
+        return self.player_stats.wood_count
+
+    def bake(self, shapes):
+        x, y = self.x, self.y
+        add_ornate_frame(shapes, x, y, self.frame_width, self.frame_height,
+                         (101, 67, 33), arcade.color.GOLD)
+
+        icon_x = x - 30
+        icon_y = y
+
+        shapes.append(create_ellipse_filled(icon_x, icon_y - 5, 25, 15, arcade.color.DARK_BROWN,
+                                            num_segments=CIRCLE_SEGMENTS))
+        shapes.append(create_ellipse_filled(icon_x, icon_y, 22, 12, arcade.color.BROWN,
+                                            num_segments=CIRCLE_SEGMENTS))
+
+        for i in range(3):
+            ring_color = [arcade.color.DARK_BROWN, arcade.color.BROWN, arcade.color.LIGHT_BROWN][i]
+            shapes.append(ring(icon_x, icon_y, 18 - i*4, 8 - i*2, ring_color, 2))
+
+        self.glow.set_circles([(icon_x, icon_y, 20, 0.0)])
+
+        self.count_text = self.text_cache.get(f"{self.bound}", 20, bold=True, shadow_offset=(2, -2))
+
+    def draw_animated(self, animation_time):
+        if self.effects:
+            self.glow.draw(animation_time)
+
+        self.count_text.draw(self.x + 25, self.y - 8, arcade.color.WHITE, (0, 0, 0, 150))
+
+
+class StatusBar(Widget):
+    """Segmented bar bound to a current/maximum pair of PlayerStats fields"""
+
+    def __init__(self, player_stats, text_cache, field, max_field, label, colors,
+                 bar_height, row_offset, show_segments=True):
+        super().__init__(text_cache)
+        self.player_stats = player_stats
+        self.field = field
+        self.max_field = max_field
+        self.label = label
+        self.colors = colors
+        self.bar_height = bar_height
+        self.row_offset = row_offset
+        self.show_segments = show_segments
+
+    def layout(self, window_width, window_height):
+        super().layout(window_width, window_height)
+        padding = 20
+        self.width = min(180, window_width * 0.15)
+        self.height = self.bar_height
+        self.x = window_width - padding - self.width/2 - 10
+        self.y = window_height - padding - self.row_offset
+
+    def bind(self):
+        return (getattr(self.player_stats, self.field), getattr(self.player_stats, self.max_field))
+
+    def bar_color(self):
+        current, maximum = self.bound
+        percentage = current / maximum if maximum > 0 else 0
+        if percentage > 0.6:
+            return self.colors[0]
+        elif percentage > 0.3:
+            return self.colors[1]
+        return self.colors[2]
+
+    def bake(self, shapes):
+        x, y, width, height = self.x, self.y, self.width, self.height
+        current, maximum = self.bound
+
+        add_ornate_frame(shapes, x, y, width + 20, height + 20,
+                         (20, 20, 20), arcade.color.GOLD)
+
+        shapes.append(lrbt_rectangle(
+            x - width/2, x + width/2,
+            y - height/2, y + height/2,
+            arcade.color.DARK_GRAY
+        ))
+
+        percentage = current / maximum if maximum > 0 else 0
+        fill_width = width * percentage
+        bar_color = self.bar_color()
+
+        if fill_width > 0:
+            segments = int(fill_width / 5) + 1
+            for i in range(segments):
+                segment_x = x - width/2 + i * 5
+                segment_width = min(5, fill_width - i * 5)
+                if segment_width > 0:
+                    alpha = max(128, min(255, int(255 * (0.7 + 0.3 * (i % 2)))))
+                    shapes.append(lrbt_rectangle(
+                        segment_x, segment_x + segment_width,
+                        y - height/2, y + height/2,
+                        (*bar_color[:3], alpha)
+                    ))
+
+        if self.show_segments and self.effects:
+            segment_count = 5 if self.label == "HP" else 3
+            for i in range(1, segment_count):
+                segment_x = x - width/2 + (width / segment_count) * i
+                shapes.append(create_line(
+                    segment_x, y - height/2,
+                    segment_x, y + height/2,
+                    (0, 0, 0, 150), 2
+                ))
+
+        self.label_text = self.text_cache.get(self.label, 16, bold=True, shadow_offset=(1, -1))
+        self.value_text = self.text_cache.get(f"{int(current)}/{maximum}", 12, bold=True,
+                                              anchor_x="center", anchor_y="center",
+                                              shadow_offset=(1, -1))
+
+    def draw_animated(self, animation_time):
+        x, y, width, height = self.x, self.y, self.width, self.height
+
+        shine_pos = (animation_time * 100) % (width + 50) - 25
+        if self.effects and 0 <= shine_pos <= width:
+            arcade.draw_line(
+                x - width/2 + shine_pos, y - height/2,
+                x - width/2 + shine_pos, y + height/2,
+                (255, 255, 255, 100), 3
+            )
+
+        self.label_text.draw(x - width/2 - 40, y - 8, self.bar_color(), (0, 0, 0, 200))
+        self.value_text.draw(x, y - 3, arcade.color.WHITE, (0, 0, 0, 200))
+
+
+class MinimapFrame(Widget):
+    """Frame around the minimap, if there is one; hidden on narrow windows"""
+
+    def __init__(self, text_cache, minimap=None):
+        super().__init__(text_cache)
+        self.minimap = minimap
+
+    def layout(self, window_width, window_height):
+        super().layout(window_width, window_height)
+        self.visible = window_width > 800
+        self.map_size = 120
+        padding = 20
+        self.x = padding + self.map_size/2
+        self.y = padding + self.map_size/2
+
+    def bake(self, shapes):
+        x, y, map_size = self.x, self.y, self.map_size
+        add_ornate_frame(shapes, x, y, map_size + 20, map_size + 20,
+                         (20, 20, 40), arcade.color.GOLD)
+
+        shapes.append(lrbt_rectangle(
+            x - map_size/2, x + map_size/2,
+            y - map_size/2, y + map_size/2,
+            (40, 40, 60, 180)
+        ))
+
+        self.title_text = self.text_cache.get("MAP", 12, bold=True, anchor_x="center")
+
+    def draw_animated(self, animation_time):
+        if self.minimap is not None:
+            self.minimap.draw(self.x - self.map_size/2, self.y - self.map_size/2, self.map_size)
+        self.title_text.draw(self.x, self.y + self.map_size/2 + 15, arcade.color.GOLD)
@@ -0,0 +1,261 @@
+import time
+from collections import deque
+
+import numpy as np
+
+from core.entities import CHOPPING, IDLE, PLANNING, WALKING, WANDERING, EntityStore
+
+# Per-tick budgets for the parts that still run per entity in Python
+DECISIONS_PER_TICK = 32
+# Of which NPCs outside the nearest LOD tier may take
+FAR_DECISIONS_PER_TICK = 8
+CHECKS_PER_TICK = 256
+# Idle NPCs handed to the planner per tick
+PLANS_PER_TICK = 512
+
+SEARCH_RADIUS = 640
+WANDER_RADIUS = 300
+
+
+class Woodcutters:
+    """NPCs that walk to the nearest free tree, chop it and look for another.
+
+    Movement is one vectorized ``EntityStore.move`` per tick. Only arrivals,
+    a budgeted number of idle NPCs choosing a tree and a rotating window of
+    sanity checks touch entities one at a time, so the per-tick cost stays
+    flat as the crowd grows. Each tree is claimed by at most one NPC through
+    Forest.claim, which keeps it out of other NPCs' searches; ``claims``
+    maps it to the entity id.
+
+    Set ``focus`` to anything with ``x`` and ``y`` (the player) and raise
+    ``far_interval`` to let idle NPCs beyond ``far_radius`` of it choose a
+    tree only every that many ticks.
+
+    With a core.planner.Planner in ``planner`` idle NPCs are sent to it in
+    bulk instead and wait in PLANNING until their plan comes back; a plan
+    whose tree was taken in the meantime counts in ``stale_plans`` and the
+    NPC asks again. Planned routes are walked one waypoint at a time.
+
+    With a core.lod.LodScheduler in ``lod`` only the NPCs it finds due are
+    moved and may choose a tree each tick, measured from ``lod_points``,
+    which the owner keeps up to date. Searches for NPCs beyond the near
+    tier are limited to FAR_DECISIONS_PER_TICK.
+    """
+
+    def __init__(self, forest, store=None, seed=None, wood_per_tree=3):
+        self.forest = forest
+        self.store = store if store is not None else EntityStore()
+        self.rng = np.random.default_rng(seed)
+        self.wood_per_tree = wood_per_tree
+        self.claims = {}
+        self.check_cursor = 0
+        self.trees_chopped = 0
+        self.ticks = 0
+        self.focus = None
+        self.far_interval = 1
+        self.far_radius = 1200
+        self.planner = None
+        # Entity id -> waypoints still to walk to its tree
+        self.routes = {}
+        self.stale_plans = 0
+        self.lod = None
+        self.lod_points = None
+
+    def __len__(self):
+        return len(self.store)
+
+    def spawn(self, count, x, y, radius=200):
+        """Scatter ``count`` woodcutters around (x, y); returns their ids"""
+        offsets = self.rng.uniform(-radius, radius, (count, 2))
+        return self.store.spawn(offsets + (x, y))
+
+    def update(self, delta_time):
+        self.ticks += 1
+        store = self.store
+        lod = self.lod
+        due = None
+        if lod is not None and self.lod_points is not None:
+            tiered = lod.update(store, self.ticks, delta_time, self.lod_points)
+            start = time.perf_counter()
+            if tiered is not None:
+                rows, elapsed = tiered
+                due = np.zeros(store.count, dtype=bool)
+                due[rows] = True
+        if due is None:
+            arrived = store.move(delta_time)
+        else:
+            arrived = store.move(elapsed, rows)
+        for row in np.flatnonzero(arrived).tolist():
+            state = store.state[row]
+            if state == WALKING:
+                route = self.routes.get(int(store.ids[row]))
+                if route:
+                    store.set_target(row, *route.popleft())
+                else:
+                    self._arrive(row)
+            elif state == WANDERING:
+                store.state[row] = IDLE
+        self._check()
+        if self.planner is not None:
+            self._collect()
+        self._decide(due)
+        if lod is not None and self.lod_points is not None:
+            lod.record(time.perf_counter() - start)
+
+    def _arrive(self, row):
+        tree = self.store.tree[row]
+        if tree is None or tree.forest is None or tree.chopped:
+            self._release(row)
+            return
+        self.store.state[row] = CHOPPING
+        tree.start_chopping()
+
+    def _check(self):
+        """Release trees that were unloaded, and resume chops someone cancelled"""
+        store = self.store
+        n = store.count
+        if n == 0:
+            return
+        start = self.check_cursor if self.check_cursor < n else 0
+        end = min(n, start + CHECKS_PER_TICK)
+        self.check_cursor = end
+        state = store.state[start:end]
+        for row in (start + np.flatnonzero((state == WALKING) | (state == CHOPPING))).tolist():
+            tree = store.tree[row]
+            if tree.forest is None:
+                self._release(row)
+            elif store.state[row] == CHOPPING and not tree.chopping and not tree.chopped:
+                tree.start_chopping()
+
+    def _decide(self, due=None):
+        store = self.store
+        idle = store.state[:store.count] == IDLE
+        if due is not None:
+            idle &= due
+        idle = np.flatnonzero(idle)
+        if self.far_interval > 1 and self.focus is not None and self.ticks % self.far_interval:
+            offset = store.position[idle] - (self.focus.x, self.focus.y)
+            idle = idle[(offset * offset).sum(axis=1) <= self.far_radius * self.far_radius]
+        if self.planner is not None:
+            idle = idle[:PLANS_PER_TICK]
+            store.state[idle] = PLANNING
+            self.planner.submit(self.ticks, store.ids[idle], store.position[idle])
+            return
+        if due is not None:
+            far = store.tier[idle] > 0
+            idle = np.concatenate((idle[~far], idle[far][:FAR_DECISIONS_PER_TICK]))
+        idle = idle[:DECISIONS_PER_TICK]
+        for row in idle.tolist():
+            x, y = store.position[row].tolist()
+            tree = self.forest.nearest_choppable(x, y, SEARCH_RADIUS, self._is_free)
+            if tree is None:
+                self._wander(row)
+            else:
+                self._walk(row, tree)
+
+    def _collect(self):
+        """Act on the plans due this tick, checking them against the forest as it is now"""
+        store = self.store
+        forest = self.forest
+        for entity_id, tree, route in self.planner.results(self.ticks):
+            row = store.rows.get(entity_id)
+            if row is None or store.state[row] != PLANNING:
+                # Removed or cleared while the plan was out
+                continue
+            if tree is None:
+                self._wander(row)
+            elif tree.forest is not forest or tree.chopped or tree.chopping or tree in forest.claimed:
+                store.state[row] = IDLE
+                self.stale_plans += 1
+            else:
+                self._walk(row, tree, route)
+
+    def _wander(self, row):
+        store = self.store
+        x, y = store.position[row].tolist()
+        dx, dy = self.rng.uniform(-WANDER_RADIUS, WANDER_RADIUS, 2)
+        store.state[row] = WANDERING
+        store.set_target(row, x + dx, y + dy)
+
+    def _walk(self, row, tree, route=None):
+        """Claim ``tree`` for the NPC and send it there, through ``route`` if given"""
+        store = self.store
+        entity_id = int(store.ids[row])
+        self.claims[tree] = entity_id
+        self.forest.claim(tree)
+        store.tree[row] = tree
+        store.state[row] = WALKING
+        if route:
+            route = deque(route)
+            route.append((tree.x, tree.y))
+            self.routes[entity_id] = route
+            store.set_target(row, *route.popleft())
+        else:
+            store.set_target(row, tree.x, tree.y)
+
+    @staticmethod
+    def _is_free(tree):
+        # Claimed trees are already out of the index; this skips the player's
+        return not tree.chopping
+
+    def _release(self, row):
+        store = self.store
+        tree = store.tree[row]
+        if tree is not None:
+            self.claims.pop(tree, None)
+            self.forest.release(tree)
+            self.routes.pop(int(store.ids[row]), None)
+        store.tree[row] = None
+        store.state[row] = IDLE
+        store.moving[row] = False
+
+    def tree_chopped(self, tree):
+        """Credit the NPC that felled ``tree``; False if it was not one of ours"""
+        entity_id = self.claims.get(tree)
+        if entity_id is None:
+            return False
+        row = self.store.rows[entity_id]
+        was_chopping = self.store.state[row] == CHOPPING
+        self._release(row)
+        if not was_chopping:
+            # Someone else felled it while this NPC was still walking over
+            return False
+        self.store.wood[row] += self.wood_per_tree
+        self.trees_chopped += 1
+        return True
+
+    def resume(self, find_tree):
+        """Re-claim the trees of NPCs restored walking to or chopping one.
+
+        Their target is the tree's position, and ``find_tree(x, y)`` the
+        tree standing there, if any. An NPC whose tree isn't loaded walks
+        to where it stood and chooses again.
+        """
+        store = self.store
+        state = store.state[:store.count]
+        for row in np.flatnonzero((state == WALKING) | (state == CHOPPING)).tolist():
+            tree = find_tree(*store.target[row].tolist())
+            if tree is None or tree.chopped or tree in self.claims:
+                store.state[row] = WANDERING
+                store.moving[row] = True
+                continue
+            chopping = store.state[row] == CHOPPING
+            self._walk(row, tree)
+            if chopping:
+                store.state[row] = CHOPPING
+                store.moving[row] = False
+
+    def remove_dead(self):
+        """Drop NPCs with no health left; returns how many were removed"""
+        rows = self.store.dead()
+        for row in rows.tolist():
+            self._release(row)
+        self.store.remove(rows)
+        return rows.size
+
+    def clear(self):
+        for row in range(self.store.count):
+            self._release(row)
+        self.store.clear()
+        if self.planner is not None:
+            self.planner.clear()
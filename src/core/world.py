@@ -0,0 +1,286 @@
+import math
+from collections import OrderedDict
+
+import numpy as np
+
+from core.tree import Tree
+
+CHUNK_SIZE = 512
+# Terrain samples per chunk side; the renderer stretches these over the chunk
+TERRAIN_RESOLUTION = 32
+# Candidate tree sites per chunk side, jittered within their grid cell
+TREE_GRID = 8
+TREE_THRESHOLD = 0.55
+TREE_FILL = 0.8
+
+TERRAIN_FREQUENCY = 1 / 700
+FOREST_FREQUENCY = 1 / 1100
+OCTAVES = 4
+
+# Terrain height maps onto a ramp of grass shades around AMAZON
+LOW_COLOR = np.array((40, 98, 66), dtype=np.float32)
+HIGH_COLOR = np.array((86, 146, 98), dtype=np.float32)
+
+MAX_RESIDENT = 64
+# Chunks kept loaded around the viewport, plus how far ahead of a moving
+# camera to load, at most MAX_LOOKAHEAD world units
+PRELOAD_MARGIN = 1
+LOOKAHEAD_SECONDS = 0.75
+MAX_LOOKAHEAD = 2 * CHUNK_SIZE
+
+
+def _lattice(ix, iy, seed):
+    """Pseudo-random value in [0, 1) for each integer lattice point"""
+    h = ix.astype(np.uint32) * np.uint32(0x8DA6B343)
+    h ^= iy.astype(np.uint32) * np.uint32(0xD8163841)
+    h ^= np.uint32(seed & 0xFFFFFFFF)
+    h ^= h >> np.uint32(13)
+    h *= np.uint32(0x85EBCA6B)
+    h ^= h >> np.uint32(16)
+    return h.astype(np.float32) / np.float32(2 ** 32)
+
+
+def value_noise(x, y, seed):
+    """Smoothly interpolated lattice noise in [0, 1), continuous across chunks"""
+    x0 = np.floor(x)
+    y0 = np.floor(y)
+    fx = x - x0
+    fy = y - y0
+    fx = fx * fx * (3 - 2 * fx)
+    fy = fy * fy * (3 - 2 * fy)
+    ix = x0.astype(np.int64)
+    iy = y0.astype(np.int64)
+    bottom = _lattice(ix, iy, seed) * (1 - fx) + _lattice(ix + 1, iy, seed) * fx
+    top = _lattice(ix, iy + 1, seed) * (1 - fx) + _lattice(ix + 1, iy + 1, seed) * fx
+    return bottom * (1 - fy) + top * fy
+
+
+def fractal_noise(x, y, seed, octaves=OCTAVES):
+    total = np.zeros(np.broadcast(x, y).shape, dtype=np.float64)
+    amplitude = 1.0
+    norm = 0.0
+    for octave in range(octaves):
+        total += value_noise(x, y, seed + octave * 7919) * amplitude
+        norm += amplitude
+        x = x * 2
+        y = y * 2
+        amplitude *= 0.5
+    return total / norm
+
+
+def terrain_colors(terrain):
+    """uint8 RGB for each terrain height sample"""
+    shade = np.clip((terrain - 0.25) * 2.0, 0.0, 1.0)[..., None]
+    return (LOW_COLOR + (HIGH_COLOR - LOW_COLOR) * shade).astype(np.uint8)
+
+
+class ChunkData:
+    """Generated contents of one chunk: a terrain height grid and tree sites"""
+
+    def __init__(self, cx, cy, terrain, trees):
+        self.cx = cx
+        self.cy = cy
+        self.terrain = terrain
+        self.trees = trees
+
+
+def generate_chunk(seed, cx, cy):
+    """Build chunk (cx, cy) from the world seed.
+
+    Pure and module level, so it can run on a thread or process pool; the
+    same arguments always give the same chunk.
+    """
+    left = cx * CHUNK_SIZE
+    bottom = cy * CHUNK_SIZE
+
+    step = CHUNK_SIZE / TERRAIN_RESOLUTION
+    samples = (np.arange(TERRAIN_RESOLUTION) + 0.5) * step
+    grid_x, grid_y = np.meshgrid(left + samples, bottom + samples)
+    terrain = fractal_noise(grid_x * TERRAIN_FREQUENCY, grid_y * TERRAIN_FREQUENCY, seed)
+
+    rng = np.random.default_rng([seed, cx % 2 ** 32, cy % 2 ** 32])
+    spacing = CHUNK_SIZE / TREE_GRID
+    sites = (np.arange(TREE_GRID) * spacing)
+    site_x, site_y = np.meshgrid(left + sites, bottom + sites)
+    site_x = site_x.ravel() + rng.uniform(0.15, 0.85, site_x.size) * spacing
+    site_y = site_y.ravel() + rng.uniform(0.15, 0.85, site_y.size) * spacing
+    density = fractal_noise(site_x * FOREST_FREQUENCY, site_y * FOREST_FREQUENCY, seed + 1, 3)
+    keep = (density > TREE_THRESHOLD) & (rng.random(site_x.size) < TREE_FILL)
+    trees = np.column_stack((site_x[keep], site_y[keep])).astype(np.float32)
+
+    return ChunkData(cx, cy, terrain.astype(np.float32), trees)
+
+
+class Chunk:
+    """A resident chunk and the Tree objects it added to the forest"""
+
+    def __init__(self, data, trees):
+        self.cx = data.cx
+        self.cy = data.cy
+        self.terrain = data.terrain
+        self.trees = trees
+
+    @property
+    def key(self):
+        return (self.cx, self.cy)
+
+
+class ChunkManager:
+    """Streams fixed-size chunks in and out of a Forest around a viewport.
+
+    ``update`` is called once a frame with the visible world rectangle.
+    Chunks overlapping it, a margin around it and the area the view is
+    heading into are requested from ``executor`` (any concurrent.futures
+    executor; generate_chunk is picklable, so a process pool works too), or
+    built inline when there is none, which keeps headless runs
+    deterministic. Finished chunks are added to the forest on the calling
+    thread. Resident chunks are kept in LRU order and the least recently
+    wanted ones are evicted once there are more than ``max_resident``.
+
+    Chunks have no per-frame work of their own - tree timers live on the
+    scheduler - so streaming plus viewport culling in the renderer keeps
+    memory and frame time independent of how far the player has walked.
+    ``version`` changes whenever a chunk is loaded or evicted. Stumps in an
+    evicted chunk are remembered in ``overrides`` (tree position to regrow
+    time) and put back when the chunk is generated again.
+    """
+
+    def __init__(self, forest, seed=0, executor=None, max_resident=MAX_RESIDENT, clearings=()):
+        self.forest = forest
+        self.seed = seed
+        self.executor = executor
+        self.max_resident = max_resident
+        # (x, y, radius) areas kept free of generated trees, e.g. the spawn point
+        self.clearings = list(clearings)
+
+        self.chunks = OrderedDict()
+        self.overrides = {}
+        self.pending = {}
+        self.visible = []
+        self.version = 0
+        self.generated = 0
+        self.evicted = 0
+        # Middle of the view last passed to ``update``
+        self.center = None
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def chunk_of(self, x, y):
+        return (math.floor(x / CHUNK_SIZE), math.floor(y / CHUNK_SIZE))
+
+    def chunk_range(self, left, bottom, right, top):
+        min_x, min_y = self.chunk_of(left, bottom)
+        max_x, max_y = self.chunk_of(right, top)
+        return [(cx, cy) for cy in range(min_y, max_y + 1) for cx in range(min_x, max_x + 1)]
+
+    def update(self, left, bottom, right, top, delta_time=0.0):
+        """Request, integrate and evict chunks for the given view rectangle"""
+        self.visible = self.chunk_range(left, bottom, right, top)
+
+        center_x = (left + right) / 2
+        center_y = (bottom + top) / 2
+        ahead_x = ahead_y = 0.0
+        if self.center is not None and delta_time > 0:
+            ahead_x = (center_x - self.center[0]) / delta_time * LOOKAHEAD_SECONDS
+            ahead_y = (center_y - self.center[1]) / delta_time * LOOKAHEAD_SECONDS
+            ahead_x = max(-MAX_LOOKAHEAD, min(MAX_LOOKAHEAD, ahead_x))
+            ahead_y = max(-MAX_LOOKAHEAD, min(MAX_LOOKAHEAD, ahead_y))
+        self.center = (center_x, center_y)
+
+        margin = PRELOAD_MARGIN * CHUNK_SIZE
+        wanted = self.chunk_range(min(left, left + ahead_x) - margin,
+                                  min(bottom, bottom + ahead_y) - margin,
+                                  max(right, right + ahead_x) + margin,
+                                  max(top, top + ahead_y) + margin)
+        wanted_set = set(wanted)
+
+        for key, future in list(self.pending.items()):
+            if key not in wanted_set and future.cancel():
+                del self.pending[key]
+
+        # Nearest first, so the view fills in from the middle
+        missing = [key for key in wanted if key not in self.chunks and key not in self.pending]
+        missing.sort(key=lambda key: ((key[0] + 0.5) * CHUNK_SIZE - center_x) ** 2
+                     + ((key[1] + 0.5) * CHUNK_SIZE - center_y) ** 2)
+        for cx, cy in missing:
+            if self.executor is None:
+                self._integrate(generate_chunk(self.seed, cx, cy))
+            else:
+                self.pending[(cx, cy)] = self.executor.submit(generate_chunk, self.seed, cx, cy)
+
+        for key, future in list(self.pending.items()):
+            if future.done():
+                del self.pending[key]
+                if not future.cancelled():
+                    self._integrate(future.result())
+
+        # Visible chunks are touched last so they are the most recently used
+        for key in wanted:
+            if key in self.chunks:
+                self.chunks.move_to_end(key)
+        for key in self.visible:
+            if key in self.chunks:
+                self.chunks.move_to_end(key)
+        self._evict(wanted_set)
+
+    def _integrate(self, data):
+        trees = []
+        for x, y in data.trees.tolist():
+            if self._in_clearing(x, y):
+                continue
+            tree = Tree(x, y)
+            tree.chunk = (data.cx, data.cy)
+            self.forest.add(tree)
+            due = self.overrides.pop((x, y), None)
+            if due is not None:
+                tree.restore(True, False, due)
+            trees.append(tree)
+        chunk = Chunk(data, trees)
+        self.chunks[chunk.key] = chunk
+        self.generated += 1
+        self.version += 1
+
+    def _in_clearing(self, x, y):
+        for clear_x, clear_y, radius in self.clearings:
+            if (x - clear_x) ** 2 + (y - clear_y) ** 2 < radius * radius:
+                return True
+        return False
+
+    def _evict(self, wanted):
+        while len(self.chunks) > self.max_resident:
+            key = next(iter(self.chunks))
+            # Everything older is wanted too; the view is larger than the bound
+            if key in wanted:
+                break
+            self.unload(key)
+
+    def unload(self, key):
+        chunk = self.chunks.pop(key, None)
+        if chunk is None:
+            return
+        for tree in chunk.trees:
+            if tree.chopped:
+                self.overrides[(tree.x, tree.y)] = tree.timer.due
+            self.forest.remove(tree)
+        self.evicted += 1
+        self.version += 1
+
+    def visible_chunks(self):
+        return [self.chunks[key] for key in self.visible if key in self.chunks]
+
+    def clear(self):
+        for key in list(self.chunks):
+            self.unload(key)
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+        self.center = None
+
+    def close(self):
+        """Drop queued work and stop the executor without waiting on it"""
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,60 @@
+import arcade
+import numpy as np
+from arcade.hitbox import algo_bounding_box
+from PIL import Image
+
+from core.world import CHUNK_SIZE, TERRAIN_RESOLUTION, terrain_colors
+
+
+def terrain_image(terrain):
+    """RGB image for a terrain grid; row 0 of the grid is the bottom edge"""
+    return Image.fromarray(np.flipud(terrain_colors(terrain)), "RGB")
+
+
+class TerrainRenderer:
+    """Draws the terrain of the chunks in the viewport as stretched sprites.
+
+    A texture is built the first time a chunk becomes visible and dropped
+    when the chunk is evicted; the default atlas frees textures once
+    nothing references them. The sprite list is only rebuilt when the set
+    of visible chunks changes.
+    """
+
+    def __init__(self, world):
+        self.world = world
+        self.sprites = {}
+        self.sprite_list = arcade.SpriteList()
+        self.shown = None
+        self.version = None
+
+    def _sprite(self, chunk):
+        sprite = self.sprites.get(chunk.key)
+        if sprite is None:
+            texture = arcade.Texture(terrain_image(chunk.terrain),
+                                     hash=f"chunk:{self.world.seed}:{chunk.cx}:{chunk.cy}",
+                                     hit_box_algorithm=algo_bounding_box)
+            sprite = arcade.Sprite(texture, scale=CHUNK_SIZE / TERRAIN_RESOLUTION)
+            sprite.left = chunk.cx * CHUNK_SIZE
+            sprite.bottom = chunk.cy * CHUNK_SIZE
+            self.sprites[chunk.key] = sprite
+        return sprite
+
+    def sync(self):
+        world = self.world
+        if self.version != world.version:
+            self.version = world.version
+            for key in [key for key in self.sprites if key not in world.chunks]:
+                del self.sprites[key]
+            self.shown = None
+
+        shown = [key for key in world.visible if key in world.chunks]
+        if shown == self.shown:
+            return
+        self.shown = shown
+        self.sprite_list.clear()
+        for key in shown:
+            self.sprite_list.append(self._sprite(world.chunks[key]))
+
+    def draw(self):
+        self.sync()
+        self.sprite_list.draw()
@@ -0,0 +1,154 @@
+"""Run the simulation without a window.
+
+    python headless.py --ticks 36000 --seed 1
+
+Plays a scripted session (walk clicks and chopping the nearest tree) as
+fast as possible and prints ticks per second and the final state. With
+--stream the scattered trees are replaced by world chunks streamed around
+the player, generated inline so the run stays deterministic. --npcs adds
+that many woodcutters around the spawn point. --plan-workers hands their
+decisions to core.planner on a pool of that many processes (0 plans
+inline) and --routes has it plan paths around trees too; the result is
+the same for any number of workers. --collide keeps NPCs and the player
+out of trunks and apart with core.collision.
+
+--record saves the session's input for core.replay; --replay runs a
+recording instead, from this script or from main.py --record, and prints
+the step time distribution and a checksum of the final state.
+
+--memory samples core.memory every simulated SAMPLE_INTERVAL seconds and
+writes its report, per subsystem with any steady growth, at the end.
+"""
+import argparse
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from core import commands
+from core.replay import Recorder, Recording, Replayer, checksum
+from core.simulation import SIM_DT, SIM_RATE, Simulation
+
+DEFAULT_TICKS = 60 * SIM_RATE
+MEMORY_REPORT = "memory_report.txt"
+WORLD_SIZE = 2000
+TREE_COUNT = 200
+# View rectangle streamed around the player with --stream
+VIEW_WIDTH = 1280
+VIEW_HEIGHT = 720
+
+
+def build_simulation(seed, stream=False, npcs=0, plan_workers=None, routes=False, collide=False):
+    rng = random.Random(seed)
+    plan_executor = ProcessPoolExecutor(plan_workers) if plan_workers else None
+    simulation = Simulation(WORLD_SIZE / 2, WORLD_SIZE / 2, seed=seed, plan_executor=plan_executor)
+    recorder = Recorder(simulation)
+    if plan_workers is not None or routes:
+        recorder.perform(commands.PLANNER, routes)
+    if collide:
+        recorder.perform(commands.COLLISION)
+    if npcs:
+        recorder.perform(commands.SPAWN_NPCS, npcs, WORLD_SIZE / 2)
+    if not stream:
+        for _ in range(TREE_COUNT):
+            recorder.perform(commands.ADD_TREE, rng.uniform(0, WORLD_SIZE), rng.uniform(0, WORLD_SIZE))
+    return simulation, recorder, rng
+
+
+def scripted_input(simulation, recorder, rng):
+    """Occasionally click somewhere, preferring the closest standing tree"""
+    if simulation.is_chopping or rng.random() > 0.02:
+        return
+    player = simulation.player
+    tree = simulation.forest.nearest_choppable(player.x, player.y)
+    if tree is not None and rng.random() < 0.7:
+        recorder.perform(commands.CLICK, tree.x, tree.y)
+    else:
+        recorder.perform(commands.CLICK, rng.uniform(0, WORLD_SIZE), rng.uniform(0, WORLD_SIZE))
+
+
+def stream_world(simulation, recorder):
+    player = simulation.player
+    bounds = (player.x - VIEW_WIDTH / 2, player.y - VIEW_HEIGHT / 2,
+              player.x + VIEW_WIDTH / 2, player.y + VIEW_HEIGHT / 2)
+    simulation.world.update(*bounds, SIM_DT)
+    recorder.view(*bounds)
+
+
+def run(ticks, seed, stream=False, npcs=0, plan_workers=None, routes=False, memory=None, collide=False):
+    simulation, recorder, rng = build_simulation(seed, stream, npcs, plan_workers, routes, collide)
+    if memory is not None:
+        from core.memory import watch_simulation
+        watch_simulation(memory, simulation)
+        memory.start()
+    start = time.perf_counter()
+    for _ in range(ticks):
+        if stream:
+            stream_world(simulation, recorder)
+        scripted_input(simulation, recorder, rng)
+        simulation.update(SIM_DT)
+        if memory is not None:
+            memory.update(SIM_DT)
+    elapsed = time.perf_counter() - start
+    planner = simulation.woodcutters.planner
+    if planner is not None:
+        planner.close()
+    return simulation, recorder, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=DEFAULT_TICKS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stream", action="store_true", help="stream generated chunks around the player")
+    parser.add_argument("--npcs", type=int, default=0, help="number of NPC woodcutters")
+    parser.add_argument("--plan-workers", type=int, metavar="N",
+                        help="plan NPC decisions on N worker processes (0 for inline)")
+    parser.add_argument("--routes", action="store_true", help="have the planner route NPCs around trees")
+    parser.add_argument("--collide", action="store_true", help="keep NPCs and the player out of trunks and apart")
+    parser.add_argument("--record", metavar="PATH", help="save the session's input to PATH")
+    parser.add_argument("--replay", metavar="PATH", help="replay a recording instead of the scripted session")
+    parser.add_argument("--memory", nargs="?", const=MEMORY_REPORT, metavar="PATH",
+                        help=f"trace memory per subsystem and write a report to PATH (default {MEMORY_REPORT})")
+    args = parser.parse_args()
+
+    if args.replay:
+        print(Replayer(Recording.load(args.replay)).run().report())
+        return
+
+    memory = None
+    if args.memory:
+        from core.memory import MemoryTracker
+        memory = MemoryTracker()
+    simulation, recorder, elapsed = run(args.ticks, args.seed, args.stream, args.npcs,
+                                        args.plan_workers, args.routes, memory, args.collide)
+    if args.record:
+        recorder.save(args.record)
+        print(f"recorded {len(recorder.events)} events, checksum {checksum(simulation)}")
+    stats = simulation.player_stats
+    print(f"{simulation.tick} ticks in {elapsed:.2f}s ({simulation.tick / elapsed:.0f} ticks/s)")
+    print(f"player at ({simulation.player.x:.1f}, {simulation.player.y:.1f}) "
+          f"wood {stats.wood_count} health {stats.health} particles {len(simulation.particle_manager)}")
+    if args.npcs:
+        woodcutters = simulation.woodcutters
+        print(f"npcs {len(woodcutters)} trees chopped {woodcutters.trees_chopped} "
+              f"npc wood {int(simulation.npcs.wood[:len(woodcutters)].sum())}")
+        lod = simulation.lod
+        counts = " ".join(f"{tier.name} {count}" for tier, count in zip(lod.tiers, lod.counts.tolist()))
+        print(f"lod {counts}, saving {lod.saved * 1000:.3f} ms/tick, tiering {lod.tiering * 1000:.3f} ms/tick")
+        planner = woodcutters.planner
+        if planner is not None:
+            print(f"planned {planner.planned} decisions, {woodcutters.stale_plans} stale, "
+                  f"{planner.late} jobs waited for")
+    if args.stream:
+        world = simulation.world
+        print(f"chunks resident {len(world)} generated {world.generated} evicted {world.evicted} "
+              f"trees {len(simulation.forest)}")
+    if memory is not None:
+        memory.sample(snapshot=True)
+        memory.write(args.memory)
+        memory.stop()
+        print(memory.report())
+
+
+if __name__ == "__main__":
+    main()
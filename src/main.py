@@ -1,56 +1,194 @@
 # FIXME: Camera Position not centering correctly on player sprite
 
 
-import arcade
-import math
-from core.particle_manager import ParticleManager
-from core.tree import Tree
-from core.ui_manager import UIManager
-from core.player_stats import PlayerStats
+import argparse
+import os
+import random
+import time
+
+START = time.perf_counter()
+
+import arcade  # noqa: E402 - timed as the first startup phase
+
+from core import commands  # noqa: E402 - plain constants, no numpy
 
 WINDOW_WIDTH = 1280
 WINDOW_HEIGHT = 720
 WINDOW_TITLE = "Starting Template"
-PLAYER_SPEED = 300 
-PARTICLE_COUNT = 30 
+TRACE_PATH = "frame_trace.json"
+MEMORY_REPORT = "memory_report.txt"
+SAVE_DIRECTORY = "saves"
+# Imported on the preload thread while the loading screen is up
+GAME_MODULES = [
+    "concurrent.futures",
+    "core.animation",
+    "core.frame_cache",
+    "core.idle",
+    "core.lighting",
+    "core.minimap",
+    "core.profiler",
+    "core.profiler_overlay",
+    "core.quality",
+    "core.replay",
+    "core.savegame",
+    "core.simulation",
+    "core.tree_renderer",
+    "core.ui_manager",
+    "core.world_renderer",
+]
 
 # Camera settings
-CAMERA_SPEED = 0.1 
+CAMERA_SPEED = 0.1
 CAMERA_DEADZONE = 50
+# Tree canopies reach past their hit box; cull with this much slack
+TREE_DRAW_MARGIN = 60
+NPC_SPAWN_COUNT = 50
+# Shift + H/D/R applies to every NPC this close to the player
+NPC_EFFECT_RADIUS = 300
+HEAL_AMOUNT = 10
+DAMAGE_AMOUNT = 15
+REPAIR_AMOUNT = 5
+# Update and draw as fast as possible while replaying
+REPLAY_RATE = 1 / 1000
+UPDATE_RATE = 1 / 60
+# Slowest update rate while idle; a pending timer can make it sooner
+IDLE_RATE = 1 / 10
+# Camera moves smaller than this many pixels don't count as a change
+CAMERA_EPSILON = 0.05
+# The spawn campfire burns this far left of the spawn point
+CAMPFIRE_OFFSET = -90
+# Processes planning NPC decisions and routes, leaving a core for the game
+PLAN_WORKERS = max(1, (os.cpu_count() or 1) - 1)
 
 
 class GameView(arcade.View):
+    """Input and rendering on top of a Simulation.
 
-    def __init__(self):
+    The simulation advances in fixed ticks; drawing interpolates the player
+    between the last two ticks using ``simulation.alpha``. Inputs that
+    change the simulation go through ``command`` so ``recorder`` can save
+    the session. Given a ``recording``, the view replays it instead, one
+    tick per frame, and ignores input.
+    """
+
+    def __init__(self, textures=None, recording=None):
         super().__init__()
+        # Usually already imported by the preloader; see GAME_MODULES
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+        from core.animation import Animator, ClipLibrary
+        from core.assets import MANIFEST
+        from core.frame_cache import FrameCache
+        from core.idle import IdleTracker
+        from core.lighting import CAMPFIRE_COLOR, CAMPFIRE_RADIUS, LANTERN_COLOR, LANTERN_RADIUS, Light, Lightmap
+        from core.minimap import Minimap
+        from core.profiler import FrameProfiler
+        from core.profiler_overlay import ProfilerOverlay
+        from core.quality import QualityGovernor
+        from core.replay import Recorder, Replayer
+        from core.savegame import Autosave
+        from core.simulation import Simulation
+        from core.tree_renderer import TreeRenderer
+        from core.ui_manager import UIManager
+        from core.world_renderer import TerrainRenderer
 
         self.background_color = arcade.color.AMAZON
         self.mouse_sprite_list = arcade.SpriteList()
 
-        self.particle_manager = ParticleManager()
-        self.ui_manager = UIManager(WINDOW_WIDTH, WINDOW_HEIGHT)
-        self.player_stats = PlayerStats()
+        if recording is None:
+            # An explicit seed, so the session can be recorded and replayed
+            self.simulation = Simulation(WINDOW_WIDTH / 2, WINDOW_HEIGHT / 2, seed=random.getrandbits(32),
+                                         executor=ThreadPoolExecutor(1, thread_name_prefix="chunks"),
+                                         plan_executor=ProcessPoolExecutor(PLAN_WORKERS))
+            self.replayer = None
+        else:
+            # Chunks are generated and NPCs planned inline so the replay is deterministic
+            self.simulation = Simulation(*recording.spawn, seed=recording.seed)
+            self.replayer = Replayer(recording, self.simulation)
+        self.recorder = Recorder(self.simulation)
+        # Work time per frame, from the start of on_update to the end of on_draw; kept
+        # while replaying, otherwise fed to the quality governor
+        self.frame_times = []
+        self.frame_start = None
+        if self.replayer is None:
+            self.command(commands.ADD_TREE, WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)
+            self.command(commands.PLANNER, 1)
+            self.command(commands.COLLISION)
+        self.player_stats = self.simulation.player_stats
+        self.particle_manager = self.simulation.particle_manager
+        self.forest = self.simulation.forest
+        self.world = self.simulation.world
+        self.terrain_renderer = TerrainRenderer(self.world)
+        self.autosave = Autosave(self.simulation, SAVE_DIRECTORY)
+        # A failed save is reported on the console and retried in full next time
+        self.autosave.on_error = print
+        self.minimap = Minimap(self.world, self.forest)
+        self.tree_renderer = TreeRenderer(self.forest)
+        self.lightmap = Lightmap()
+        spawn_x, spawn_y = self.simulation.spawn
+        self.lightmap.add(Light(spawn_x + CAMPFIRE_OFFSET, spawn_y, CAMPFIRE_RADIUS, CAMPFIRE_COLOR))
+        self.lantern = Light(spawn_x, spawn_y, LANTERN_RADIUS, LANTERN_COLOR)
+        self.simulation.on_tree_changed = self.tree_changed
+        self.ui_manager = UIManager(WINDOW_WIDTH, WINDOW_HEIGHT, self.player_stats, self.minimap)
+
+        self.profiler = FrameProfiler()
+        self.simulation.profiler = self.profiler
+        self.quality = QualityGovernor()
+        self.quality.on_change = self.apply_quality
+        # Once nothing on screen changes, the last frame is presented again instead of redrawn
+        self.idle = IdleTracker()
+        self.idle.enabled = self.replayer is None
+        self.idle.on_change = self.idle_changed
+        self.frame_cache = FrameCache()
+        self.update_rate = UPDATE_RATE
+        self.profiler_overlay = ProfilerOverlay(self.profiler, self.quality, self.idle, self.simulation.lod)
 
         # Create camera
         self.camera = arcade.Camera2D()
         self.ui_camera = arcade.Camera2D()
-        
+
         self.camera_target_x = WINDOW_WIDTH / 2
         self.camera_target_y = WINDOW_HEIGHT / 2
 
-        self.mouse_sprite = arcade.Sprite(
-            ":resources:images/animated_characters/female_adventurer/femaleAdventurer_idle.png",
-            scale=0.5,
-        )
+        textures = textures or {}
+        self.mouse_sprite = arcade.Sprite(textures.get("player", MANIFEST["player"]), scale=0.5)
         self.mouse_sprite.center_x = WINDOW_WIDTH / 2
         self.mouse_sprite.center_y = WINDOW_HEIGHT / 2
-        self.target_position = None
         self.mouse_sprite_list.append(self.mouse_sprite)
-
-        self.tree = Tree(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)
-
-        self.is_chopping = False
-        self.chop_target_position = None
+        # Every character frame goes into the shared atlas now, not on first use
+        self.animations = ClipLibrary(textures)
+        self.animations.pack(self.window.ctx.default_atlas)
+        self.animator = Animator(self.animations)
+        self.player_row = self.animator.add(self.mouse_sprite, self.animations.ids["idle_right"])
+        self.player_left = False
+        self.player_drawn_at = (self.mouse_sprite.center_x, self.mouse_sprite.center_y)
+
+        # StartupTimer to report to, and then quit, after the first frame
+        self.startup = None
+        # core.memory.MemoryTracker sampling this session, if asked for
+        self.memory = None
+
+    def watch_memory(self, tracker):
+        """Register probes for the simulation and for what the view owns on the GPU and in caches"""
+        from core.memory import watch_simulation
+
+        watch_simulation(tracker, self.simulation)
+        atlas = self.window.ctx.default_atlas
+        lightmap = self.lightmap
+        minimap = self.minimap
+        frame_cache = self.frame_cache
+        tracker.register("textures", lambda: (len(atlas.textures), atlas.width * atlas.height * 4))
+        tracker.register("lightmap", lambda: (len(lightmap.cache), lightmap.nbytes))
+        tracker.register("minimap", lambda: (1, minimap.image.nbytes))
+        tracker.register("frame cache", lambda: (
+            (1, frame_cache.framebuffer.width * frame_cache.framebuffer.height * 4)
+            if frame_cache.framebuffer is not None else (0, 0)))
+        self.memory = tracker.start()
+
+    def tree_changed(self, tree):
+        self.minimap.tree_changed(tree)
+        self.tree_renderer.tree_changed(tree)
+        self.lightmap.tree_changed(tree)
 
     def center_camera_on_player(self):
         """Center the camera on the player with smooth movement"""
@@ -67,6 +205,27 @@ class GameView(arcade.View):
 
         self.camera.position = (new_x, new_y)
 
+    def animate(self, delta_time):
+        """Pick the player's clip from what the avatar is doing, then advance every animation"""
+        avatar = self.simulation.avatar
+        tree = avatar.chop_tree
+        chopping = tree.x < avatar.player.x if tree is not None and tree.chopping else None
+        walking = avatar.path is not None
+        x, y = self.mouse_sprite.center_x, self.mouse_sprite.center_y
+        last_x, last_y = self.player_drawn_at
+        self.player_drawn_at = (x, y)
+        clip, self.player_left = self.animations.choose(x - last_x, y - last_y, walking, chopping,
+                                                        self.player_left)
+        if clip is not None:
+            self.animator.play(self.player_row, clip)
+        self.animator.update(delta_time)
+
+    def update_lighting(self, delta_time):
+        """Carry the lantern with the player and rebuild the lightmap for the view if due"""
+        self.lantern.x = self.mouse_sprite.center_x
+        self.lantern.y = self.mouse_sprite.center_y
+        self.lightmap.update(delta_time, self.view_bounds(), self.simulation.scheduler.time, (self.lantern,))
+
     def world_to_screen(self, world_x, world_y):
         """Convert world coordinates to screen coordinates"""
         camera_x, camera_y = self.camera.position
@@ -81,88 +240,234 @@ class GameView(arcade.View):
         world_y = screen_y + camera_y
         return world_x, world_y
 
+    def view_bounds(self, margin=0):
+        """World rectangle (left, bottom, right, top) the camera currently shows"""
+        x, y = self.camera.position
+        return (x + self.camera.left - margin, y + self.camera.bottom - margin,
+                x + self.camera.right + margin, y + self.camera.top + margin)
+
     def reset(self):
         """Reset game state"""
-        self.mouse_sprite.center_x = WINDOW_WIDTH / 2
-        self.mouse_sprite.center_y = WINDOW_HEIGHT / 2
-        self.target_position = None
-        self.is_chopping = False
-        self.chop_target_position = None
+        self.simulation.reset()
+        self.sync_player_sprite()
         self.camera.position = (0, 0)
 
+    def sync_player_sprite(self):
+        """Place the sprite between the last two simulation ticks"""
+        x, y = self.simulation.player.interpolated(self.simulation.alpha)
+        self.mouse_sprite.center_x = x
+        self.mouse_sprite.center_y = y
+
     def on_draw(self):
-        self.clear()
-
-        self.camera.use()
-        
-        self.tree.draw()
-        self.mouse_sprite_list.draw()
-        self.particle_manager.draw()
-        
-        self.ui_camera.use()
-        
-        self.ui_manager.draw()
+        drawn = not self.idle.idle
+        if drawn:
+            self.draw_scene()
+        else:
+            self.draw_cached()
+
+        if self.frame_start is not None:
+            frame_time = time.perf_counter() - self.frame_start
+            self.frame_start = None
+            if self.replayer is not None:
+                self.frame_times.append(frame_time)
+            elif drawn:
+                self.quality.update(frame_time)
+
+        if self.startup is not None:
+            self.startup.mark("first frame")
+            print(self.startup.report())
+            self.startup = None
+            arcade.schedule_once(lambda delta_time: arcade.exit(), 0)
+
+    def draw_cached(self):
+        """Present the idle frame again, capturing it first if it is stale"""
+        cache = self.frame_cache
+        if cache.valid:
+            self.idle.skipped += 1
+        else:
+            cache.capture(self.draw_scene, self.background_color)
+        cache.present()
+
+    def draw_scene(self):
+        profiler = self.profiler
+        with profiler.stage("draw"):
+            self.clear()
+
+            self.camera.use()
+
+            with profiler.stage("draw.terrain"):
+                self.terrain_renderer.draw()
+            with profiler.stage("draw.forest"):
+                self.tree_renderer.draw(self.view_bounds(TREE_DRAW_MARGIN))
+            with profiler.stage("draw.npcs"):
+                self.simulation.npcs.draw(self.view_bounds(TREE_DRAW_MARGIN))
+            with profiler.stage("draw.player"):
+                self.mouse_sprite_list.draw()
+            with profiler.stage("draw.particles"):
+                self.particle_manager.draw()
+            with profiler.stage("draw.lighting"):
+                self.lightmap.draw()
+
+            self.ui_camera.use()
+
+            with profiler.stage("draw.ui"):
+                self.ui_manager.draw()
+            with profiler.stage("draw.overlay"):
+                self.profiler_overlay.draw(self.window.height)
 
     def on_update(self, delta_time):
-        self.ui_manager.update(delta_time)
-        
-        self.particle_manager.update()
-
-        tree_chopped = self.tree.update(delta_time)
-        if tree_chopped:
-            self.player_stats.add_wood(3)
-
-        self._handle_player_movement(delta_time)
-
+        self.frame_start = time.perf_counter()
+        if self.replayer is not None:
+            self.replay_frame(delta_time)
+            return
+        profiler = self.profiler
+        profiler.next_frame()
+        with profiler.stage("update"):
+            with profiler.stage("ui.update"):
+                # HUD animations hold still while idle
+                if not self.idle.idle:
+                    self.ui_manager.update(delta_time)
+                self.profiler_overlay.update(delta_time)
+
+            with profiler.stage("simulation"):
+                self.simulation.update(delta_time)
+            self.sync_player_sprite()
+
+            with profiler.stage("animation"):
+                self.animate(delta_time)
+
+            with profiler.stage("camera"):
+                self.center_camera_on_player()
+
+            with profiler.stage("lighting"):
+                self.update_lighting(delta_time)
+
+            with profiler.stage("world"):
+                bounds = self.view_bounds()
+                self.world.update(*bounds, delta_time)
+                self.recorder.view(*bounds)
+
+            with profiler.stage("minimap"):
+                player = self.simulation.player
+                self.minimap.update(player.x, player.y)
+
+            with profiler.stage("autosave"):
+                self.autosave.update(delta_time, self.camera.position)
+
+            self.idle.update(self.frame_signature(), self.animating())
+            if self.idle.idle:
+                self.set_update_rate(self.idle_rate())
+
+            if self.memory is not None:
+                self.memory.update(delta_time)
+
+    def frame_signature(self):
+        """Everything a frame shows that only changes when something happens"""
+        player = self.simulation.player
+        stats = self.player_stats
+        camera_x, camera_y = self.camera.position
+        return (player.x, player.y, round(camera_x / CAMERA_EPSILON), round(camera_y / CAMERA_EPSILON),
+                stats.health, stats.armor, stats.wood_count, self.forest.version, len(self.world),
+                self.simulation.npcs.count, self.quality.level, self.lightmap.builds)
+
+    def animating(self):
+        """Whether the next frame differs from this one even if nothing happens"""
+        npcs = self.simulation.npcs
+        return (len(self.particle_manager) > 0 or bool(self.forest.chopping)
+                or bool(self.world.pending) or bool(npcs.moving[:npcs.count].any())
+                or self.profiler.enabled)
+
+    def idle_rate(self):
+        """IDLE_RATE, or sooner if a simulation timer is due before then"""
+        simulation = self.simulation
+        due = simulation.scheduler.next_due()
+        if due is None or simulation.paused or simulation.time_scale <= 0:
+            return IDLE_RATE
+        wait = (due - simulation.scheduler.time) / simulation.time_scale
+        return max(UPDATE_RATE, min(IDLE_RATE, wait))
+
+    def set_update_rate(self, rate):
+        if rate != self.update_rate:
+            self.update_rate = rate
+            self.window.set_update_rate(rate)
+
+    def idle_changed(self, idle):
+        if not idle:
+            self.frame_cache.invalidate()
+            self.set_update_rate(UPDATE_RATE)
+
+    def replay_frame(self, delta_time):
+        """One recorded tick plus the usual per-frame upkeep; quits at the end"""
+        if not self.replayer.step():
+            print(self.replayer.report(self.frame_times))
+            self.replayer = None
+            arcade.exit()
+            return
+        self.sync_player_sprite()
+        self.animate(delta_time)
         self.center_camera_on_player()
-
-    def _handle_player_movement(self, delta_time):
-        """Handle player movement logic"""
-        if self.is_chopping and self.chop_target_position is not None:
-            if self._move_to_target(self.chop_target_position, delta_time):
-                self.tree.start_chopping()
-        elif self.target_position:
-            if self._move_to_target(self.target_position, delta_time):
-                self.target_position = None
-
-    def _move_to_target(self, target_position, delta_time):
-        """Move player towards target position. Returns True if reached."""
-        start_x = self.mouse_sprite.center_x
-        start_y = self.mouse_sprite.center_y
-        dest_x, dest_y = target_position
-
-        x_diff = dest_x - start_x
-        y_diff = dest_y - start_y
-        distance = math.sqrt(x_diff**2 + y_diff**2)
-
-        max_move_dist = PLAYER_SPEED * delta_time
-        if distance <= max_move_dist:
-            self.mouse_sprite.center_x = dest_x
-            self.mouse_sprite.center_y = dest_y
-            return True
-        else:
-            angle = math.atan2(y_diff, x_diff)
-            self.mouse_sprite.center_x += math.cos(angle) * PLAYER_SPEED * delta_time
-            self.mouse_sprite.center_y += math.sin(angle) * PLAYER_SPEED * delta_time
-            return False
+        self.update_lighting(delta_time)
+        player = self.simulation.player
+        self.minimap.update(player.x, player.y)
+        if self.memory is not None:
+            self.memory.update(delta_time)
+
+    def apply_quality(self, level):
+        """Governor callback; the simulation side is a command so replays see it"""
+        self.command(commands.QUALITY, self.quality.level)
+        self.ui_manager.set_effects(level.ui_effects)
+
+    def command(self, code, a=0.0, b=0.0, c=0.0, d=0.0):
+        """Record and apply a simulation command, unless a replay is driving it"""
+        if self.replayer is None:
+            self.recorder.perform(code, a, b, c, d)
 
     def on_key_press(self, key, key_modifiers):
-        if key == arcade.key.H:
-            self.player_stats.heal(10)
+        self.idle.wake()
+        if key_modifiers & arcade.key.MOD_SHIFT and key in (arcade.key.H, arcade.key.D, arcade.key.R):
+            self.affect_nearby_npcs(key)
+        elif key == arcade.key.H:
+            self.command(commands.HEAL, HEAL_AMOUNT)
         elif key == arcade.key.D:
-            self.player_stats.take_damage(15)
+            self.command(commands.DAMAGE, DAMAGE_AMOUNT)
         elif key == arcade.key.R:
-            self.player_stats.repair_armor(5)
+            self.command(commands.REPAIR, REPAIR_AMOUNT)
         elif key == arcade.key.C:
             self.camera.position = (
                 self.mouse_sprite.center_x - self.window.width / 2,
                 self.mouse_sprite.center_y - self.window.height / 2
             )
+        elif key == arcade.key.F3:
+            self.profiler_overlay.toggle()
+        elif key == arcade.key.F4:
+            self.profiler.export_chrome_trace(TRACE_PATH)
+        elif key == arcade.key.F5:
+            self.autosave.save(self.camera.position)
+        elif key == arcade.key.F9:
+            self.load_game()
+        elif key == arcade.key.N:
+            self.command(commands.SPAWN_NPCS, NPC_SPAWN_COUNT)
+        elif key == arcade.key.P:
+            self.simulation.paused = not self.simulation.paused
         elif key == arcade.key.ESCAPE:
-            self.is_chopping = False
-            self.chop_target_position = None
-            self.target_position = None
-            self.tree.stop_chopping()
+            self.command(commands.CANCEL)
+
+    def load_game(self):
+        """Restore the last save, if there is one"""
+        try:
+            self.camera.position = self.autosave.load()
+        except FileNotFoundError:
+            return
+        self.sync_player_sprite()
+
+    def affect_nearby_npcs(self, key):
+        """The H/D/R stat keys, applied in bulk to the NPCs around the player"""
+        if key == arcade.key.H:
+            self.command(commands.NPC_HEAL, HEAL_AMOUNT, NPC_EFFECT_RADIUS)
+        elif key == arcade.key.D:
+            self.command(commands.NPC_DAMAGE, DAMAGE_AMOUNT, NPC_EFFECT_RADIUS)
+        else:
+            self.command(commands.NPC_REPAIR, REPAIR_AMOUNT, NPC_EFFECT_RADIUS)
 
     def on_key_release(self, key, key_modifiers):
         pass
@@ -171,46 +476,81 @@ class GameView(arcade.View):
         pass
 
     def on_mouse_press(self, x, y, button, key_modifiers):
+        self.idle.wake()
         # Only handle left mouse button
         if button != arcade.MOUSE_BUTTON_LEFT:
             return
 
         world_x, world_y = self.screen_to_world(x, y)
-        
-        if self.tree.check_hover(world_x, world_y):
-            if not self.is_chopping:
-                self.is_chopping = True
-                self.chop_target_position = (self.tree.x, self.tree.y)
-                self.target_position = None
-            else:
-                self.is_chopping = False
-                self.chop_target_position = None
-                self.tree.stop_chopping()
-        else:
-            if self.is_chopping:
-                self.is_chopping = False
-                self.chop_target_position = None
-                self.tree.stop_chopping()
-            
-            self.target_position = (world_x, world_y)
-            self.particle_manager.create_splash(world_x, world_y, PARTICLE_COUNT)
+        self.command(commands.CLICK, world_x, world_y)
 
     def on_mouse_release(self, x, y, button, key_modifiers):
         pass
 
     def on_resize(self, width, height):
         """Handle window resize"""
+        self.idle.wake()
         self.ui_manager.resize(width, height)
 
 
-def main():
-    window = arcade.Window(WINDOW_WIDTH, WINDOW_HEIGHT, WINDOW_TITLE, resizable=True)
-
-    game = GameView()
-    window.show_view(game)
-
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print how long each startup phase took and exit after the first frame")
+    parser.add_argument("--record", metavar="PATH", help="save this session's input to PATH on exit")
+    parser.add_argument("--replay", metavar="PATH",
+                        help="replay a recorded session at full speed, print frame times and exit")
+    parser.add_argument("--memory", nargs="?", const=MEMORY_REPORT, metavar="PATH",
+                        help="trace memory per subsystem, flag steady growth and write a report "
+                             f"to PATH (default {MEMORY_REPORT}) on exit")
+    args = parser.parse_args(argv)
+
+    from core.loading_view import LoadingView
+    from core.startup import Preloader, StartupTimer
+
+    timer = StartupTimer(START)
+    timer.mark("import arcade")
+    rate = {"update_rate": REPLAY_RATE, "draw_rate": REPLAY_RATE} if args.replay else {}
+    window = arcade.Window(WINDOW_WIDTH, WINDOW_HEIGHT, WINDOW_TITLE, resizable=True, **rate)
+    timer.mark("window")
+    preloader = Preloader(GAME_MODULES, timer=timer).start()
+    games = []
+
+    def ready(textures):
+        timer.mark("loading screen")
+        recording = None
+        if args.replay:
+            from core.replay import Recording
+            recording = Recording.load(args.replay)
+        game = GameView(textures, recording)
+        timer.mark("game view")
+        if args.memory:
+            from core.memory import MemoryTracker
+            game.watch_memory(MemoryTracker())
+        if args.startup_report:
+            cache = preloader.cache
+            print(f"asset cache: {cache.hits} hits, {cache.misses} misses")
+            game.startup = timer
+        window.show_view(game)
+        games.append(game)
+
+    window.show_view(LoadingView(preloader, ready))
     arcade.run()
+    for game in games:
+        if args.record:
+            game.recorder.save(args.record)
+        game.world.close()
+        if game.simulation.woodcutters.planner is not None:
+            game.simulation.woodcutters.planner.close()
+        game.autosave.close()
+        if game.idle.skipped:
+            print(f"{game.idle.skipped} idle frames presented from cache instead of redrawn")
+        if game.memory is not None:
+            game.memory.sample(snapshot=True)
+            game.memory.write(args.memory)
+            game.memory.stop()
+            print(f"memory report written to {args.memory}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,116 @@
+"""Run the multiplayer server, or load-test it with scripted bots.
+
+    python server.py --port 7777
+    python server.py --bots 50 200 1000 --seconds 10
+
+Without --bots this serves a scattered-tree world until interrupted,
+printing tick and bandwidth figures every few seconds. With --bots it
+starts a server on a free localhost port for each count in turn, connects
+that many core.bots clients from a child process and reports ticks per
+second and bytes per second once they have all joined.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import random
+import resource
+import time
+
+from core.bots import run_swarm
+from core.server import SERVER_RATE, GameServer
+from core.simulation import Simulation
+
+WORLD_SIZE = 8000
+TREE_COUNT = 4000
+STATUS_INTERVAL = 5.0
+# Seconds to wait for every bot to connect
+JOIN_TIMEOUT = 60.0
+
+
+def build_server(seed, npcs=0):
+    rng = random.Random(seed)
+    simulation = Simulation(WORLD_SIZE / 2, WORLD_SIZE / 2, seed=seed)
+    for _ in range(TREE_COUNT):
+        simulation.add_tree(rng.uniform(0, WORLD_SIZE), rng.uniform(0, WORLD_SIZE))
+    if npcs:
+        simulation.woodcutters.spawn(npcs, WORLD_SIZE / 2, WORLD_SIZE / 2, WORLD_SIZE / 4)
+    return GameServer(simulation, seed=seed)
+
+
+async def serve(host, port, seed, npcs):
+    server = build_server(seed, npcs)
+    port = await server.start(host, port)
+    print(f"listening on {host}:{port}")
+    ticking = asyncio.create_task(server.run())
+    last_ticks, last_bytes = 0, 0
+    try:
+        while True:
+            await asyncio.sleep(STATUS_INTERVAL)
+            ticks, mean, p95, sent = server.stats()
+            print(f"{len(server.sessions)} clients  {(ticks - last_ticks) / STATUS_INTERVAL:.1f} ticks/s  "
+                  f"tick {mean:.2f} ms (p95 {p95:.2f})  {(sent - last_bytes) / STATUS_INTERVAL / 1024:.1f} KiB/s")
+            last_ticks, last_bytes = ticks, sent
+    finally:
+        ticking.cancel()
+        await server.close()
+
+
+async def load_test(count, seconds, seed, npcs):
+    """(ticks/s, mean tick ms, p95 tick ms, bytes/s, skipped snapshots) with ``count`` bots"""
+    server = build_server(seed, npcs)
+    port = await server.start()
+    bots = multiprocessing.Process(target=run_swarm,
+                                   args=("127.0.0.1", port, count, JOIN_TIMEOUT + seconds + 5, seed))
+    bots.start()
+    ticking = asyncio.create_task(server.run())
+    try:
+        deadline = time.perf_counter() + JOIN_TIMEOUT
+        while len(server.sessions) < count and time.perf_counter() < deadline:
+            await asyncio.sleep(0.1)
+        start_ticks, _, _, start_bytes = server.stats()
+        server.tick_times.clear()
+        start = time.perf_counter()
+        await asyncio.sleep(seconds)
+        elapsed = time.perf_counter() - start
+        ticks, mean, p95, sent = server.stats()
+        skipped = sum(session.skipped for session in server.sessions.values())
+        joined = len(server.sessions)
+    finally:
+        ticking.cancel()
+        await server.close()
+        bots.terminate()
+        bots.join()
+    return joined, (ticks - start_ticks) / elapsed, mean, p95, (sent - start_bytes) / elapsed, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7777)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--npcs", type=int, default=0, help="number of NPC woodcutters")
+    parser.add_argument("--bots", type=int, nargs="+", metavar="COUNT",
+                        help="load-test with each number of connected bots instead of serving")
+    parser.add_argument("--seconds", type=float, default=10.0, help="measured seconds per load test")
+    args = parser.parse_args()
+
+    if not args.bots:
+        asyncio.run(serve(args.host, args.port, args.seed, args.npcs))
+        return
+
+    # Both ends of every bot connection live on this machine
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = 2 * max(args.bots) + 64
+    if soft != resource.RLIM_INFINITY and soft < wanted:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(wanted, hard), hard))
+
+    print(f"target {SERVER_RATE} ticks/s, {args.seconds:.0f}s per run")
+    for count in args.bots:
+        joined, rate, mean, p95, sent, skipped = asyncio.run(load_test(count, args.seconds, args.seed, args.npcs))
+        print(f"{joined:5d} bots  {rate:5.1f} ticks/s  tick {mean:6.2f} ms (p95 {p95:6.2f})  "
+              f"{sent / 1024:8.1f} KiB/s  {sent / max(joined, 1):7.0f} B/s per bot  "
+              f"{skipped} snapshots skipped")
+
+
+if __name__ == "__main__":
+    main()